@@ -8,7 +8,12 @@ from django.utils.safestring import mark_safe
 from decimal import Decimal
 import datetime
 
-from .models import Ingreso, Gasto, ResumenTrimestral
+from .descargas import url_firmada
+from .lectura import con_miniatura
+from .models import (
+    Ingreso, Gasto, ResumenTrimestral, ResumenAnual, Cliente, Proveedor, ArchivoFactura,
+    SubidaFactura, AnalisisFactura
+)
 
 
 @admin.register(Ingreso)
@@ -18,7 +23,7 @@ class IngresoAdmin(admin.ModelAdmin):
         'fecha', 'cliente', 'descripcion', 'importe_formateado', 
         'iva_tag', 'irpf_tag', 'total_formateado', 'trimestre_año'
     ]
-    list_filter = ['trimestre', 'año', 'iva_porcentaje', 'cliente']
+    list_filter = ['trimestre', 'año', 'iva_porcentaje', 'cliente_ref']
     search_fields = ['cliente', 'descripcion']
     date_hierarchy = 'fecha'
     ordering = ['-fecha']
@@ -75,7 +80,7 @@ class GastoAdmin(admin.ModelAdmin):
         'fecha', 'proveedor', 'descripcion', 'importe_formateado', 
         'iva_tag', 'total_formateado', 'tiene_factura', 'trimestre_año'
     ]
-    list_filter = ['trimestre', 'año', 'iva_porcentaje', 'proveedor']
+    list_filter = ['trimestre', 'año', 'iva_porcentaje', 'proveedor_ref']
     search_fields = ['proveedor', 'descripcion']
     date_hierarchy = 'fecha'
     ordering = ['-fecha']
@@ -114,11 +119,20 @@ class GastoAdmin(admin.ModelAdmin):
         return format_html('<strong style="color: red;">{:.2f} €</strong>', obj.total)
     total_formateado.short_description = 'Total c/IVA'
     
+    def get_queryset(self, request):
+        return con_miniatura(super().get_queryset(request))
+    
     def tiene_factura(self, obj):
+        if obj.factura and obj.miniatura_nombre:
+            url = url_firmada()
+            return format_html(
+                '<a href="{}" target="_blank"><img src="{}" alt="Ver factura" style="max-height: 48px;"></a>',
+                url(obj.factura.name), url(obj.miniatura_nombre)
+            )
         if obj.factura:
             return format_html(
                 '<a href="{}" target="_blank">📄 Ver factura</a>',
-                obj.factura.url
+                url_firmada()(obj.factura.name)
             )
         return format_html('<span style="color: red;">⚠️ Sin factura</span>')
     tiene_factura.short_description = 'Factura'
@@ -129,14 +143,63 @@ class GastoAdmin(admin.ModelAdmin):
     trimestre_año.admin_order_field = 'trimestre'
 
 
+@admin.register(Cliente)
+class ClienteAdmin(admin.ModelAdmin):
+    """Admin para Clientes normalizados"""
+    list_display = ['nombre', 'usuario', 'num_facturas', 'total_facturado']
+    search_fields = ['nombre_normalizado']
+    list_select_related = ['usuario']
+    readonly_fields = ['nombre_normalizado', 'num_facturas', 'total_facturado']
+
+
+@admin.register(Proveedor)
+class ProveedorAdmin(admin.ModelAdmin):
+    """Admin para Proveedores normalizados"""
+    list_display = ['nombre', 'usuario', 'num_facturas', 'total_facturado']
+    search_fields = ['nombre_normalizado']
+    list_select_related = ['usuario']
+    readonly_fields = ['nombre_normalizado', 'num_facturas', 'total_facturado']
+
+
+@admin.register(SubidaFactura)
+class SubidaFacturaAdmin(admin.ModelAdmin):
+    """Admin para subidas de facturas por trozos"""
+    list_display = ['nombre', 'usuario', 'recibido', 'tamaño', 'completa', 'actualizada']
+    list_filter = [('archivo', admin.EmptyFieldListFilter)]
+    list_select_related = ['usuario']
+    readonly_fields = ['usuario', 'tamaño', 'recibido', 'sha256', 'archivo']
+    
+    def completa(self, obj):
+        return obj.completa
+    completa.boolean = True
+
+
+@admin.register(ArchivoFactura)
+class ArchivoFacturaAdmin(admin.ModelAdmin):
+    """Admin para el contenido de las facturas (uno por SHA-256)"""
+    list_display = ['archivo', 'tamaño', 'creado']
+    search_fields = ['sha256']
+    readonly_fields = ['sha256', 'archivo', 'tamaño']
+
+
+@admin.register(AnalisisFactura)
+class AnalisisFacturaAdmin(admin.ModelAdmin):
+    """Admin para el análisis de las facturas (uno por archivo)"""
+    list_display = ['archivo', 'estado', 'total_sugerido', 'fecha_sugerida', 'proveedor_sugerido', 'actualizado']
+    list_filter = ['estado']
+    search_fields = ['archivo', 'proveedor_sugerido']
+    readonly_fields = ['archivo', 'miniatura', 'actualizado']
+
+
 @admin.register(ResumenTrimestral)
 class ResumenTrimestralAdmin(admin.ModelAdmin):
     """Admin personalizado para Resúmenes Trimestrales"""
     list_display = [
-        'periodo', 'ingresos_tag', 'gastos_tag', 'beneficio_tag', 
+        'periodo', 'usuario', 'ingresos_tag', 'gastos_tag', 'beneficio_tag', 
         'iva_tag', 'irpf_tag'
     ]
     list_filter = ['año', 'trimestre']
+    list_select_related = ['usuario']
     ordering = ['-año', '-trimestre']
     
     def periodo(self, obj):
@@ -189,6 +252,25 @@ class ResumenTrimestralAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(ResumenAnual)
+class ResumenAnualAdmin(admin.ModelAdmin):
+    """Resúmenes del cierre del ejercicio (`manage.py resumenes_anuales`)"""
+    list_display = [
+        'año', 'usuario', 'regimen_iva', 'ingresos_totales', 'gastos_totales',
+        'rendimiento_neto', 'pagos_130', 'resultado_iva', 'calculado'
+    ]
+    list_filter = ['año', 'regimen_iva']
+    list_select_related = ['usuario']
+    search_fields = ['usuario__email']
+    
+    def has_add_permission(self, request):
+        # Los calcula el comando
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 # Personalizar el título del admin
 admin.site.site_header = "HelpTax Admin - Gestión Trimestral"
 admin.site.site_title = "HelpTax"
@@ -0,0 +1,187 @@
+# backend/accounts/analisis.py
+
+import io
+import os
+import re
+import unicodedata
+from datetime import date
+from decimal import Decimal
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+try:
+    import pymupdf as fitz
+except ImportError:  # Sin PyMuPDF (requirements.txt) los PDFs no tienen miniatura
+    try:
+        import fitz
+    except ImportError:
+        fitz = None
+
+try:
+    import pypdf
+except ImportError:  # pypdf solo hace falta si no está PyMuPDF (texto de PDFs)
+    pypdf = None
+
+try:
+    import pytesseract
+except ImportError:  # pytesseract es opcional (OCR de fotos y PDFs escaneados)
+    pytesseract = None
+
+
+# Análisis de una factura: texto, miniatura y datos sugeridos para rellenar
+# el gasto. No usa Django: se ejecuta en procesos aparte (accounts/procesado.py)
+# y recibe la ruta del archivo. Si las librerías instaladas no pueden sacar
+# el texto, el análisis queda como 'sin_soporte' en vez de 'hecho'.
+
+MINIATURA_PX = 320
+MAX_PAGINAS = 3
+MAX_TEXTO = 20000
+EXTENSIONES_IMAGEN = {'jpg', 'jpeg', 'png', 'webp', 'heic'}
+
+IMPORTE = re.compile(r'(?<![\d.,])(\d{1,3}(?:[.\s]\d{3})+|\d+)[.,](\d{2})(?![\d])')
+FECHA_DMA = re.compile(r'\b(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})\b')
+FECHA_AMD = re.compile(r'\b(\d{4})-(\d{2})-(\d{2})\b')
+SOCIEDAD = re.compile(r'\b(s\.?\s?l\.?\s?u?|s\.?\s?a\.?\s?u?|s\.?\s?coop)\b\.?', re.IGNORECASE)
+
+
+def _normalizar(linea):
+    texto = unicodedata.normalize('NFKD', linea)
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+def _importes(linea):
+    """Importes de una línea en formato español (1.234,56) o con punto decimal"""
+    return [
+        Decimal(re.sub(r'[.\s]', '', entero) + '.' + decimales)
+        for entero, decimales in IMPORTE.findall(linea)
+    ]
+
+
+def _fechas(linea):
+    candidatas = [(int(a), int(m), int(d)) for d, m, a in FECHA_DMA.findall(linea)]
+    candidatas += [(int(a), int(m), int(d)) for a, m, d in FECHA_AMD.findall(linea)]
+    fechas = []
+    for año, mes, dia in candidatas:
+        try:
+            fechas.append(date(año, mes, dia))
+        except ValueError:
+            continue
+    return fechas
+
+
+def sugerencias(texto):
+    """
+    Base imponible, total, fecha y proveedor que parece tener la factura.
+    Heurísticas sobre el texto: etiquetas habituales ('base imponible',
+    'total', 'fecha') y, para el proveedor, la primera línea con forma de
+    sociedad o, si no hay, la primera línea con letras.
+    """
+    base = total = fecha = None
+    primera_fecha = proveedor = primera_linea = None
+
+    for linea in texto.splitlines():
+        linea = linea.strip()
+        if not linea:
+            continue
+        normalizada = _normalizar(linea)
+
+        if primera_linea is None and re.search(r'[a-z]{3}', normalizada):
+            primera_linea = linea
+        if proveedor is None and SOCIEDAD.search(linea):
+            proveedor = linea
+
+        fechas = _fechas(linea)
+        if fechas:
+            primera_fecha = primera_fecha or fechas[0]
+            if fecha is None and 'fecha' in normalizada and 'vencimiento' not in normalizada:
+                fecha = fechas[0]
+
+        importes = _importes(linea)
+        if not importes:
+            continue
+        if 'base imponible' in normalizada or normalizada.startswith('base'):
+            base = base or importes[-1]
+        elif re.search(r'\btotal\b', normalizada) and 'subtotal' not in normalizada:
+            # El último "total" suele ser el de la factura (con IVA)
+            total = importes[-1]
+
+    return {
+        'base': base,
+        'total': total,
+        'fecha': fecha or primera_fecha,
+        'proveedor': (proveedor or primera_linea or '')[:100],
+    }
+
+
+def _miniatura(imagen):
+    imagen = ImageOps.exif_transpose(imagen)
+    imagen.thumbnail((MINIATURA_PX, MINIATURA_PX))
+    if imagen.mode not in ('RGB', 'L'):
+        imagen = imagen.convert('RGB')
+    salida = io.BytesIO()
+    imagen.save(salida, 'JPEG', quality=80, optimize=True)
+    return salida.getvalue()
+
+
+def _ocr(imagen):
+    """Texto de la imagen, o None si no hay OCR instalado"""
+    if pytesseract is None:
+        return None
+    try:
+        return pytesseract.image_to_string(imagen, lang='spa')
+    except pytesseract.TesseractError:
+        # Sin los datos del idioma español
+        return pytesseract.image_to_string(imagen)
+
+
+def _analizar_pdf(ruta):
+    if fitz is not None:
+        with fitz.open(ruta) as documento:
+            paginas = [documento[i] for i in range(min(len(documento), MAX_PAGINAS))]
+            texto = '\n'.join(pagina.get_text() for pagina in paginas)
+            if not paginas:
+                return texto, None
+            pix = paginas[0].get_pixmap(dpi=72 if texto.strip() else 200)
+            imagen = Image.frombytes('RGB', (pix.width, pix.height), pix.samples)
+        if not texto.strip():
+            # PDF escaneado: sin capa de texto
+            texto = _ocr(imagen)
+        return texto, _miniatura(imagen)
+
+    if pypdf is not None:
+        lector = pypdf.PdfReader(ruta)
+        texto = '\n'.join(
+            pagina.extract_text() or '' for pagina in lector.pages[:MAX_PAGINAS]
+        )
+        # Un PDF escaneado necesita PyMuPDF (para la imagen) y OCR
+        return texto if texto.strip() else None, None
+    return None, None
+
+
+def _analizar_imagen(ruta):
+    try:
+        with Image.open(ruta) as imagen:
+            imagen.load()
+    except UnidentifiedImageError:
+        # HEIC sin pillow-heif, por ejemplo
+        return None, None
+    return _ocr(imagen), _miniatura(imagen)
+
+
+def analizar(ruta):
+    """
+    {'texto', 'miniatura' (JPEG en bytes o None), 'base', 'total', 'fecha',
+    'proveedor', 'soportado'} de la factura en `ruta`. `soportado` es False
+    si con las librerías instaladas no se puede sacar el texto del archivo.
+    """
+    extension = os.path.splitext(ruta)[1].lstrip('.').lower()
+    if extension == 'pdf':
+        texto, miniatura = _analizar_pdf(ruta)
+    elif extension in EXTENSIONES_IMAGEN:
+        texto, miniatura = _analizar_imagen(ruta)
+    else:
+        texto, miniatura = None, None
+
+    soportado = texto is not None
+    texto = (texto or '').strip()[:MAX_TEXTO]
+    return dict(sugerencias(texto), texto=texto, miniatura=miniatura, soportado=soportado)
@@ -0,0 +1,145 @@
+# backend/accounts/anual.py
+
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.db import close_old_connections, transaction
+
+from .modelos_fiscales import CERO, modelos_trimestrales
+from .models import PerfilAutonomo, ResumenAnual
+from .resumen import (
+    consulta_perfiles, consultas_modelos, perfil_fiscal, totales_modelos, trimestres_año
+)
+
+
+# Cierre del ejercicio: ResumenAnual de todos los perfiles. Los usuarios se
+# reparten en lotes y cada lote es una unidad de trabajo de un pool de
+# procesos: tres queries agregadas para todo el lote (perfiles y una GROUP
+# BY por modelo), los modelos 130 y 303 de cada usuario en Python y un
+# bulk_create en una transacción. Un lote guardado no se repite: si se
+# interrumpe, volver a lanzarlo sigue con los usuarios sin resumen del año.
+
+
+def resumen_anual(usuario_id, año, regimen_iva, trimestres, modelos):
+    """Totales trimestrales y modelos del año de un usuario -> ResumenAnual sin guardar"""
+    def suma(campo):
+        return sum((trimestre[campo] for trimestre in trimestres), CERO)
+
+    def suma_tipos(clave, posicion, solo_con_iva=False):
+        # clave: 'devengado' o 'deducible'; posicion: 0 base, 1 cuota
+        return sum((
+            valores[posicion]
+            for trimestre in trimestres
+            for tipo, valores in trimestre[clave].items()
+            if tipo or not solo_con_iva
+        ), CERO)
+
+    ultimo_303 = modelos[-1]['modelo_303']
+    iva_devengado = suma_tipos('devengado', 1)
+    iva_deducible = suma_tipos('deducible', 1)
+    ingresos = suma('ingresos_totales')
+    gastos = suma('gastos_totales')
+    return ResumenAnual(
+        usuario_id=usuario_id,
+        año=año,
+        regimen_iva=regimen_iva,
+        ingresos_totales=ingresos,
+        gastos_totales=gastos,
+        rendimiento_neto=ingresos - gastos,
+        irpf_retenido=suma('irpf_retenido'),
+        pagos_130=sum((
+            modelo['modelo_130'].get('importe', CERO) for modelo in modelos
+        ), CERO),
+        base_imponible=suma_tipos('devengado', 0, solo_con_iva=True),
+        iva_devengado=iva_devengado,
+        base_deducible=suma_tipos('deducible', 0, solo_con_iva=True),
+        iva_deducible=iva_deducible,
+        resultado_iva=iva_devengado - iva_deducible,
+        iva_a_devolver=ultimo_303['importe'] if ultimo_303.get('resultado') == 'a_devolver' else CERO,
+        volumen_operaciones=ingresos,
+        num_ingresos=sum(trimestre['num_ingresos'] for trimestre in trimestres),
+        num_gastos=sum(trimestre['num_gastos'] for trimestre in trimestres),
+    )
+
+
+def calcular_resumenes_anuales(usuario_ids, año):
+    """ResumenAnual sin guardar de `usuario_ids` con tres queries para todos"""
+    perfiles = {
+        perfil['usuario_id']: perfil
+        for perfil in consulta_perfiles(usuario_id__in=usuario_ids)
+    }
+    totales = totales_modelos(
+        (modelo, fila)
+        for modelo, consulta in consultas_modelos(usuario_id__in=usuario_ids, año=año)
+        for fila in consulta
+    )
+
+    resumenes = []
+    for usuario_id in usuario_ids:
+        regimen_iva, tipo_irpf_default = perfil_fiscal(perfiles.get(usuario_id))
+        trimestres = trimestres_año(totales, usuario_id, año)
+        # Sin el año anterior: la obligación de presentar el 130 no se guarda
+        modelos = modelos_trimestrales(trimestres, [], regimen_iva, tipo_irpf_default)
+        resumenes.append(resumen_anual(usuario_id, año, regimen_iva, trimestres, modelos))
+    return resumenes
+
+
+def procesar_lote(usuario_ids, año):
+    """Calcula y guarda los resúmenes de un lote; devuelve cuántos"""
+    close_old_connections()
+    resumenes = calcular_resumenes_anuales(usuario_ids, año)
+    with transaction.atomic():
+        ResumenAnual.objects.filter(usuario_id__in=usuario_ids, año=año).delete()
+        ResumenAnual.objects.bulk_create(resumenes)
+    return len(resumenes)
+
+
+def usuarios_pendientes(año):
+    """IDs de los usuarios con perfil y sin ResumenAnual del año"""
+    return list(
+        PerfilAutonomo.objects.exclude(
+            usuario_id__in=ResumenAnual.objects.filter(año=año).values('usuario_id')
+        ).order_by('usuario_id').values_list('usuario_id', flat=True)
+    )
+
+
+def generar_resumenes_anuales(año, procesos=1, lote=500, recalcular=False, progreso=None):
+    """
+    ResumenAnual de todos los usuarios pendientes en lotes de `lote`
+    usuarios repartidos en `procesos` procesos (con 1, en este).
+    `recalcular` borra antes los del año, así que también se reanuda.
+    `progreso(hechos, total, segundos)` se llama al terminar cada lote.
+    Devuelve cuántos resúmenes se han guardado.
+    """
+    if recalcular:
+        ResumenAnual.objects.filter(año=año).delete()
+    pendientes = usuarios_pendientes(año)
+    lotes = [pendientes[i:i + lote] for i in range(0, len(pendientes), lote)]
+    inicio = time.perf_counter()
+    hechos = 0
+
+    if procesos <= 1:
+        for usuario_ids in lotes:
+            hechos += procesar_lote(usuario_ids, año)
+            if progreso:
+                progreso(hechos, len(pendientes), time.perf_counter() - inicio)
+        return hechos
+
+    # spawn (como procesado.py): cada hijo configura Django y abre sus conexiones
+    with ProcessPoolExecutor(
+        max_workers=procesos, mp_context=multiprocessing.get_context('spawn'),
+        initializer=django.setup
+    ) as pool:
+        futuros = [pool.submit(procesar_lote, usuario_ids, año) for usuario_ids in lotes]
+        try:
+            for futuro in as_completed(futuros):
+                hechos += futuro.result()
+                if progreso:
+                    progreso(hechos, len(pendientes), time.perf_counter() - inicio)
+        except BaseException:
+            # Interrumpido o un lote falló: lo ya guardado se queda
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+    return hechos
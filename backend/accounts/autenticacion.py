@@ -0,0 +1,260 @@
+# backend/accounts/autenticacion.py
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import PerfilAutonomo, TokenRevocado
+
+
+UserModel = get_user_model()
+
+
+class EmailBackend(ModelBackend):
+    """
+    Login por email (o por nombre de usuario, para el admin) con una sola
+    consulta por índice y una sola comprobación de la contraseña, exista o
+    no el usuario: un email desconocido tarda lo mismo que una contraseña
+    incorrecta y no delata qué cuentas existen.
+    """
+
+    def authenticate(self, request, username=None, password=None, email=None, **kwargs):
+        identificador = email or username or kwargs.get(UserModel.USERNAME_FIELD)
+        # Del JSON del login puede llegar cualquier tipo ("email": 123, una lista...)
+        if not isinstance(identificador, str) or not isinstance(password, str):
+            return None
+        identificador = identificador.strip()
+        if not identificador:
+            return None
+
+        # email (índice de la migración 0009) OR username (único): una consulta.
+        # El perfil viene en la misma, que el login lo devuelve
+        candidatos = list(
+            UserModel._default_manager.select_related('perfil')
+            .filter(Q(email=identificador) | Q(username=identificador))
+            .order_by('pk')
+        )
+        if not candidatos:
+            # Mismo coste que comprobar una contraseña real
+            UserModel().set_password(password)
+            return None
+
+        usuario = next(
+            (candidato for candidato in candidatos if candidato.username == identificador),
+            candidatos[0]
+        )
+        if usuario.check_password(password) and self.user_can_authenticate(usuario):
+            return usuario
+        return None
+
+
+# JWT sin consulta por petición. El token lleva el id, el email y el id y
+# nombre fiscal del perfil firmados al emitirlo, y con ellos se construye el
+# usuario de request.user (el resto de campos se cargan si se usan). Los
+# tokens sin esos datos (emitidos antes) tiran de una caché LRU con TTL en
+# memoria del proceso. Al cambiar, desactivar o borrar el usuario o su
+# perfil se guarda el momento en la caché de Django: los tokens emitidos
+# antes pasan a leer el usuario de la BD (uno borrado o inactivo -> 401).
+# Solo lo ven todos los procesos si la caché es compartida (CACHE_REDIS_URL);
+# con LocMemCache los demás se fían del token hasta que caduca
+# (ACCESS_TOKEN_LIFETIME).
+
+CLAIMS = ('email', 'perfil_id', 'nombre_fiscal')
+
+
+class CacheLRU:
+    """Caché LRU con caducidad, acotada a `maximo` entradas y segura entre hilos"""
+
+    def __init__(self, maximo, ttl):
+        self.maximo = maximo
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            caduca, valor = entrada
+            if caduca <= time.monotonic():
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + self.ttl, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maximo:
+                self._datos.popitem(last=False)
+
+    def delete(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self):
+        return len(self._datos)
+
+
+usuarios = CacheLRU(
+    getattr(settings, 'JWT_USUARIOS_CACHE_MAX', 10000),
+    getattr(settings, 'JWT_USUARIOS_CACHE_TTL', 300),
+)
+
+
+def _clave_revocado(usuario_id):
+    return f'jwt_revocado:{usuario_id}'
+
+
+def datos_usuario(usuario):
+    """Los claims de CLAIMS de un usuario (con su perfil si lo tiene)"""
+    perfil = getattr(usuario, 'perfil', None)
+    return {
+        'email': usuario.email,
+        'perfil_id': perfil.pk if perfil else None,
+        'nombre_fiscal': perfil.nombre_fiscal if perfil else None,
+    }
+
+
+def token_para(usuario):
+    """RefreshToken.for_user con los claims de CLAIMS (el access token los copia)"""
+    refresh = RefreshToken.for_user(usuario)
+    for claim, valor in datos_usuario(usuario).items():
+        refresh[claim] = valor
+    return refresh
+
+
+def construir_usuario(usuario_id, datos):
+    """
+    User (y su perfil) a partir de los claims, como si vinieran de la BD con
+    los demás campos diferidos: usuario=request.user y .save() funcionan
+    igual; un campo no incluido (is_active también) cuesta una query al leerlo.
+    """
+    usuario = UserModel.from_db(DEFAULT_DB_ALIAS, ['id', 'email'], [usuario_id, datos['email']])
+    perfil = None
+    if datos['perfil_id'] is not None:
+        perfil = PerfilAutonomo.from_db(
+            DEFAULT_DB_ALIAS, ['id', 'usuario_id', 'nombre_fiscal'],
+            [datos['perfil_id'], usuario_id, datos['nombre_fiscal']]
+        )
+        PerfilAutonomo.usuario.field.set_cached_value(perfil, usuario)
+    # Sin perfil se cachea None: usuario.perfil lanza DoesNotExist sin consultar
+    UserModel.perfil.related.set_cached_value(usuario, perfil)
+    return usuario
+
+
+def cargar_usuario(usuario_id):
+    """Usuario con su perfil desde la BD (y a la caché), o AuthenticationFailed"""
+    try:
+        usuario = UserModel._default_manager.select_related('perfil').get(
+            **{jwt_settings.USER_ID_FIELD: usuario_id}
+        )
+    except UserModel.DoesNotExist:
+        usuarios.delete(usuario_id)
+        raise AuthenticationFailed('Usuario no encontrado', code='user_not_found')
+    if not usuario.is_active:
+        usuarios.delete(usuario_id)
+        raise AuthenticationFailed('Usuario inactivo', code='user_inactive')
+    usuarios.set(usuario_id, (time.time(), datos_usuario(usuario)))
+    return usuario
+
+
+def revocar(usuario_id, recargar=True):
+    """
+    Deja de fiarse de los tokens actuales del usuario y, con `recargar`,
+    guarda ya sus datos nuevos: las peticiones siguientes de este proceso no
+    consultan la BD. Basta recordarlo lo que dura un access token.
+    """
+    cache.set(
+        _clave_revocado(usuario_id), time.time(),
+        timeout=jwt_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+    )
+    usuarios.delete(usuario_id)
+    if recargar:
+        try:
+            cargar_usuario(usuario_id)
+        except AuthenticationFailed:
+            pass
+
+
+class JWTClaimsAuthentication(JWTAuthentication):
+    """JWTAuthentication que no consulta la BD si el token trae los claims"""
+
+    def get_user(self, validated_token):
+        try:
+            usuario_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('El token no identifica al usuario')
+
+        revocado = cache.get(_clave_revocado(usuario_id))
+        emitido = validated_token.get('iat', 0)
+        if all(claim in validated_token for claim in CLAIMS) and (
+            revocado is None or emitido > revocado
+        ):
+            return construir_usuario(usuario_id, {claim: validated_token[claim] for claim in CLAIMS})
+
+        # La entrada de la caché vale si se cargó después del último cambio
+        entrada = usuarios.get(usuario_id)
+        if entrada is None or (revocado is not None and entrada[0] <= revocado):
+            return cargar_usuario(usuario_id)
+        return construir_usuario(usuario_id, entrada[1])
+
+
+# Lista negra de refresh tokens para la rotación: al refrescar, el jti del
+# token usado entra en TokenRevocado (clave primaria) y un segundo uso choca
+# con ella. La inserción es a la vez la comprobación, así que el coste no
+# depende de cuántos tokens se hayan emitido, y solo se guardan los jti
+# hasta que caducan.
+
+_ultima_purga = None
+_lock_purga = threading.Lock()
+
+
+def revocar_refresh(token):
+    """Mete el refresh token en la lista negra. False si ya estaba (token reutilizado)"""
+    caduca = datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+    try:
+        with transaction.atomic():
+            TokenRevocado.objects.create(jti=token[jwt_settings.JTI_CLAIM], caduca=caduca)
+    except IntegrityError:
+        return False
+    return True
+
+
+def purgar_revocados(antes_de=None):
+    """Borra de la lista negra los tokens ya caducados; devuelve cuántos"""
+    borrados, _ = TokenRevocado.objects.filter(caduca__lt=antes_de or timezone.now()).delete()
+    return borrados
+
+
+def purgar_si_toca():
+    """purgar_revocados como mucho una vez cada JWT_PURGA_INTERVALO segundos por proceso"""
+    global _ultima_purga
+    ahora = time.monotonic()
+    with _lock_purga:
+        if _ultima_purga is not None and ahora - _ultima_purga < getattr(
+            settings, 'JWT_PURGA_INTERVALO', 60 * 60
+        ):
+            return 0
+        _ultima_purga = ahora
+    return purgar_revocados()
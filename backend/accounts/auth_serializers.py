@@ -4,6 +4,7 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 from dj_rest_auth.registration.serializers import RegisterSerializer
 from .models import PerfilAutonomo
+from .nif import NIFInvalido, nif_registrado, validar_nif
 
 
 class CustomRegisterSerializer(RegisterSerializer):
@@ -17,16 +18,15 @@ class CustomRegisterSerializer(RegisterSerializer):
     tipo_irpf_default = serializers.IntegerField(default=7, required=False)
     
     def validate_nif(self, value):
-        """Validar que el NIF no esté duplicado"""
-        if PerfilAutonomo.objects.filter(nif=value).exists():
+        """Validar el formato del NIF y que no esté duplicado"""
+        try:
+            value = validar_nif(value)
+        except NIFInvalido as e:
+            raise serializers.ValidationError(str(e))
+        if nif_registrado(value):
             raise serializers.ValidationError("Ya existe un usuario con este NIF")
         return value
     
-    def validate(self, data):
-        # Debug: imprimir los datos recibidos
-        print("Datos recibidos:", data)
-        return super().validate(data)
-    
     def save(self, request):
         user = super().save(request)
         
@@ -57,6 +57,13 @@ class PerfilAutonomoSerializer(serializers.ModelSerializer):
             'regimen_iva', 'fecha_alta', 'activo'
         ]
         read_only_fields = ['fecha_alta', 'activo']
+    
+    def validate_nif(self, value):
+        """Formato y control del NIF (la unicidad la comprueba el validador del modelo)"""
+        try:
+            return validar_nif(value)
+        except NIFInvalido as e:
+            raise serializers.ValidationError(str(e))
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -6,6 +6,7 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from django.contrib.auth.models import User
 from .models import PerfilAutonomo
+from .nif import NIFInvalido, nif_registrado, validar_nif
 from .auth_serializers import PerfilAutonomoSerializer, UserSerializer
 
 
@@ -15,7 +16,8 @@ class CurrentUserView(generics.RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticated]
     
     def get_object(self):
-        return self.request.user
+        # request.user viene del token con casi todos los campos diferidos
+        return User.objects.select_related('perfil').get(pk=self.request.user.pk)
 
 
 class PerfilAutonomoView(generics.RetrieveUpdateAPIView):
@@ -24,7 +26,7 @@ class PerfilAutonomoView(generics.RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticated]
     
     def get_object(self):
-        return self.request.user.perfil
+        return PerfilAutonomo.objects.select_related('usuario').get(usuario_id=self.request.user.pk)
 
 
 @api_view(['GET'])
@@ -41,7 +43,13 @@ def check_auth(request):
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def check_nif(request):
-    """Verificar si un NIF ya está registrado"""
-    nif = request.data.get('nif', '')
-    exists = PerfilAutonomo.objects.filter(nif=nif).exists()
-    return Response({'exists': exists})
\ No newline at end of file
+    """
+    Verificar si un NIF ya está registrado. Se llama mientras se escribe:
+    los NIF mal formados se rechazan sin query y el filtro en memoria
+    descarta casi todos los que no existen (accounts/nif.py).
+    """
+    try:
+        nif = validar_nif(request.data.get('nif', ''))
+    except NIFInvalido as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'exists': nif_registrado(nif)})
\ No newline at end of file
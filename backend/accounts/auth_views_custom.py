@@ -6,9 +6,20 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from rest_framework_simplejwt.tokens import RefreshToken
+from .autenticacion import cargar_usuario, purgar_si_toca, revocar_refresh, token_para
+from .logs import enmascarar_email
 from .models import PerfilAutonomo
-import json
+from .nif import NIFInvalido, nif_registrado, validar_nif
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -16,7 +27,7 @@ def custom_login(request):
     """Vista de login personalizada"""
     try:
         data = request.data
-        print("Datos recibidos en login:", json.dumps(data, indent=2))
+        inicio = time.perf_counter()
         
         # Obtener email y password
         email = data.get('email')
@@ -27,36 +38,40 @@ def custom_login(request):
                 'error': 'Email y contraseña son requeridos'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Intentar autenticar con el email como username
-        user = authenticate(username=email, password=password)
+        if not isinstance(email, str) or not isinstance(password, str):
+            return Response({
+                'error': 'Email y contraseña deben ser texto'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        if not user:
-            # Si falla, intentar buscar el usuario por email
-            try:
-                user_obj = User.objects.get(email=email)
-                user = authenticate(username=user_obj.username, password=password)
-            except User.DoesNotExist:
-                pass
+        # Una consulta y un hash, exista o no el usuario (accounts.autenticacion.EmailBackend)
+        user = authenticate(request, email=email, password=password)
         
+        registro = {
+            'email': enmascarar_email(email),
+            'ip': request.META.get('REMOTE_ADDR'),
+            'duracion_ms': round((time.perf_counter() - inicio) * 1000, 1),
+        }
         if not user:
+            logger.info(
+                'Login fallido', extra=dict(registro, evento='login_fallido', motivo='credenciales')
+            )
             return Response({
                 'error': 'Credenciales inválidas'
             }, status=status.HTTP_401_UNAUTHORIZED)
+        logger.info('Login', extra=dict(registro, evento='login', usuario_id=user.id))
         
-        # Generar tokens JWT
-        refresh = RefreshToken.for_user(user)
+        # Tokens JWT con el email y el perfil firmados (sin query por petición)
+        refresh = token_para(user)
         
-        # Obtener perfil si existe
+        # Perfil si existe (el backend ya lo trae en la misma consulta)
         perfil_data = None
-        try:
-            perfil = user.perfil
+        perfil = getattr(user, 'perfil', None)
+        if perfil is not None:
             perfil_data = {
                 'nombre_fiscal': perfil.nombre_fiscal,
                 'nif': perfil.nif,
                 'ciudad': perfil.ciudad
             }
-        except:
-            pass
         
         return Response({
             'access': str(refresh.access_token),
@@ -69,20 +84,66 @@ def custom_login(request):
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
-        print("Error en login:", str(e))
+        logger.exception('Error en login', extra={'evento': 'login_error'})
         return Response({
             'error': 'Error al procesar el login',
             'detail': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def token_refresh(request):
+    """
+    Access token nuevo a partir del refresh token. Con ROTATE_REFRESH_TOKENS
+    devuelve también un refresh nuevo y, con BLACKLIST_AFTER_ROTATION, el
+    usado deja de valer (accounts.autenticacion.revocar_refresh).
+    """
+    valor = request.data.get('refresh')
+    if not valor:
+        return Response({
+            'error': 'El refresh token es requerido'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        refresh = RefreshToken(valor)
+    except TokenError:
+        return Response({
+            'error': 'Token inválido o caducado'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    
+    usuario_id = refresh.get(jwt_settings.USER_ID_CLAIM)
+    rotar = jwt_settings.ROTATE_REFRESH_TOKENS
+    if rotar and jwt_settings.BLACKLIST_AFTER_ROTATION and not revocar_refresh(refresh):
+        logger.warning('Refresh token reutilizado', extra={
+            'evento': 'refresh_reutilizado', 'usuario_id': usuario_id
+        })
+        return Response({
+            'error': 'Token inválido o caducado'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    
+    # Datos frescos del usuario para los claims del token nuevo
+    try:
+        user = cargar_usuario(usuario_id)
+    except AuthenticationFailed:
+        return Response({
+            'error': 'Token inválido o caducado'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    
+    nuevo = token_para(user)
+    data = {'access': str(nuevo.access_token)}
+    if rotar:
+        data['refresh'] = str(nuevo)
+    purgar_si_toca()
+    return Response(data, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def custom_register(request):
     """Vista de registro personalizada con mejor manejo de errores"""
     try:
         data = request.data
-        print("Datos recibidos en registro:", json.dumps(data, indent=2))
         
         # Validar campos requeridos
         required_fields = ['email', 'password1', 'password2', 'nombre_fiscal', 'nif', 
@@ -106,39 +167,59 @@ def custom_register(request):
                 'error': 'Las contraseñas no coinciden'
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        # Formato y control del NIF, antes de cualquier query
+        try:
+            nif = validar_nif(data['nif'])
+        except NIFInvalido as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
         # Validar que el email no exista
         if User.objects.filter(email=data['email']).exists():
             return Response({
                 'error': 'Ya existe un usuario con este email'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Validar que el NIF no exista
-        if PerfilAutonomo.objects.filter(nif=data['nif']).exists():
+        # Validar que el NIF no exista (el filtro en memoria evita casi siempre la query)
+        if nif_registrado(nif):
             return Response({
                 'error': 'Ya existe un usuario con este NIF'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Crear usuario
-        user = User.objects.create_user(
-            username=data['email'],  # Usamos email como username
-            email=data['email'],
-            password=data['password1']
-        )
-        
-        # Crear perfil de autónomo
-        perfil = PerfilAutonomo.objects.create(
-            usuario=user,
-            nombre_fiscal=data['nombre_fiscal'],
-            nif=data['nif'],
-            direccion=data['direccion'],
-            codigo_postal=data['codigo_postal'],
-            ciudad=data['ciudad'],
-            provincia=data['provincia'],
-            tipo_irpf_default=data.get('tipo_irpf_default', 7)
-        )
-        
-        # Generar tokens JWT
-        refresh = RefreshToken.for_user(user)
+        try:
+            with transaction.atomic():
+                # Crear usuario
+                user = User.objects.create_user(
+                    username=data['email'],  # Usamos email como username
+                    email=data['email'],
+                    password=data['password1']
+                )
+                
+                # Crear perfil de autónomo
+                perfil = PerfilAutonomo.objects.create(
+                    usuario=user,
+                    nombre_fiscal=data['nombre_fiscal'],
+                    nif=nif,
+                    direccion=data['direccion'],
+                    codigo_postal=data['codigo_postal'],
+                    ciudad=data['ciudad'],
+                    provincia=data['provincia'],
+                    tipo_irpf_default=data.get('tipo_irpf_default', 7)
+                )
+        except IntegrityError:
+            # Registro simultáneo con el mismo NIF o usuario: lo para el índice único
+            campo = 'NIF' if PerfilAutonomo.objects.filter(nif=nif).exists() else 'email'
+            return Response({
+                'error': f'Ya existe un usuario con este {campo}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        logger.info('Registro', extra={
+            'evento': 'registro', 'usuario_id': user.id, 'email': enmascarar_email(user.email)
+        })
+        
+        # Tokens JWT con el email y el perfil firmados (sin query por petición)
+        refresh = token_para(user)
         
         return Response({
             'access': str(refresh.access_token),
@@ -154,7 +235,7 @@ def custom_register(request):
         }, status=status.HTTP_201_CREATED)
         
     except Exception as e:
-        print("Error en registro:", str(e))
+        logger.exception('Error en registro', extra={'evento': 'registro_error'})
         return Response({
             'error': 'Error al procesar el registro',
             'detail': str(e)
@@ -0,0 +1,144 @@
+# backend/accounts/cache.py
+
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+PREFIJO_DASHBOARD = 'dashboard_stats'
+CONTADORES = ['hits', 'misses', 'invalidaciones']
+
+# Estadísticas del dashboard por usuario y año. Cada usuario tiene una
+# generación en la caché que cambia al escribir: las estadísticas se guardan
+# bajo la generación con la que se calcularon, así que invalidar es cambiarla.
+
+
+def _clave_dashboard(usuario_id):
+    return f'{PREFIJO_DASHBOARD}:{usuario_id}'
+
+
+def _clave_contador(nombre):
+    return f'{PREFIJO_DASHBOARD}:contador:{nombre}'
+
+
+def _contar(nombre):
+    """Incrementa un contador en la caché (compartido si el backend lo es)"""
+    clave = _clave_contador(nombre)
+    if not cache.add(clave, 1, timeout=None):
+        try:
+            cache.incr(clave)
+        except ValueError:
+            # Expulsado entre add() e incr()
+            cache.add(clave, 1, timeout=None)
+
+
+async def _acontar(nombre):
+    clave = _clave_contador(nombre)
+    if not await cache.aadd(clave, 1, timeout=None):
+        try:
+            await cache.aincr(clave)
+        except ValueError:
+            await cache.aadd(clave, 1, timeout=None)
+
+
+def _clave_generacion(usuario_id):
+    return f'{PREFIJO_DASHBOARD}:generacion:{usuario_id}'
+
+
+def _clave_stats(usuario_id, año, generacion):
+    return f'{PREFIJO_DASHBOARD}:{usuario_id}:{año}:{generacion}'
+
+
+def _nueva_generacion():
+    # Única aunque la clave se haya expulsado: nunca coincide con una anterior
+    return uuid4().hex
+
+
+def _timeout():
+    return getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 60)
+
+
+def _generacion(usuario_id):
+    """Generación actual de las estadísticas del usuario (la crea si no hay)"""
+    clave = _clave_generacion(usuario_id)
+    generacion = cache.get(clave)
+    if generacion is None:
+        cache.add(clave, _nueva_generacion(), timeout=None)
+        generacion = cache.get(clave)
+    return generacion
+
+
+async def _ageneracion(usuario_id):
+    clave = _clave_generacion(usuario_id)
+    generacion = await cache.aget(clave)
+    if generacion is None:
+        await cache.aadd(clave, _nueva_generacion(), timeout=None)
+        generacion = await cache.aget(clave)
+    return generacion
+
+
+def obtener_dashboard_stats(usuario_id, año, calcular):
+    """
+    Devuelve las estadísticas del dashboard desde la caché o, si no están,
+    las calcula con `calcular()` y las guarda bajo la generación leída
+    antes de calcular: si entre tanto se invalida, se guardan en una
+    generación que ya nadie lee.
+    """
+    clave = _clave_stats(usuario_id, año, _generacion(usuario_id))
+    stats = cache.get(clave)
+    if stats is not None:
+        _contar('hits')
+        return stats
+
+    _contar('misses')
+    stats = calcular()
+    cache.set(clave, stats, timeout=_timeout())
+    return stats
+
+
+async def aobtener_dashboard_stats(usuario_id, año, calcular):
+    """obtener_dashboard_stats para vistas asíncronas; `calcular` es una corrutina"""
+    clave = _clave_stats(usuario_id, año, await _ageneracion(usuario_id))
+    stats = await cache.aget(clave)
+    if stats is not None:
+        await _acontar('hits')
+        return stats
+
+    await _acontar('misses')
+    stats = await calcular()
+    await cache.aset(clave, stats, timeout=_timeout())
+    return stats
+
+
+def invalidar_dashboard(usuario_ids):
+    """
+    Cambia la generación de esos usuarios cuando se confirme la
+    transacción; las estadísticas anteriores caducan solas.
+
+    Solo llega a los procesos que comparten la caché: con LocMemCache (la
+    de por defecto) cada worker y cada comando de gestión tiene la suya, y
+    los demás sirven datos de hasta DASHBOARD_CACHE_TIMEOUT segundos.
+    """
+    claves = [_clave_generacion(usuario_id) for usuario_id in set(usuario_ids)]
+    if not claves:
+        return
+
+    def cambiar():
+        cache.set_many({clave: _nueva_generacion() for clave in claves}, timeout=None)
+        for _ in claves:
+            _contar('invalidaciones')
+
+    transaction.on_commit(cambiar)
+
+
+def estadisticas_cache():
+    """Contadores de aciertos y fallos de la caché del dashboard"""
+    valores = cache.get_many([_clave_contador(nombre) for nombre in CONTADORES])
+    contadores = {
+        nombre: valores.get(_clave_contador(nombre), 0) for nombre in CONTADORES
+    }
+    consultas = contadores['hits'] + contadores['misses']
+    contadores['ratio_hits'] = round(contadores['hits'] / consultas, 4) if consultas else None
+    return contadores
@@ -0,0 +1,61 @@
+# backend/accounts/conexiones.py
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+# Reparto de conexiones para SQLite en producción: las peticiones de solo
+# lectura (GET/HEAD, ver middleware.LecturaMiddleware) leen por el alias
+# LECTURA (la misma base de datos con PRAGMA query_only) y todo lo demás va
+# por 'default'. Con WAL las lecturas no esperan a los bulk_create, y una
+# lectura nunca puede quedarse con el cerrojo de escritura.
+
+LECTURA = 'lectura'
+
+_en_lectura = ContextVar('en_lectura', default=False)
+
+
+def alias_lectura():
+    """Alias de lectura configurado, o None si solo hay 'default'"""
+    return LECTURA if LECTURA in settings.DATABASES else None
+
+
+@contextmanager
+def en_lectura():
+    """Las lecturas del bloque van por el alias de lectura (si existe)"""
+    token = _en_lectura.set(True)
+    try:
+        yield
+    finally:
+        _en_lectura.reset(token)
+
+
+class LecturaRouter:
+    """
+    Lecturas al alias de lectura dentro de en_lectura(); escrituras y
+    migraciones siempre a 'default'. Las dos son la misma base de datos, así
+    que se permiten relaciones entre objetos leídos por una y otra.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _en_lectura.get() or alias_lectura() is None:
+            return DEFAULT_DB_ALIAS
+        # Dentro de una transacción hay que ver lo que aún no se ha confirmado
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return LECTURA
+
+    def db_for_write(self, model, **hints):
+        # Explícito: si no, un objeto leído por LECTURA se guardaría por ella
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, LECTURA}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return False if db == LECTURA else None
@@ -0,0 +1,306 @@
+# backend/accounts/datos_sinteticos.py
+
+import random
+import zlib
+from contextlib import ExitStack
+from datetime import date
+from decimal import Decimal
+from functools import partial
+from itertools import accumulate
+from multiprocessing import Pool
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connections, router, transaction
+
+from .models import Ingreso, Gasto, PerfilAutonomo, ResumenTrimestral
+from .resumen import TRIMESTRE_MESES, acumular_deltas, fechas_trimestre, filas_resumen
+from .terceros import TERCEROS, normalizar_nombre
+
+
+# Generador de datos sintéticos deterministas para pruebas de carga.
+# Cada usuario usa su propio Random(semilla, índice): el resultado no depende
+# del tamaño de lote ni de cuántos usuarios se generen a la vez.
+
+DOMINIO = 'helptax.local'
+PASSWORD = 'helptax-ejemplo'
+LETRAS_DNI = 'TRWAGMYFPDXBNJZSQVHLCKE'
+
+# Parte de los movimientos que son ingresos (el resto son gastos)
+PROPORCION_INGRESOS = Decimal('0.3')
+
+CLIENTES = [
+    'Urodata', 'Ware26', 'Ontrackia', 'Nubeplan', 'Datalia', 'Kreativa',
+    'Logística Iberia', 'Talleres Norte', 'Clínica Dental Sonrisa', 'Inmobiliaria Costa',
+    'Gestoría Martín', 'Bodegas del Duero', 'Estudio Arquitectura Vela', 'Ferretería Central',
+    'Academia Alfa', 'Hotel Miramar', 'Restaurante La Plaza', 'Seguros Atlántico',
+]
+FORMAS_JURIDICAS = ['S.L.', 'S.A.', 'S.L.U.', 'S.Coop.', '']
+
+# (proveedor, descripción, % IVA, importe medio)
+PROVEEDORES = [
+    ('Digital Ocean', 'Servidor', 0, Decimal('38.98')),
+    ('Movistar', 'Línea de Internet', 21, Decimal('41.40')),
+    ('Anthropic', 'Claude AI', 0, Decimal('179.90')),
+    ('Malt', 'Comisión plataforma', 0, Decimal('175.00')),
+    ('Apple', 'Almacenamiento', 21, Decimal('0.82')),
+    ('Google', 'Almacenamiento Google', 21, Decimal('1.64')),
+    ('GoDaddy', 'Renovación dominio', 0, Decimal('22.16')),
+    ('Amazon', 'Material de oficina', 21, Decimal('45.00')),
+    ('Iberdrola', 'Electricidad', 21, Decimal('62.30')),
+    ('Renfe', 'Desplazamiento', 10, Decimal('54.20')),
+    ('Casa del Libro', 'Libros técnicos', 4, Decimal('32.00')),
+    ('Asesoría Fiscal López', 'Cuota asesoría', 21, Decimal('60.00')),
+    ('Coworking Centro', 'Alquiler puesto', 21, Decimal('180.00')),
+    ('PcComponentes', 'Equipo informático', 21, Decimal('950.00')),
+]
+
+SERVICIOS = [
+    'Desarrollo web', 'Consultoría', 'Mantenimiento mensual', 'Demo IA',
+    'Desarrollo hito MVP', 'Diseño de interfaz', 'Formación', 'Auditoría técnica',
+    'Soporte', 'Integración API',
+]
+
+# (valor, peso)
+IVA_INGRESOS = [(21, 82), (0, 15), (10, 3)]
+IRPF_INGRESOS = [(15, 70), (7, 20), (0, 10)]
+
+CIUDADES = [
+    ('Madrid', 'Madrid', '28'), ('Barcelona', 'Barcelona', '08'), ('Valencia', 'Valencia', '46'),
+    ('Sevilla', 'Sevilla', '41'), ('Bilbao', 'Bizkaia', '48'), ('Zaragoza', 'Zaragoza', '50'),
+    ('Málaga', 'Málaga', '29'), ('A Coruña', 'A Coruña', '15'),
+]
+NOMBRES = ['Ana', 'Luis', 'Marta', 'Javier', 'Lucía', 'Carlos', 'Elena', 'Pablo', 'Sara', 'Diego']
+APELLIDOS = ['García', 'Martínez', 'López', 'Sánchez', 'Pérez', 'Gómez', 'Ruiz', 'Díaz', 'Moreno']
+
+
+def _pesos(opciones):
+    """[(valor, peso)] -> (valores, pesos acumulados) para random.choices"""
+    valores, pesos = zip(*opciones)
+    return valores, list(accumulate(pesos))
+
+
+def _importe(rnd, centimos, dispersion):
+    """Importe con distribución log-normal alrededor de `centimos`"""
+    valor = max(1, int(centimos * rnd.lognormvariate(0, dispersion)))
+    return Decimal(valor).scaleb(-2)
+
+
+def email_usuario(prefijo, indice):
+    return f'{prefijo}-{indice}@{DOMINIO}'
+
+
+def nif_usuario(prefijo, indice):
+    """DNI con letra de control válida, distinto por prefijo e índice"""
+    numero = (zlib.crc32(prefijo.encode()) * 1000003 + indice) % 10 ** 8
+    return f'{numero:08d}{LETRAS_DNI[numero % 23]}'
+
+
+def generar_usuario(semilla, prefijo, indice, años, filas_por_trimestre):
+    """
+    Datos de un usuario: (datos del perfil, ingresos, gastos), con los
+    movimientos como dicts de campos de Ingreso/Gasto sin usuario.
+    """
+    rnd = random.Random(f'{semilla}:{indice}')
+    ciudad, provincia, prefijo_cp = rnd.choice(CIUDADES)
+    nombre = f'{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}'
+    perfil = {
+        'nombre_fiscal': nombre,
+        'nif': nif_usuario(prefijo, indice),
+        'direccion': f'Calle {rnd.choice(APELLIDOS)} {rnd.randint(1, 120)}',
+        'codigo_postal': f'{prefijo_cp}{rnd.randint(0, 999):03d}',
+        'ciudad': ciudad,
+        'provincia': provincia,
+        # Los nuevos autónomos retienen el 7% los primeros años
+        'tipo_irpf_default': 7 if rnd.random() < 0.2 else 15,
+    }
+
+    # Cartera de clientes con pesos de Zipf: unos pocos concentran la facturación
+    clientes = rnd.sample(CLIENTES, rnd.randint(2, 8))
+    clientes = [f'{c} {rnd.choice(FORMAS_JURIDICAS)}'.strip() for c in clientes]
+    pesos_clientes = list(accumulate(1 / (k + 1) for k in range(len(clientes))))
+    proveedores = [
+        (proveedor, descripcion, iva, int(medio * 100))
+        for proveedor, descripcion, iva, medio
+        in rnd.sample(PROVEEDORES, rnd.randint(4, len(PROVEEDORES)))
+    ]
+    tarifa = rnd.choice([600, 900, 1200, 1800, 2500]) * 100
+    iva_valores, iva_pesos = _pesos(IVA_INGRESOS)
+    irpf_valores, irpf_pesos = _pesos(IRPF_INGRESOS)
+
+    num_ingresos = int((filas_por_trimestre * PROPORCION_INGRESOS).to_integral_value())
+    num_gastos = filas_por_trimestre - num_ingresos
+
+    ingresos, gastos = [], []
+    for año in años:
+        for trimestre in TRIMESTRE_MESES:
+            inicio, fin = (fecha.toordinal() for fecha in fechas_trimestre(trimestre, año))
+            for _ in range(num_ingresos):
+                irpf = rnd.choices(irpf_valores, cum_weights=irpf_pesos)[0]
+                ingresos.append({
+                    'fecha': date.fromordinal(rnd.randint(inicio, fin)),
+                    'descripcion': rnd.choice(SERVICIOS),
+                    'cliente': rnd.choices(clientes, cum_weights=pesos_clientes)[0],
+                    'importe': _importe(rnd, tarifa, 0.6),
+                    'iva_porcentaje': rnd.choices(iva_valores, cum_weights=iva_pesos)[0],
+                    'irpf_porcentaje': perfil['tipo_irpf_default'] if irpf == 15 else irpf,
+                    'trimestre': trimestre,
+                    'año': año,
+                })
+            for _ in range(num_gastos):
+                proveedor, descripcion, iva, centimos = rnd.choice(proveedores)
+                gastos.append({
+                    'fecha': date.fromordinal(rnd.randint(inicio, fin)),
+                    'descripcion': descripcion,
+                    'proveedor': proveedor,
+                    'importe': _importe(rnd, centimos, 0.3),
+                    'iva_porcentaje': iva,
+                    'trimestre': trimestre,
+                    'año': año,
+                })
+    return perfil, ingresos, gastos
+
+
+def _crear_terceros(modelo, filas):
+    """
+    Crea los clientes/proveedores de usuarios nuevos con sus contadores ya
+    calculados y pone en cada fila el ID que le corresponde.
+    """
+    dimension, campo, campo_fk = TERCEROS[modelo]
+
+    terceros, normalizados = {}, {}
+    for fila in filas:
+        nombre = fila[campo]
+        if nombre not in normalizados:
+            normalizados[nombre] = normalizar_nombre(nombre)
+        clave = (fila['usuario_id'], normalizados[nombre])
+        tercero = terceros.get(clave)
+        if tercero is None:
+            tercero = terceros[clave] = dimension(
+                usuario_id=clave[0], nombre=nombre, nombre_normalizado=clave[1],
+                num_facturas=0, total_facturado=Decimal('0'),
+            )
+        tercero.num_facturas += 1
+        tercero.total_facturado += fila['importe']
+        fila[f'{campo_fk}_id'] = tercero
+
+    dimension.objects.bulk_create(list(terceros.values()))
+    for fila in filas:
+        fila[f'{campo_fk}_id'] = fila[f'{campo_fk}_id'].pk
+
+
+def _insertar(modelo, filas, batch_size):
+    """
+    INSERT con executemany a partir de dicts de columnas. Mucho más rápido que
+    bulk_create (que compila un INSERT multi-fila limitado a 999 parámetros en
+    SQLite), a cambio de no devolver IDs ni lanzar señales.
+    """
+    if not filas:
+        return
+    campos = [modelo._meta.get_field(nombre) for nombre in filas[0]]
+    conexion = connections[router.db_for_write(modelo)]
+    ops = conexion.ops
+
+    # Adaptadores del backend solo para los tipos que lo necesitan
+    conversion = []
+    for campo in campos:
+        tipo = campo.get_internal_type()
+        if tipo == 'DateField':
+            conversion.append(ops.adapt_datefield_value)
+        elif tipo == 'DecimalField':
+            conversion.append(partial(
+                ops.adapt_decimalfield_value,
+                max_digits=campo.max_digits, decimal_places=campo.decimal_places,
+            ))
+        else:
+            conversion.append(None)
+
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        ops.quote_name(modelo._meta.db_table),
+        ', '.join(ops.quote_name(campo.column) for campo in campos),
+        ', '.join(['%s'] * len(campos)),
+    )
+
+    with conexion.cursor() as cursor:
+        for inicio in range(0, len(filas), batch_size):
+            cursor.executemany(sql, [
+                [
+                    valor if convertir is None else convertir(valor)
+                    for convertir, valor in zip(conversion, fila.values())
+                ]
+                for fila in filas[inicio:inicio + batch_size]
+            ])
+
+
+def _crear_bloque(bloque, password, batch_size):
+    """Inserta un bloque de usuarios generados: unas pocas queries por tabla"""
+    with transaction.atomic():
+        usuarios = User.objects.bulk_create([
+            User(username=email, email=email, password=password)
+            for email, _, _, _ in bloque
+        ], batch_size=batch_size)
+        PerfilAutonomo.objects.bulk_create([
+            PerfilAutonomo(usuario=usuario, **perfil)
+            for usuario, (_, perfil, _, _) in zip(usuarios, bloque)
+        ], batch_size=batch_size)
+
+        ingresos, gastos = [], []
+        for usuario, (_, _, filas_ingresos, filas_gastos) in zip(usuarios, bloque):
+            for fila in filas_ingresos:
+                fila['usuario_id'] = usuario.pk
+            for fila in filas_gastos:
+                fila['usuario_id'] = usuario.pk
+            ingresos += filas_ingresos
+            gastos += filas_gastos
+
+        _crear_terceros(Ingreso, ingresos)
+        _crear_terceros(Gasto, gastos)
+        _insertar(Ingreso, ingresos, batch_size)
+        _insertar(Gasto, gastos, batch_size)
+
+        # Usuarios nuevos: los resúmenes se insertan directamente, sin deltas
+        deltas = acumular_deltas(Ingreso, ingresos)
+        acumular_deltas(Gasto, gastos, deltas=deltas)
+        ResumenTrimestral.objects.bulk_create(filas_resumen(deltas), batch_size=batch_size)
+
+    return len(ingresos) + len(gastos)
+
+
+def generar(usuarios, años, filas_por_trimestre, semilla=42, prefijo='ejemplo',
+            batch_size=5000, procesos=1, progreso=None):
+    """
+    Crea `usuarios` usuarios con perfil fiscal y `filas_por_trimestre`
+    movimientos por trimestre de cada año de `años`. Se inserta por bloques
+    de unas `batch_size` filas, cada uno en su transacción; `progreso` recibe
+    (usuarios creados, filas creadas) tras cada bloque. Devuelve las filas creadas.
+
+    Con procesos > 1 los datos se generan en paralelo mientras el proceso
+    principal inserta; el orden (y por tanto el resultado) no cambia.
+    """
+    password = make_password(PASSWORD)
+    generador = partial(
+        generar_usuario, semilla, prefijo,
+        años=list(años), filas_por_trimestre=filas_por_trimestre,
+    )
+    bloque, filas_bloque, creados, filas = [], 0, 0, 0
+
+    with ExitStack() as pila:
+        if procesos > 1:
+            pool = pila.enter_context(Pool(procesos, initializer=django.setup))
+            datos = pool.imap(generador, range(usuarios), chunksize=16)
+        else:
+            datos = map(generador, range(usuarios))
+
+        for indice, (perfil, ingresos, gastos) in enumerate(datos):
+            bloque.append((email_usuario(prefijo, indice), perfil, ingresos, gastos))
+            filas_bloque += len(ingresos) + len(gastos)
+
+            if filas_bloque >= batch_size or indice == usuarios - 1:
+                filas += _crear_bloque(bloque, password, batch_size)
+                creados += len(bloque)
+                bloque, filas_bloque = [], 0
+                if progreso:
+                    progreso(creados, filas)
+
+    return filas
@@ -0,0 +1,201 @@
+# backend/accounts/descargas.py
+
+import mimetypes
+import os
+import re
+import time
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+)
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date
+
+
+# Descarga de facturas sin URLs públicas de media. Los listados dan URLs
+# firmadas (HMAC, sin consultar la BD) que caducan; la firma se calcula sobre
+# el nombre y el final de una ventana de FACTURAS_URL_CADUCIDAD segundos, así
+# que la URL de una factura no cambia dentro de la ventana y el navegador
+# puede cachearla. El envío admite Range, ETag/If-None-Match y, si hay nginx
+# o Apache delante, se les pasa el archivo (X-Accel-Redirect / X-Sendfile)
+# para que no lo lea un worker de Python.
+
+SALT = 'accounts.descargas.factura'
+BLOQUE = 64 * 1024
+RANGO = re.compile(r'^bytes=(\d*)-(\d*)$')
+CONTENIDO = re.compile(r'^facturas/sha256/[0-9a-f]{2}/([0-9a-f]{64})\.\w+$')
+
+
+class RangoNoSatisfacible(Exception):
+    """El rango pedido empieza después del final del archivo"""
+
+
+def firmar(nombre, ahora=None):
+    """Firma del archivo `nombre` válida entre una y dos ventanas"""
+    ventana = settings.FACTURAS_URL_CADUCIDAD
+    ahora = time.time() if ahora is None else ahora
+    caduca = (int(ahora) // ventana + 2) * ventana
+    return signing.Signer(salt=SALT).sign_object({'n': nombre, 'c': caduca}, compress=True)
+
+
+def leer_firma(firma):
+    """(nombre, caducidad) de una firma válida y sin caducar; si no, Http404"""
+    try:
+        datos = signing.Signer(salt=SALT).unsign_object(firma)
+    except signing.BadSignature:
+        raise Http404('Enlace de descarga no válido')
+    if datos['c'] < time.time():
+        raise Http404('El enlace de descarga ha caducado')
+    return datos['n'], datos['c']
+
+
+def url_firmada(request=None):
+    """
+    Devuelve una función nombre -> URL firmada de descarga (absoluta si hay
+    request). El prefijo se resuelve una vez por listado, no por fila.
+    """
+    prefijo = reverse('factura-firmada', kwargs={'firma': '-'})[:-2]
+    if request is not None:
+        prefijo = request.build_absolute_uri(prefijo)
+    ahora = time.time()
+
+    def url(nombre):
+        if not nombre:
+            return None
+        return f'{prefijo}{firmar(nombre, ahora)}/'
+    return url
+
+
+def _etag(nombre, stat):
+    # El contenido de facturas/sha256/ no cambia nunca: su hash es el ETag
+    contenido = CONTENIDO.match(nombre)
+    if contenido:
+        return f'"{contenido.group(1)}"'
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def _rango(cabecera, tamaño):
+    """
+    (inicio, fin) incluidos de un único rango `bytes=`. None si no hay rango
+    o no se entiende (se sirve el archivo entero, como permite la RFC 9110).
+    """
+    coincide = RANGO.match(cabecera.strip()) if cabecera else None
+    if coincide is None:
+        return None
+    inicio, fin = coincide.groups()
+    if not inicio:
+        if not fin:
+            return None
+        # bytes=-500: los últimos 500 bytes
+        sufijo = int(fin)
+        if sufijo == 0 or tamaño == 0:
+            raise RangoNoSatisfacible()
+        return max(tamaño - sufijo, 0), tamaño - 1
+
+    inicio = int(inicio)
+    if fin and int(fin) < inicio:
+        return None
+    if inicio >= tamaño:
+        raise RangoNoSatisfacible()
+    return inicio, min(int(fin), tamaño - 1) if fin else tamaño - 1
+
+
+class _Tramo:
+    """Iterador sobre un tramo del archivo que lo cierra al terminar"""
+
+    def __init__(self, archivo, inicio, longitud):
+        self.archivo = archivo
+        self.inicio = inicio
+        self.longitud = longitud
+
+    def __iter__(self):
+        self.archivo.seek(self.inicio)
+        restante = self.longitud
+        while restante > 0:
+            bloque = self.archivo.read(min(BLOQUE, restante))
+            if not bloque:
+                break
+            restante -= len(bloque)
+            yield bloque
+
+    def close(self):
+        self.archivo.close()
+
+
+def servir_factura(request, nombre, max_age=0):
+    """
+    Respuesta con el archivo `nombre` del storage: 304 si el cliente ya lo
+    tiene, 206 para un rango, o la cabecera para que lo envíe el servidor web
+    (FACTURAS_ENVIO). Con storages sin ruta local (S3...) redirige a su URL.
+    """
+    try:
+        ruta = default_storage.path(nombre)
+    except NotImplementedError:
+        return HttpResponseRedirect(default_storage.url(nombre))
+    try:
+        stat = os.stat(ruta)
+    except FileNotFoundError:
+        raise Http404('La factura no existe')
+
+    etag = _etag(nombre, stat)
+    cabeceras = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': f'private, max-age={max_age}',
+        'Accept-Ranges': 'bytes',
+        'Content-Type': mimetypes.guess_type(nombre)[0] or 'application/octet-stream',
+        'Content-Disposition': content_disposition_header(False, os.path.basename(nombre)),
+    }
+
+    no_modificado = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if no_modificado is not None:
+        for cabecera in ('ETag', 'Last-Modified', 'Cache-Control'):
+            no_modificado[cabecera] = cabeceras[cabecera]
+        return no_modificado
+
+    envio = getattr(settings, 'FACTURAS_ENVIO', None)
+    if envio == 'x-accel-redirect':
+        # nginx se encarga de Range y del envío (location internal)
+        respuesta = HttpResponse(headers=cabeceras)
+        respuesta['X-Accel-Redirect'] = settings.FACTURAS_ACCEL_PREFIJO + quote(nombre)
+        return respuesta
+    if envio == 'x-sendfile':
+        respuesta = HttpResponse(headers=cabeceras)
+        respuesta['X-Sendfile'] = ruta
+        return respuesta
+
+    tamaño = stat.st_size
+    rango = None
+    # If-Range: el rango solo vale si el cliente tiene la misma versión
+    if request.headers.get('If-Range', etag) == etag:
+        try:
+            rango = _rango(request.headers.get('Range'), tamaño)
+        except RangoNoSatisfacible:
+            respuesta = HttpResponse(status=416, headers=cabeceras)
+            respuesta['Content-Range'] = f'bytes */{tamaño}'
+            return respuesta
+
+    if request.method == 'HEAD':
+        respuesta = HttpResponse(headers=cabeceras)
+        respuesta['Content-Length'] = str(tamaño)
+        return respuesta
+
+    if rango is None:
+        # FileResponse usa wsgi.file_wrapper (sendfile) si el servidor lo tiene
+        return FileResponse(open(ruta, 'rb'), headers=cabeceras)
+
+    inicio, fin = rango
+    longitud = fin - inicio + 1
+    respuesta = StreamingHttpResponse(
+        _Tramo(open(ruta, 'rb'), inicio, longitud), status=206, headers=cabeceras
+    )
+    respuesta['Content-Range'] = f'bytes {inicio}-{fin}/{tamaño}'
+    respuesta['Content-Length'] = str(longitud)
+    return respuesta
@@ -0,0 +1,88 @@
+# backend/accounts/exportacion.py
+
+import csv
+import json
+
+from .lectura import CAMPOS_INGRESO, CAMPOS_GASTO, fila_ingreso, fila_gasto, url_factura
+
+
+# Columnas exportadas (las de la API, incluidos los importes calculados)
+COLUMNAS = {
+    'ingresos': [
+        'id', 'fecha', 'descripcion', 'cliente', 'importe',
+        'iva_porcentaje', 'iva_importe', 'irpf_porcentaje',
+        'irpf_importe', 'total', 'trimestre', 'año'
+    ],
+    'gastos': [
+        'id', 'fecha', 'descripcion', 'proveedor', 'importe',
+        'iva_porcentaje', 'iva_importe', 'total', 'factura',
+        'trimestre', 'año'
+    ],
+}
+
+# Filas por fragmento de la respuesta y por lectura de la BD
+FILAS_POR_FRAGMENTO = 500
+CHUNK_BD = 2000
+
+
+def filas_exportacion(queryset, tipo, request=None):
+    """
+    Recorre el queryset en bloques en el servidor (sin instanciar modelos)
+    y produce cada fila como lista, con los importes calculados.
+    """
+    columnas = COLUMNAS[tipo]
+    if tipo == 'ingresos':
+        campos, convertir = CAMPOS_INGRESO, fila_ingreso
+    else:
+        url = url_factura(request)
+        campos, convertir = CAMPOS_GASTO, lambda valores: fila_gasto(valores, url)
+
+    for valores in queryset.values(*campos).iterator(chunk_size=CHUNK_BD):
+        fila = convertir(valores)
+        yield [fila[columna] for columna in columnas]
+
+
+class _Eco:
+    """Pseudo-buffer para csv.writer: devuelve lo escrito en vez de guardarlo"""
+    def write(self, valor):
+        return valor
+
+
+def _agrupar(lineas):
+    """
+    Une las líneas en fragmentos para no enviar un chunk HTTP por fila.
+    La primera línea sale sola para que el cliente reciba datos cuanto antes.
+    """
+    lineas = iter(lineas)
+    primera = next(lineas, None)
+    if primera is None:
+        return
+    yield primera
+
+    fragmento = []
+    for linea in lineas:
+        fragmento.append(linea)
+        if len(fragmento) >= FILAS_POR_FRAGMENTO:
+            yield ''.join(fragmento)
+            fragmento = []
+    if fragmento:
+        yield ''.join(fragmento)
+
+
+def exportar_csv(queryset, tipo, request=None):
+    """Generador de CSV; la cabecera sale antes de la primera query"""
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(COLUMNAS[tipo])
+    yield from _agrupar(
+        escritor.writerow(fila) for fila in filas_exportacion(queryset, tipo, request)
+    )
+
+
+def exportar_ndjson(queryset, tipo, request=None):
+    """Generador de NDJSON: un objeto JSON por línea"""
+    columnas = COLUMNAS[tipo]
+    yield from _agrupar(
+        json.dumps(dict(zip(columnas, fila)), ensure_ascii=False) + '\n'
+        for fila in filas_exportacion(queryset, tipo, request)
+    )
+
@@ -0,0 +1,322 @@
+# backend/accounts/importacion.py
+
+import csv
+import re
+import unicodedata
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from rest_framework.exceptions import ValidationError
+
+from .lotes import crear_en_lotes, tamaño_lote
+from .models import Ingreso, Gasto
+from .serializers import IngresoSerializer, GastoSerializer
+
+
+# Nombres de columna aceptados para cada campo (normalizados, sin tildes)
+ALIAS_COLUMNAS = {
+    'fecha': ['fecha', 'fecha factura', 'fecha operacion', 'fecha valor', 'date'],
+    'descripcion': ['descripcion', 'concepto', 'detalle', 'description'],
+    'cliente': ['cliente', 'customer', 'nombre cliente'],
+    'proveedor': ['proveedor', 'emisor', 'supplier', 'nombre proveedor'],
+    'importe': ['importe', 'base', 'base imponible', 'importe sin iva', 'amount'],
+    'iva_porcentaje': ['iva', 'iva %', '% iva', 'tipo iva', 'iva_porcentaje'],
+    'irpf_porcentaje': ['irpf', 'irpf %', '% irpf', 'retencion', 'irpf_porcentaje'],
+}
+
+CONFIGURACION = {
+    'ingresos': {
+        'modelo': Ingreso,
+        'serializer': IngresoSerializer,
+        'campos': ['fecha', 'descripcion', 'cliente', 'importe', 'iva_porcentaje', 'irpf_porcentaje'],
+    },
+    'gastos': {
+        'modelo': Gasto,
+        'serializer': GastoSerializer,
+        'campos': ['fecha', 'descripcion', 'proveedor', 'importe', 'iva_porcentaje'],
+    },
+}
+
+# Errores detallados que se guardan como máximo (la memoria no crece con el archivo)
+MAX_ERRORES = 100
+
+FORMATOS_FECHA = ['%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%d/%m/%y', '%d.%m.%Y']
+
+
+class ExcelPuntoYComa(csv.excel):
+    """CSV de Excel en español: separado por punto y coma"""
+    delimiter = ';'
+
+
+class ErrorImportacion(Exception):
+    """Archivo que no se puede importar (formato, cabeceras...)"""
+
+
+def _normalizar(texto):
+    """Minúsculas, sin tildes ni espacios sobrantes"""
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.lower().split())
+
+
+# Una línea con su fin: \r\n, \n o \r (CSV de Mac antiguos)
+LINEA = re.compile(r'[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+')
+
+
+class FilaIlegible:
+    """Fila que el lector de CSV no ha podido separar en campos"""
+
+    def __init__(self, mensaje):
+        self.mensaje = mensaje
+
+
+def _decodificar(lineas):
+    """
+    Texto de las líneas en bytes: en UTF-8 o, las que no lo son, en latin-1
+    (exportaciones de Excel en Windows), que acepta cualquier byte. Así un
+    archivo con las dos codificaciones no corta la importación a medias.
+    """
+    for linea in lineas:
+        try:
+            texto = linea.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            texto = linea.decode('latin-1')
+        yield from LINEA.findall(texto)
+
+
+def _filas_csv(archivo):
+    """Lee un CSV en streaming, detectando separador y codificación"""
+    muestra = archivo.read(4096)
+    archivo.seek(0)
+    lineas = archivo
+    if isinstance(muestra, bytes):
+        muestra = ''.join(_decodificar(muestra.splitlines(keepends=True)))
+        lineas = _decodificar(archivo)
+
+    try:
+        dialecto = csv.Sniffer().sniff(muestra, delimiters=';,\t|')
+    except csv.Error:
+        dialecto = ExcelPuntoYComa
+
+    # Tras un csv.Error (campo demasiado largo, comillas sin cerrar) el
+    # lector sigue en la línea siguiente: la fila se informa como errónea
+    lector = csv.reader(lineas, dialecto)
+    while True:
+        try:
+            yield next(lector)
+        except StopIteration:
+            return
+        except csv.Error as error:
+            yield FilaIlegible(f'CSV no válido: {error}')
+
+
+def _filas_xlsx(archivo):
+    """Lee la primera hoja de un XLSX en modo read-only (streaming)"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ErrorImportacion('Para importar XLSX hay que instalar openpyxl')
+
+    try:
+        libro = load_workbook(archivo, read_only=True, data_only=True)
+    except Exception:
+        raise ErrorImportacion('El archivo no es un XLSX válido')
+    try:
+        for fila in libro.worksheets[0].iter_rows(values_only=True):
+            yield list(fila)
+    finally:
+        libro.close()
+
+
+def leer_filas(archivo, nombre):
+    """Generador de filas (listas) según la extensión del archivo"""
+    extension = nombre.lower().rsplit('.', 1)[-1]
+    if extension in ('xlsx', 'xlsm'):
+        return _filas_xlsx(archivo)
+    if extension in ('csv', 'txt'):
+        return _filas_csv(archivo)
+    raise ErrorImportacion(f'Formato no soportado: .{extension} (use CSV o XLSX)')
+
+
+def mapear_columnas(cabecera, campos, mapeo=None):
+    """
+    Devuelve {campo: índice de columna}. `mapeo` permite indicar
+    explícitamente la cabecera de cada campo: {'importe': 'Base'}.
+    """
+    cabecera = [_normalizar(c) for c in cabecera]
+    indices = {}
+    for campo in campos:
+        candidatos = ALIAS_COLUMNAS[campo]
+        if mapeo and campo in mapeo:
+            candidatos = [_normalizar(mapeo[campo])]
+        for candidato in candidatos:
+            if candidato in cabecera:
+                indices[campo] = cabecera.index(candidato)
+                break
+
+    faltan = [c for c in ('fecha', 'importe') if c not in indices]
+    if faltan:
+        raise ErrorImportacion(f'Faltan columnas obligatorias: {", ".join(faltan)}')
+    return indices
+
+
+def _fecha(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = str(valor or '').strip()
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _numero(valor):
+    """Acepta 1234.56, 1.234,56, 1234,56 €, 21%..."""
+    if isinstance(valor, (int, float, Decimal)):
+        return Decimal(str(valor))
+    texto = str(valor or '').replace('€', '').replace('%', '').replace(' ', '').strip()
+    if ',' in texto:
+        texto = texto.replace('.', '').replace(',', '.')
+    try:
+        return Decimal(texto)
+    except InvalidOperation:
+        return None
+
+
+def _porcentaje(valor):
+    numero = _numero(valor)
+    if numero is None:
+        return valor
+    if 0 < numero < 1:
+        # Excel guarda "21%" como 0.21
+        numero *= 100
+    return int(numero.to_integral_value())
+
+
+def _mensajes(detalle):
+    """Errores de DRF como texto plano: {'campo': ['mensaje', ...]}"""
+    return {
+        campo: [str(m) for m in mensajes] if isinstance(mensajes, list) else str(mensajes)
+        for campo, mensajes in detalle.items()
+    }
+
+
+def convertir_fila(valores, indices, tipo, defaults=None):
+    """Convierte una fila del archivo en datos para el serializer"""
+    datos = dict(defaults or {})
+    for campo, indice in indices.items():
+        valor = valores[indice] if indice < len(valores) else None
+        if valor is None or valor == '':
+            continue
+        datos[campo] = valor
+
+    fecha = _fecha(datos.get('fecha'))
+    if fecha:
+        datos['fecha'] = fecha.isoformat()
+        # Trimestre y año se deducen de la fecha
+        datos['trimestre'] = (fecha.month - 1) // 3 + 1
+        datos['año'] = fecha.year
+
+    importe = _numero(datos.get('importe'))
+    if importe is not None:
+        if tipo == 'gastos':
+            # Los extractos bancarios traen los cargos en negativo
+            importe = abs(importe)
+        datos['importe'] = str(importe.quantize(Decimal('0.01')))
+
+    for campo in ('iva_porcentaje', 'irpf_porcentaje'):
+        if campo in datos:
+            datos[campo] = _porcentaje(datos[campo])
+
+    tercero = 'cliente' if tipo == 'ingresos' else 'proveedor'
+    datos[tercero] = str(datos.get(tercero, '') or 'Sin especificar').strip()[:100]
+    datos['descripcion'] = str(datos.get('descripcion', '') or datos[tercero]).strip()[:200]
+    return datos
+
+
+def abrir_importacion(archivo, nombre, tipo, mapeo=None):
+    """
+    Abre el archivo y lee la cabecera. Devuelve (filas, indices) con las filas
+    restantes como iterador. Lanza ErrorImportacion si no se puede importar.
+    """
+    config = CONFIGURACION[tipo]
+    filas = iter(leer_filas(archivo, nombre))
+    cabecera = next(filas, None)
+    if not cabecera:
+        raise ErrorImportacion('El archivo está vacío')
+    if isinstance(cabecera, FilaIlegible):
+        raise ErrorImportacion(cabecera.mensaje)
+    return filas, mapear_columnas(cabecera, config['campos'], mapeo)
+
+
+def importar_por_bloques(filas, indices, tipo, usuario, chunk_size=None):
+    """
+    Procesa las filas en bloques de `chunk_size`: valida cada fila, inserta las
+    válidas con bulk_create y descarta el bloque, así la memoria no depende del
+    tamaño del archivo. Tras cada bloque produce el resultado acumulado.
+    Las filas inválidas se omiten y se informan por número de fila.
+    """
+    config = CONFIGURACION[tipo]
+    chunk_size = chunk_size or tamaño_lote()
+
+    defaults = {}
+    perfil = getattr(usuario, 'perfil', None)
+    if tipo == 'ingresos' and perfil:
+        defaults['irpf_porcentaje'] = perfil.tipo_irpf_default
+
+    # Un único serializer para todas las filas (los campos se construyen una vez)
+    validador = config['serializer']()
+
+    resultado = {'procesadas': 0, 'creadas': 0, 'con_errores': 0, 'errores': []}
+    numero_fila = 1  # La fila 1 es la cabecera
+
+    while True:
+        bloque = list(islice(filas, chunk_size))
+        if not bloque:
+            break
+
+        validos = []
+        for valores in bloque:
+            numero_fila += 1
+            if isinstance(valores, FilaIlegible):
+                errores = {'archivo': [valores.mensaje]}
+            elif not any(v not in (None, '') for v in valores):
+                continue  # Fila vacía
+            else:
+                try:
+                    validado = validador.run_validation(
+                        convertir_fila(valores, indices, tipo, defaults)
+                    )
+                    errores = None
+                except ValidationError as error:
+                    errores = _mensajes(error.detail)
+
+            resultado['procesadas'] += 1
+            if errores:
+                resultado['con_errores'] += 1
+                if len(resultado['errores']) < MAX_ERRORES:
+                    resultado['errores'].append({'fila': numero_fila, 'errores': errores})
+                continue
+            validos.append(config['modelo'](usuario=usuario, **validado))
+
+        crear_en_lotes(config['modelo'], validos)
+        resultado['creadas'] += len(validos)
+        yield resultado
+
+
+def importar(archivo, nombre, tipo, usuario, mapeo=None, chunk_size=None, progreso=None):
+    """
+    Importa ingresos o gastos desde un CSV/XLSX. `progreso(resultado)` se
+    llama tras cada bloque. Devuelve el resultado final.
+    """
+    filas, indices = abrir_importacion(archivo, nombre, tipo, mapeo)
+    resultado = {'procesadas': 0, 'creadas': 0, 'con_errores': 0, 'errores': []}
+    for resultado in importar_por_bloques(filas, indices, tipo, usuario, chunk_size):
+        if progreso:
+            progreso(resultado)
+    return resultado
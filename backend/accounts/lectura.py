@@ -0,0 +1,110 @@
+# backend/accounts/lectura.py
+
+from decimal import Decimal
+
+from django.db.models import OuterRef, Subquery
+
+from .descargas import url_firmada
+from .metricas import cronometro
+from .models import AnalisisFactura
+
+
+# Ruta de lectura rápida para listados: se leen valores planos con .values()
+# y los importes calculados se obtienen con aritmética Decimal directa,
+# sin instanciar modelos ni pasar por los campos de DRF. La salida es
+# idéntica (mismas claves, orden y formato) a IngresoSerializer/GastoSerializer.
+
+CENTIMO = Decimal('0.01')
+
+CAMPOS_INGRESO = [
+    'id', 'fecha', 'descripcion', 'cliente', 'importe',
+    'iva_porcentaje', 'irpf_porcentaje', 'trimestre', 'año'
+]
+
+CAMPOS_GASTO = [
+    'id', 'fecha', 'descripcion', 'proveedor', 'importe',
+    'iva_porcentaje', 'factura', 'trimestre', 'año'
+]
+
+
+def _importe(valor):
+    """Mismo formato que serializers.DecimalField(decimal_places=2)"""
+    return '{:f}'.format(valor.quantize(CENTIMO))
+
+
+def url_factura(request):
+    """
+    Devuelve una función nombre -> URL firmada de descarga de la factura,
+    igual que GastoSerializer (absoluta con request).
+    """
+    return url_firmada(request)
+
+
+def con_miniatura(queryset):
+    """
+    Gastos con `miniatura_nombre`: la miniatura de su factura (la genera
+    accounts/procesado.py) en la misma consulta del listado
+    """
+    return queryset.annotate(miniatura_nombre=Subquery(
+        AnalisisFactura.objects.filter(archivo=OuterRef('factura')).values('miniatura')[:1]
+    ))
+
+
+def fila_ingreso(valores):
+    importe = valores['importe']
+    iva_importe = importe * valores['iva_porcentaje'] / 100
+    return {
+        'id': valores['id'],
+        'fecha': valores['fecha'].isoformat(),
+        'descripcion': valores['descripcion'],
+        'cliente': valores['cliente'],
+        'importe': _importe(importe),
+        'iva_porcentaje': valores['iva_porcentaje'],
+        'iva_importe': _importe(iva_importe),
+        'irpf_porcentaje': valores['irpf_porcentaje'],
+        'irpf_importe': _importe(importe * valores['irpf_porcentaje'] / 100),
+        'total': _importe(importe + iva_importe),
+        'trimestre': valores['trimestre'],
+        'año': valores['año'],
+    }
+
+
+def fila_gasto(valores, url, con_request=True):
+    importe = valores['importe']
+    iva_importe = importe * valores['iva_porcentaje'] / 100
+    factura = url(valores['factura'])
+    return {
+        'id': valores['id'],
+        'fecha': valores['fecha'].isoformat(),
+        'descripcion': valores['descripcion'],
+        'proveedor': valores['proveedor'],
+        'importe': _importe(importe),
+        'iva_porcentaje': valores['iva_porcentaje'],
+        'iva_importe': _importe(iva_importe),
+        'total': _importe(importe + iva_importe),
+        'factura': factura,
+        # GastoSerializer.get_factura_url solo la da con request
+        'factura_url': factura if con_request else None,
+        'miniatura': url(valores.get('miniatura_nombre')),
+        'trimestre': valores['trimestre'],
+        'año': valores['año'],
+    }
+
+
+def leer_ingresos(filas):
+    """Filas de .values(*CAMPOS_INGRESO) -> dicts como IngresoSerializer"""
+    filas = list(filas)
+    with cronometro('serializacion'):
+        return [fila_ingreso(valores) for valores in filas]
+
+
+def leer_gastos(filas, request=None):
+    """
+    Filas de .values(*CAMPOS_GASTO) (con 'miniatura_nombre' si vienen de
+    con_miniatura) -> dicts como GastoSerializer
+    """
+    url = url_factura(request)
+    con_request = request is not None
+    filas = list(filas)
+    with cronometro('serializacion'):
+        return [fila_gasto(valores, url, con_request) for valores in filas]
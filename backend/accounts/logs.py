@@ -0,0 +1,52 @@
+# backend/accounts/logs.py
+
+import atexit
+import json
+import logging
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+
+# Logs en JSON (una línea por evento) que se escriben desde un hilo aparte:
+# la petición solo encola el registro y no espera a stdout. Se configuran en
+# settings.LOGGING para los loggers de 'accounts'.
+
+# Atributos de `extra` que pasan al JSON
+CAMPOS = ('evento', 'usuario_id', 'email', 'motivo', 'ip', 'duracion_ms')
+
+
+def enmascarar_email(email):
+    """ana.garcia@dominio.es -> a***@dominio.es (los logs no guardan emails completos)"""
+    if not email or '@' not in email:
+        return None
+    local, dominio = str(email).rsplit('@', 1)
+    return f'{local[:1]}***@{dominio}'
+
+
+class FormatoJSON(logging.Formatter):
+
+    def format(self, record):
+        datos = {
+            'momento': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensaje': record.getMessage(),
+        }
+        for campo in CAMPOS:
+            if hasattr(record, campo):
+                datos[campo] = getattr(record, campo)
+        if record.exc_info:
+            datos['excepcion'] = self.formatException(record.exc_info)
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class ColaHandler(QueueHandler):
+    """Formatea en el hilo que registra y escribe en stderr desde un QueueListener"""
+
+    def __init__(self):
+        super().__init__(queue.SimpleQueue())
+        destino = logging.StreamHandler()
+        self.listener = QueueListener(self.queue, destino)
+        self.listener.start()
+        atexit.register(self.listener.stop)
@@ -0,0 +1,49 @@
+# backend/accounts/lotes.py
+
+from django.conf import settings
+from django.db import transaction
+
+from .resumen import registrar_creados
+from .terceros import resolver_terceros, acumular_contadores, aplicar_contadores
+
+
+def tamaño_lote():
+    """Tamaño de lote configurado para las inserciones masivas"""
+    return getattr(settings, 'BULK_CREATE_BATCH_SIZE', 1000)
+
+
+def crear_en_lotes(modelo, objetos, batch_size=None):
+    """
+    Inserta `objetos` con bulk_create en lotes dentro de una única transacción
+    y actualiza lo que mantienen las señales, que bulk_create no lanza:
+    resúmenes trimestrales y clientes/proveedores con sus contadores.
+    Toda inserción en bloque de ingresos o gastos tiene que pasar por aquí:
+    un bulk_create directo deja ResumenTrimestral desfasado.
+    """
+    with transaction.atomic():
+        resolver_terceros(modelo, objetos)
+        creados = modelo.objects.bulk_create(objetos, batch_size=batch_size or tamaño_lote())
+        registrar_creados(modelo, creados)
+        aplicar_contadores(modelo, acumular_contadores(modelo, creados))
+    return creados
+
+
+def errores_por_fila(errores, campo):
+    """
+    Convierte los errores de un ListSerializer en una lista compacta
+    con el índice de cada fila inválida.
+    """
+    errores_filas = errores.get(campo)
+    if not isinstance(errores_filas, list) or not all(isinstance(error, dict) for error in errores_filas):
+        # Error sobre la lista completa (falta, vacía, demasiado larga...):
+        # un dict o una lista de mensajes en vez de un dict por fila
+        return errores
+
+    filas = [
+        {'indice': indice, 'errores': error}
+        for indice, error in enumerate(errores_filas) if error
+    ]
+    return {
+        'error': f'{len(filas)} filas con errores, no se ha creado ninguna',
+        'filas': filas,
+    }
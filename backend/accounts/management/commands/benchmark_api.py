@@ -0,0 +1,227 @@
+# backend/accounts/management/commands/benchmark_api.py
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from datetime import date
+import json
+import platform
+import sqlite3
+import time
+
+import django
+
+from accounts.datos_sinteticos import PASSWORD, email_usuario, generar
+
+
+# Escalas: (usuarios, movimientos en total entre ingresos y gastos)
+ESCALAS = {
+    'pequeña': (1, 1000),
+    'mediana': (100, 10000),
+    'grande': (1000, 100000),
+}
+
+# Presupuestos por caso: máximo de queries y mediana máxima en ms por escala.
+# Las queries no dependen de la escala; si cambian es una regresión real.
+# El login está dominado por el hash de la contraseña (PBKDF2): uno por login
+# y una sola query (usuario y perfil, accounts.autenticacion.EmailBackend).
+PRESUPUESTOS = {
+    'ingresos_list': (2, {'pequeña': 60, 'mediana': 60, 'grande': 60}),
+    'gastos_list': (2, {'pequeña': 60, 'mediana': 60, 'grande': 60}),
+    'resumen_calcular': (3, {'pequeña': 80, 'mediana': 80, 'grande': 80}),
+    'dashboard_stats': (2, {'pequeña': 20, 'mediana': 20, 'grande': 20}),
+    'dashboard_stats_cache': (0, {'pequeña': 10, 'mediana': 10, 'grande': 10}),
+    'ingresos_bulk_create': (10, {'pequeña': 150, 'mediana': 150, 'grande': 150}),
+    'gastos_bulk_create': (10, {'pequeña': 150, 'mediana': 150, 'grande': 150}),
+    'custom_login': (1, {'pequeña': 1500, 'mediana': 1500, 'grande': 1500}),
+}
+
+FILAS_BULK = 100
+
+
+class _Rollback(Exception):
+    """Se lanza para deshacer los datos del benchmark"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide latencia y número de queries de los endpoints más usados a varias '
+        'escalas, genera un informe JSON y falla si se superan los presupuestos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--escalas', nargs='+', choices=list(ESCALAS), default=list(ESCALAS),
+            help='Escalas a medir (por defecto todas)'
+        )
+        parser.add_argument(
+            '--repeticiones', type=int, default=5,
+            help='Repeticiones por caso (se toma la mediana)'
+        )
+        parser.add_argument('--salida', help='Fichero donde guardar el informe JSON')
+        parser.add_argument(
+            '--comparar', help='Informe JSON anterior con el que comparar'
+        )
+        parser.add_argument(
+            '--tolerancia', type=float, default=0.25,
+            help='Empeoramiento de la mediana admitido frente a --comparar (0.25 = 25%%)'
+        )
+
+    def handle(self, *args, **options):
+        resultados = []
+        for escala in options['escalas']:
+            try:
+                with transaction.atomic():
+                    resultados += self._medir_escala(escala, options['repeticiones'])
+                    raise _Rollback()
+            except _Rollback:
+                pass
+            finally:
+                cache.clear()
+
+        informe = {
+            'entorno': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'base_datos': settings.DATABASES['default']['ENGINE'],
+                'repeticiones': options['repeticiones'],
+            },
+            'resultados': resultados,
+        }
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as f:
+                json.dump(informe, f, indent=2, ensure_ascii=False, sort_keys=True)
+                f.write('\n')
+            self.stdout.write(f'Informe guardado en {options["salida"]}')
+
+        fallos = [
+            f'{r["escala"]}/{r["caso"]}: {motivo}'
+            for r in resultados for motivo in r['fallos']
+        ]
+        if options['comparar']:
+            fallos += self._comparar(resultados, options['comparar'], options['tolerancia'])
+        if fallos:
+            raise CommandError('Presupuestos superados:\n  ' + '\n  '.join(fallos))
+        self.stdout.write(self.style.SUCCESS('Todos los casos dentro de presupuesto'))
+
+    def _comparar(self, resultados, ruta, tolerancia):
+        with open(ruta, encoding='utf-8') as f:
+            anterior = {
+                (r['escala'], r['caso']): r for r in json.load(f)['resultados']
+            }
+
+        fallos = []
+        for r in resultados:
+            base = anterior.get((r['escala'], r['caso']))
+            if base is None:
+                continue
+            if r['queries'] > base['queries']:
+                fallos.append(
+                    f'{r["escala"]}/{r["caso"]}: {r["queries"]} queries '
+                    f'(antes {base["queries"]})'
+                )
+            if r['mediana_ms'] > base['mediana_ms'] * (1 + tolerancia):
+                fallos.append(
+                    f'{r["escala"]}/{r["caso"]}: {r["mediana_ms"]} ms '
+                    f'(antes {base["mediana_ms"]} ms)'
+                )
+        return fallos
+
+    def _crear_datos(self, usuarios, filas):
+        """Usuarios generados con las filas repartidas en los trimestres del año actual"""
+        año = date.today().year
+        generar(usuarios, [año], max(1, filas // usuarios // 4), prefijo='benchmark')
+        return User.objects.get(username=email_usuario('benchmark', 0)), año
+
+    def _casos(self, cliente, usuario, año):
+        """(nombre, función que hace la petición, preparación antes de cada repetición)"""
+        filas_bulk = [
+            {'fecha': f'{año}-03-01', 'descripcion': 'Bulk', 'importe': '100.00',
+             'iva_porcentaje': 21, 'trimestre': 1, 'año': año}
+            for _ in range(FILAS_BULK)
+        ]
+        ingresos = [dict(fila, cliente='Cliente bulk', irpf_porcentaje=15) for fila in filas_bulk]
+        gastos = [dict(fila, proveedor='Proveedor bulk') for fila in filas_bulk]
+        login = APIClient(SERVER_NAME='localhost')
+        sin_cache = lambda: cache.clear()
+
+        return [
+            ('ingresos_list', lambda: cliente.get(f'/api/ingresos/?año={año}'), None),
+            ('gastos_list', lambda: cliente.get(f'/api/gastos/?año={año}'), None),
+            ('resumen_calcular',
+             lambda: cliente.get(f'/api/resumen/calcular/?trimestre=1&año={año}'), None),
+            ('dashboard_stats', lambda: cliente.get('/api/resumen/dashboard_stats/'), sin_cache),
+            ('dashboard_stats_cache', lambda: cliente.get('/api/resumen/dashboard_stats/'), None),
+            ('ingresos_bulk_create',
+             lambda: cliente.post('/api/ingresos/bulk_create/', {'ingresos': ingresos}, format='json'),
+             None),
+            ('gastos_bulk_create',
+             lambda: cliente.post('/api/gastos/bulk_create/', {'gastos': gastos}, format='json'),
+             None),
+            ('custom_login',
+             lambda: login.post('/api/auth/login/',
+                                {'email': usuario.email, 'password': PASSWORD}, format='json'),
+             None),
+        ]
+
+    def _medir_escala(self, escala, repeticiones):
+        num_usuarios, filas = ESCALAS[escala]
+        self.stdout.write(f'\nEscala {escala}: {num_usuarios} usuarios, {filas} filas')
+        inicio = time.perf_counter()
+        usuario, año = self._crear_datos(num_usuarios, filas)
+        self.stdout.write(f'  datos creados en {time.perf_counter() - inicio:.1f} s')
+
+        cliente = APIClient(SERVER_NAME='localhost')
+        cliente.force_authenticate(usuario)
+        self.stdout.write(
+            f'  {"caso":<24} {"queries":>8} {"mediana ms":>11} {"p95 ms":>9} {"presupuesto":>12}'
+        )
+
+        resultados = []
+        for caso, peticion, preparar in self._casos(cliente, usuario, año):
+            tiempos = []
+            for _ in range(repeticiones):
+                if preparar:
+                    preparar()
+                # El log de queries tiene tope; tras crear los datos está lleno
+                reset_queries()
+                with CaptureQueriesContext(connection) as queries:
+                    inicio = time.perf_counter()
+                    respuesta = peticion()
+                    tiempos.append(time.perf_counter() - inicio)
+                if respuesta.status_code >= 400:
+                    raise CommandError(f'{caso} respondió {respuesta.status_code}')
+
+            tiempos.sort()
+            mediana = round(tiempos[len(tiempos) // 2] * 1000, 2)
+            p95 = round(tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))] * 1000, 2)
+            max_queries, max_ms = PRESUPUESTOS[caso]
+            fallos = []
+            if len(queries) > max_queries:
+                fallos.append(f'{len(queries)} queries (máximo {max_queries})')
+            if mediana > max_ms[escala]:
+                fallos.append(f'{mediana} ms (máximo {max_ms[escala]} ms)')
+
+            resultados.append({
+                'escala': escala,
+                'usuarios': num_usuarios,
+                'filas': filas,
+                'caso': caso,
+                'queries': len(queries),
+                'mediana_ms': mediana,
+                'p95_ms': p95,
+                'presupuesto_queries': max_queries,
+                'presupuesto_ms': max_ms[escala],
+                'fallos': fallos,
+            })
+            estado = self.style.ERROR('FALLA') if fallos else 'ok'
+            self.stdout.write(
+                f'  {caso:<24} {len(queries):>8} {mediana:>11.2f} {p95:>9.2f} '
+                f'{max_queries:>3} / {max_ms[escala]:>5} {estado}'
+            )
+        return resultados
@@ -0,0 +1,247 @@
+# backend/accounts/management/commands/benchmark_asgi.py
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.contrib.auth.models import User
+from rest_framework_simplejwt.tokens import AccessToken
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from urllib.parse import urlencode
+import asyncio
+import io
+import json
+import platform
+import time
+
+import django
+
+from accounts.datos_sinteticos import DOMINIO, generar
+
+
+# caso: (ruta WSGI, ruta ASGI, parámetros con {año})
+CASOS = {
+    'ingresos_list': ('/api/ingresos/', '/api/async/ingresos/', {'año': '{año}'}),
+    'resumen_calcular': (
+        '/api/resumen/calcular/', '/api/async/resumen/calcular/',
+        {'trimestre': '1', 'año': '{año}'}),
+    'resumen_rango': (
+        '/api/resumen/rango/', '/api/async/resumen/rango/',
+        {'desde': '{año}', 'hasta': '{año}'}),
+    'dashboard_stats': (
+        '/api/resumen/dashboard_stats/', '/api/async/resumen/dashboard_stats/', {}),
+}
+
+PREFIJO = 'benchmark-asgi'
+
+
+def _peticion_wsgi(app, ruta, query, token):
+    """Petición GET directa al handler WSGI, como la haría gunicorn"""
+    estado = []
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': ruta,
+        'QUERY_STRING': query,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost',
+        'HTTP_AUTHORIZATION': f'Bearer {token}',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.url_scheme': 'http',
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    respuesta = app(environ, lambda status, headers: estado.append(int(status[:3])))
+    try:
+        b''.join(respuesta)
+    finally:
+        respuesta.close()
+    return estado[0]
+
+
+async def _peticion_asgi(app, ruta, query, token):
+    """Petición GET directa al handler ASGI, como la haría uvicorn"""
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': ruta,
+        'raw_path': ruta.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [
+            (b'host', b'localhost'),
+            (b'authorization', f'Bearer {token}'.encode()),
+        ],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+    terminada = asyncio.Event()
+    estado = []
+    cuerpo_enviado = False
+
+    async def receive():
+        nonlocal cuerpo_enviado
+        if not cuerpo_enviado:
+            cuerpo_enviado = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await terminada.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(mensaje):
+        if mensaje['type'] == 'http.response.start':
+            estado.append(mensaje['status'])
+        elif not mensaje.get('more_body', False):
+            terminada.set()
+
+    await app(scope, receive, send)
+    terminada.set()
+    return estado[0]
+
+
+def _estadisticas(tiempos, total):
+    tiempos = sorted(tiempos)
+    return {
+        'peticiones_por_segundo': round(len(tiempos) / total, 1),
+        'mediana_ms': round(tiempos[len(tiempos) // 2] * 1000, 2),
+        'p95_ms': round(tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))] * 1000, 2),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara throughput y latencia de las vistas síncronas (WSGI, un hilo por '
+        'petición) con sus versiones asíncronas (ASGI) a varias concurrencias'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=20)
+        parser.add_argument(
+            '--filas-por-trimestre', type=int, default=50,
+            help='Movimientos por usuario y trimestre'
+        )
+        parser.add_argument(
+            '--concurrencias', type=int, nargs='+', default=[1, 10, 50],
+            help='Peticiones simultáneas (hilos en WSGI, tareas en ASGI)'
+        )
+        parser.add_argument(
+            '--peticiones', type=int, default=200,
+            help='Peticiones por caso, servidor y concurrencia'
+        )
+        parser.add_argument(
+            '--casos', nargs='+', choices=list(CASOS), default=list(CASOS)
+        )
+        parser.add_argument('--salida', help='Fichero donde guardar el informe JSON')
+
+    def handle(self, *args, **options):
+        if options['usuarios'] < 1 or options['peticiones'] < 1 or min(options['concurrencias']) < 1:
+            raise CommandError('--usuarios, --peticiones y --concurrencias deben ser positivos')
+
+        # Los hilos y las peticiones ASGI usan sus propias conexiones: los
+        # datos tienen que estar confirmados, así que se borran al terminar
+        usuarios = User.objects.filter(
+            username__startswith=f'{PREFIJO}-', username__endswith=f'@{DOMINIO}'
+        )
+        usuarios.delete()
+        año = date.today().year
+        self.stdout.write(
+            f'Generando {options["usuarios"]} usuarios con '
+            f'{options["filas_por_trimestre"]} movimientos por trimestre...'
+        )
+        generar(options['usuarios'], [año], options['filas_por_trimestre'], prefijo=PREFIJO)
+
+        try:
+            tokens = [str(AccessToken.for_user(u)) for u in usuarios.order_by('pk')]
+            resultados = self._medir(tokens, año, options)
+        finally:
+            usuarios.delete()
+            cache.clear()
+
+        informe = {
+            'entorno': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'base_datos': settings.DATABASES['default']['ENGINE'],
+                'usuarios': options['usuarios'],
+                'filas_por_trimestre': options['filas_por_trimestre'],
+                'peticiones': options['peticiones'],
+            },
+            'resultados': resultados,
+        }
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as f:
+                json.dump(informe, f, indent=2, ensure_ascii=False, sort_keys=True)
+                f.write('\n')
+            self.stdout.write(f'Informe guardado en {options["salida"]}')
+
+    def _medir(self, tokens, año, options):
+        wsgi = get_wsgi_application()
+        asgi = get_asgi_application()
+
+        self.stdout.write(
+            f'\n  {"caso":<18} {"conc.":>5} {"servidor":>8} {"pet/s":>8} '
+            f'{"mediana ms":>11} {"p95 ms":>9}'
+        )
+        resultados = []
+        for caso in options['casos']:
+            ruta_wsgi, ruta_asgi, parametros = CASOS[caso]
+            query = urlencode({k: v.format(año=año) for k, v in parametros.items()})
+            for concurrencia in options['concurrencias']:
+                peticiones = [tokens[i % len(tokens)] for i in range(options['peticiones'])]
+                medidas = {
+                    'wsgi': self._medir_wsgi(wsgi, ruta_wsgi, query, peticiones, concurrencia),
+                    'asgi': self._medir_asgi(asgi, ruta_asgi, query, peticiones, concurrencia),
+                }
+                for servidor, medida in medidas.items():
+                    resultados.append(dict(
+                        medida, caso=caso, concurrencia=concurrencia, servidor=servidor
+                    ))
+                    self.stdout.write(
+                        f'  {caso:<18} {concurrencia:>5} {servidor:>8} '
+                        f'{medida["peticiones_por_segundo"]:>8.1f} '
+                        f'{medida["mediana_ms"]:>11.2f} {medida["p95_ms"]:>9.2f}'
+                    )
+        return resultados
+
+    def _medir_wsgi(self, app, ruta, query, tokens, concurrencia):
+        cache.clear()
+
+        def peticion(token):
+            inicio = time.perf_counter()
+            estado = _peticion_wsgi(app, ruta, query, token)
+            if estado >= 400:
+                raise CommandError(f'{ruta} respondió {estado}')
+            return time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrencia) as hilos:
+            tiempos = list(hilos.map(peticion, tokens))
+        return _estadisticas(tiempos, time.perf_counter() - inicio)
+
+    def _medir_asgi(self, app, ruta, query, tokens, concurrencia):
+        cache.clear()
+
+        async def medir():
+            limite = asyncio.Semaphore(concurrencia)
+
+            async def peticion(token):
+                async with limite:
+                    inicio = time.perf_counter()
+                    estado = await _peticion_asgi(app, ruta, query, token)
+                    if estado >= 400:
+                        raise CommandError(f'{ruta} respondió {estado}')
+                    return time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            tiempos = await asyncio.gather(*(peticion(token) for token in tokens))
+            return _estadisticas(tiempos, time.perf_counter() - inicio)
+
+        return asyncio.run(medir())
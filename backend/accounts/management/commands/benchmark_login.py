@@ -0,0 +1,130 @@
+# backend/accounts/management/commands/benchmark_login.py
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+import json
+import logging
+import os
+import time
+
+from accounts.datos_sinteticos import PASSWORD, generar, email_usuario
+
+
+PREFIJO = 'benchmark-login'
+
+
+class _Rollback(Exception):
+    """Se lanza para deshacer los datos del benchmark"""
+
+
+def login_anterior(email, password):
+    """El flujo que tenía custom_login: authenticate, búsqueda por email y otro authenticate"""
+    backend = ModelBackend()
+    usuario = backend.authenticate(None, username=email, password=password)
+    if not usuario:
+        try:
+            usuario_obj = User.objects.get(email=email)
+            usuario = backend.authenticate(None, username=usuario_obj.username, password=password)
+        except User.DoesNotExist:
+            pass
+    return usuario
+
+
+def login_actual(email, password):
+    return authenticate(None, email=email, password=password)
+
+
+class Command(BaseCommand):
+    help = (
+        'Logins por segundo en un núcleo (un solo hilo) con el flujo anterior de '
+        'custom_login y con accounts.autenticacion.EmailBackend, para login '
+        'correcto, contraseña incorrecta y email desconocido'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=1000, help='Usuarios en la tabla')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Logins por caso')
+        parser.add_argument('--salida', help='Fichero donde guardar el informe JSON')
+
+    def handle(self, *args, **options):
+        if options['usuarios'] < 1 or options['repeticiones'] < 1:
+            raise CommandError('--usuarios y --repeticiones deben ser positivos')
+
+        try:
+            with transaction.atomic():
+                self.stdout.write(f'Creando {options["usuarios"]} usuarios...')
+                generar(options['usuarios'], [], 0, prefijo=PREFIJO)
+                resultados = self._medir(options['usuarios'], options['repeticiones'])
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        self.stdout.write(f'\nUn solo hilo; la máquina tiene {os.cpu_count()} núcleos')
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as f:
+                json.dump({'resultados': resultados}, f, indent=2, ensure_ascii=False, sort_keys=True)
+                f.write('\n')
+            self.stdout.write(f'Informe guardado en {options["salida"]}')
+
+    def _medir(self, usuarios, repeticiones):
+        # El último usuario: sin índice sería el peor caso de un recorrido de la tabla
+        email = email_usuario(PREFIJO, usuarios - 1)
+        casos = [
+            ('correcto', email, PASSWORD, True),
+            ('contraseña_incorrecta', email, 'no-es-la-contraseña', False),
+            ('email_desconocido', f'nadie@{PREFIJO}.test', PASSWORD, False),
+        ]
+        cliente = APIClient(SERVER_NAME='localhost')
+
+        def http(email, password):
+            respuesta = cliente.post(
+                '/api/auth/login/', {'email': email, 'password': password}, format='json'
+            )
+            return respuesta.status_code == 200
+
+        flujos = [('anterior', login_anterior), ('actual', login_actual), ('http', http)]
+        # Sin los logs de cada login ni los avisos de 401 en la salida
+        logging.disable(logging.WARNING)
+        try:
+            return self._medir_flujos(flujos, casos, repeticiones)
+        finally:
+            logging.disable(logging.NOTSET)
+
+    def _medir_flujos(self, flujos, casos, repeticiones):
+        """Mediana de `repeticiones` logins por flujo y caso"""
+        self.stdout.write(
+            f'\n  {"flujo":<9} {"caso":<22} {"queries":>8} {"mediana ms":>11} {"logins/s":>9}'
+        )
+        resultados = []
+        for flujo, login in flujos:
+            for caso, email_caso, password, esperado in casos:
+                tiempos = []
+                for _ in range(repeticiones):
+                    reset_queries()
+                    with CaptureQueriesContext(connection) as queries:
+                        inicio = time.perf_counter()
+                        correcto = bool(login(email_caso, password))
+                        tiempos.append(time.perf_counter() - inicio)
+                    if correcto != esperado:
+                        raise CommandError(f'{flujo}/{caso}: resultado inesperado')
+
+                tiempos.sort()
+                mediana = tiempos[len(tiempos) // 2]
+                resultado = {
+                    'flujo': flujo,
+                    'caso': caso,
+                    'queries': len(queries),
+                    'mediana_ms': round(mediana * 1000, 2),
+                    'logins_por_segundo': round(1 / mediana, 2),
+                }
+                resultados.append(resultado)
+                self.stdout.write(
+                    f'  {flujo:<9} {caso:<22} {resultado["queries"]:>8} '
+                    f'{resultado["mediana_ms"]:>11.2f} {resultado["logins_por_segundo"]:>9.2f}'
+                )
+        return resultados
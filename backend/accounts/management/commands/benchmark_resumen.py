@@ -0,0 +1,87 @@
+# backend/accounts/management/commands/benchmark_resumen.py
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from datetime import date
+from decimal import Decimal
+import random
+import time
+
+from accounts.lotes import crear_en_lotes
+from accounts.models import Ingreso, Gasto
+from accounts.resumen import calcular_resumen
+
+
+class _Rollback(Exception):
+    """Se lanza para deshacer los datos del benchmark"""
+
+
+class Command(BaseCommand):
+    help = 'Mide el cálculo del resumen trimestral con distintos volúmenes de filas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--filas', type=int, nargs='+', default=[100, 1000, 10000],
+            help='Número de ingresos y gastos por escala'
+        )
+        parser.add_argument(
+            '--repeticiones', type=int, default=5,
+            help='Repeticiones por escala (se toma la mediana)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._ejecutar(options['filas'], options['repeticiones'])
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _ejecutar(self, escalas, repeticiones):
+        rnd = random.Random(42)
+        usuario = User.objects.create_user(username='benchmark-resumen')
+        creadas = 0
+
+        self.stdout.write(f'{"filas":>10} {"queries":>8} {"mediana ms":>12}')
+        for filas in sorted(escalas):
+            # Completar hasta la escala pedida
+            nuevas = filas - creadas
+            crear_en_lotes(Ingreso, [
+                Ingreso(
+                    usuario=usuario,
+                    fecha=date(2025, 7, 1 + i % 28),
+                    descripcion='Benchmark',
+                    cliente=f'Cliente {i % 50}',
+                    importe=Decimal(rnd.randint(100, 500000)) / 100,
+                    iva_porcentaje=rnd.choice([0, 21]),
+                    irpf_porcentaje=rnd.choice([0, 7, 15]),
+                    trimestre=3,
+                    año=2025,
+                ) for i in range(nuevas)
+            ])
+            crear_en_lotes(Gasto, [
+                Gasto(
+                    usuario=usuario,
+                    fecha=date(2025, 7, 1 + i % 28),
+                    descripcion='Benchmark',
+                    proveedor=f'Proveedor {i % 50}',
+                    importe=Decimal(rnd.randint(100, 50000)) / 100,
+                    iva_porcentaje=rnd.choice([0, 21]),
+                    trimestre=3,
+                    año=2025,
+                ) for i in range(nuevas)
+            ])
+            creadas = filas
+
+            tiempos = []
+            for _ in range(repeticiones):
+                with CaptureQueriesContext(connection) as queries:
+                    inicio = time.perf_counter()
+                    calcular_resumen(usuario, 3, 2025)
+                    tiempos.append(time.perf_counter() - inicio)
+
+            tiempos.sort()
+            mediana = tiempos[len(tiempos) // 2] * 1000
+            self.stdout.write(f'{filas:>10} {len(queries):>8} {mediana:>12.2f}')
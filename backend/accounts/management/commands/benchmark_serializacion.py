@@ -0,0 +1,101 @@
+# backend/accounts/management/commands/benchmark_serializacion.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from rest_framework.request import Request
+from datetime import date
+from decimal import Decimal
+import random
+import time
+
+from accounts.lotes import crear_en_lotes
+from accounts.models import Ingreso, Gasto
+from accounts.lectura import CAMPOS_INGRESO, CAMPOS_GASTO, leer_ingresos, leer_gastos
+from accounts.renderers import JSONRapidoRenderer, orjson
+from accounts.serializers import IngresoSerializer, GastoSerializer
+
+
+class _Rollback(Exception):
+    """Se lanza para deshacer los datos del benchmark"""
+
+
+class Command(BaseCommand):
+    help = 'Compara filas/segundo del serializer de DRF y la ruta de lectura rápida'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=10000, help='Filas por página')
+        parser.add_argument('--repeticiones', type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._ejecutar(options['filas'], options['repeticiones'])
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _medir(self, funcion, repeticiones):
+        mejor = None
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            resultado = funcion()
+            duracion = time.perf_counter() - inicio
+            mejor = duracion if mejor is None else min(mejor, duracion)
+        return mejor, resultado
+
+    def _ejecutar(self, filas, repeticiones):
+        rnd = random.Random(42)
+        usuario = User.objects.create_user(username='benchmark-serializacion')
+        crear_en_lotes(Ingreso, [
+            Ingreso(
+                usuario=usuario, fecha=date(2025, 1 + i % 12, 1 + i % 28),
+                descripcion=f'Factura {i}', cliente=f'Cliente {i % 50}',
+                importe=Decimal(rnd.randint(100, 500000)) / 100,
+                iva_porcentaje=rnd.choice([0, 21]), irpf_porcentaje=rnd.choice([0, 7, 15]),
+                trimestre=1 + (i % 12) // 3, año=2025,
+            ) for i in range(filas)
+        ])
+        crear_en_lotes(Gasto, [
+            Gasto(
+                usuario=usuario, fecha=date(2025, 1 + i % 12, 1 + i % 28),
+                descripcion=f'Gasto {i}', proveedor=f'Proveedor {i % 50}',
+                importe=Decimal(rnd.randint(100, 50000)) / 100,
+                iva_porcentaje=rnd.choice([0, 21]),
+                factura=f'facturas/2025/01/f{i}.pdf' if i % 3 == 0 else None,
+                trimestre=1 + (i % 12) // 3, año=2025,
+            ) for i in range(filas)
+        ])
+
+        request = Request(APIRequestFactory().get('/api/gastos/', HTTP_HOST='localhost'))
+        casos = [
+            ('ingresos', Ingreso, IngresoSerializer, CAMPOS_INGRESO,
+             lambda valores: leer_ingresos(valores)),
+            ('gastos', Gasto, GastoSerializer, CAMPOS_GASTO,
+             lambda valores: leer_gastos(valores, request)),
+        ]
+
+        self.stdout.write(f'orjson: {"sí" if orjson else "no (se usa json de la stdlib)"}')
+        self.stdout.write(f'{"endpoint":<10} {"ruta":<10} {"segundos":>9} {"filas/s":>10}')
+        for nombre, modelo, serializer_class, campos, leer in casos:
+            queryset = modelo.objects.filter(usuario=usuario)
+
+            def antes():
+                datos = serializer_class(queryset, many=True, context={'request': request}).data
+                return JSONRenderer().render(datos)
+
+            def despues():
+                return JSONRapidoRenderer().render(leer(queryset.values(*campos)))
+
+            t_antes, bytes_antes = self._medir(antes, repeticiones)
+            t_despues, bytes_despues = self._medir(despues, repeticiones)
+            if bytes_antes != bytes_despues:
+                raise CommandError(f'La salida de {nombre} no es idéntica')
+
+            self.stdout.write(f'{nombre:<10} {"drf":<10} {t_antes:>9.3f} {filas / t_antes:>10.0f}')
+            self.stdout.write(
+                f'{nombre:<10} {"rápida":<10} {t_despues:>9.3f} {filas / t_despues:>10.0f}'
+                f'  (x{t_antes / t_despues:.1f}, salida idéntica)'
+            )
@@ -0,0 +1,199 @@
+# backend/accounts/management/commands/benchmark_sqlite.py
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+from django.contrib.auth.models import User
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import date
+from decimal import Decimal
+import copy
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from accounts.conexiones import LECTURA, en_lectura
+from accounts.datos_sinteticos import generar
+from accounts.lotes import crear_en_lotes
+from accounts.models import Gasto
+from accounts.resumen import calcular_resumen, estadisticas_dashboard
+
+
+# Cada configuración se mide sobre su propia copia de una base de datos
+# temporal (la de settings no se toca): lectores con el dashboard y el
+# resumen de un trimestre mientras otros hilos insertan gastos en bloque
+# como /api/gastos/bulk_create/.
+PREFIJO = 'benchmark-sqlite'
+
+
+def _configuraciones(originales):
+    """nombre -> (OPTIONS de 'default', OPTIONS de LECTURA o None si no se usa)"""
+    produccion = originales['default'].get('OPTIONS', {})
+    lectura = originales[LECTURA].get('OPTIONS', {}) if LECTURA in originales else None
+    return {
+        # Lo que da Django sin OPTIONS: journal DELETE, transacciones DEFERRED
+        'por-defecto': ({}, None),
+        'produccion': (produccion, lectura),
+    }
+
+
+def _percentil(tiempos, p):
+    if not tiempos:
+        return 0.0
+    return round(tiempos[min(len(tiempos) - 1, int(len(tiempos) * p))] * 1000, 2)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara SQLite con la configuración por defecto y con la de producción '
+        '(WAL, pragmas y alias de lectura) con lecturas y bulk_create a la vez'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=20)
+        parser.add_argument(
+            '--filas-por-trimestre', type=int, default=50,
+            help='Movimientos por usuario y trimestre en los datos iniciales'
+        )
+        parser.add_argument('--lectores', type=int, default=8, help='Hilos que leen')
+        parser.add_argument('--escritores', type=int, default=2, help='Hilos que insertan')
+        parser.add_argument('--lote', type=int, default=500, help='Gastos por bulk_create')
+        parser.add_argument('--segundos', type=float, default=10, help='Duración de cada medida')
+        parser.add_argument('--salida', help='Fichero donde guardar el informe JSON')
+
+    def handle(self, *args, **options):
+        if min(options['usuarios'], options['lectores'], options['lote']) < 1 or options['escritores'] < 0:
+            raise CommandError('--usuarios, --lectores y --lote deben ser positivos')
+        if settings.DATABASES['default']['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('Este benchmark es para SQLite')
+
+        # connections.settings es settings.DATABASES: se cambia y se restaura
+        originales = {
+            alias: copy.deepcopy(connections.settings[alias])
+            for alias in ('default', LECTURA) if alias in connections.settings
+        }
+        directorio = tempfile.mkdtemp(prefix=PREFIJO)
+        try:
+            plantilla = os.path.join(directorio, 'plantilla.sqlite3')
+            self.stdout.write('Creando la base de datos temporal y los datos iniciales...')
+            self._apuntar(plantilla, {}, None)
+            call_command('migrate', verbosity=0, interactive=False)
+            generar(options['usuarios'], [date.today().year], options['filas_por_trimestre'], prefijo=PREFIJO)
+            connections.close_all()
+
+            self.stdout.write(
+                f'\n  {"configuración":<13} {"lect/s":>8} {"mediana ms":>11} {"p95 ms":>9} '
+                f'{"máx ms":>9} {"filas/s":>9} {"bloqueos":>9}'
+            )
+            resultados = {}
+            for nombre, (opciones, lectura) in _configuraciones(originales).items():
+                ruta = os.path.join(directorio, f'{nombre}.sqlite3')
+                shutil.copyfile(plantilla, ruta)
+                self._apuntar(ruta, opciones, lectura)
+                resultados[nombre] = medida = self._medir(options, usar_lectura=lectura is not None)
+                self.stdout.write(
+                    f'  {nombre:<13} {medida["lecturas_por_segundo"]:>8.1f} '
+                    f'{medida["mediana_ms"]:>11.2f} {medida["p95_ms"]:>9.2f} '
+                    f'{medida["max_ms"]:>9.2f} {medida["filas_por_segundo"]:>9.1f} '
+                    f'{medida["bloqueos"]:>9}'
+                )
+        finally:
+            connections.close_all()
+            for alias, valores in originales.items():
+                connections.settings[alias].clear()
+                connections.settings[alias].update(valores)
+            shutil.rmtree(directorio, ignore_errors=True)
+
+        self.stdout.write(
+            '\n"bloqueos": operaciones que fallaron con "database is locked"'
+        )
+        if options['salida']:
+            informe = {
+                'entorno': {k: options[k] for k in (
+                    'usuarios', 'filas_por_trimestre', 'lectores', 'escritores', 'lote', 'segundos'
+                )},
+                'resultados': resultados,
+            }
+            with open(options['salida'], 'w', encoding='utf-8') as f:
+                json.dump(informe, f, indent=2, ensure_ascii=False, sort_keys=True)
+                f.write('\n')
+            self.stdout.write(f'Informe guardado en {options["salida"]}')
+
+    def _apuntar(self, ruta, opciones, lectura):
+        """Las conexiones que se abran a partir de ahora usan `ruta` y estas OPTIONS"""
+        connections.close_all()
+        connections.settings['default'].update(NAME=ruta, OPTIONS=dict(opciones))
+        if LECTURA in connections.settings:
+            connections.settings[LECTURA].update(NAME=ruta, OPTIONS=dict(lectura or {}))
+
+    def _medir(self, options, usar_lectura):
+        año = date.today().year
+        usuarios = list(User.objects.filter(username__startswith=f'{PREFIJO}-').order_by('pk'))
+        connections.close_all()
+        parada = threading.Event()
+
+        def lector(indice):
+            usuario = usuarios[indice % len(usuarios)]
+            tiempos, bloqueos = [], 0
+            try:
+                with en_lectura() if usar_lectura else nullcontext():
+                    while not parada.is_set():
+                        inicio = time.perf_counter()
+                        try:
+                            estadisticas_dashboard(usuario, año)
+                            calcular_resumen(usuario, indice % 4 + 1, año)
+                        except OperationalError:
+                            bloqueos += 1
+                        else:
+                            tiempos.append(time.perf_counter() - inicio)
+            finally:
+                connections.close_all()
+            return tiempos, bloqueos, 0
+
+        def escritor(indice):
+            usuario = usuarios[-1 - indice % len(usuarios)]
+            filas = bloqueos = 0
+            try:
+                while not parada.is_set():
+                    gastos = [
+                        Gasto(
+                            usuario=usuario, fecha=date(año, 1, 15), descripcion='Benchmark',
+                            proveedor='Proveedor benchmark', importe=Decimal('10.00'),
+                            iva_porcentaje=21, trimestre=1, año=año,
+                        )
+                        for _ in range(options['lote'])
+                    ]
+                    try:
+                        crear_en_lotes(Gasto, gastos)
+                    except OperationalError:
+                        bloqueos += 1
+                    else:
+                        filas += len(gastos)
+            finally:
+                connections.close_all()
+            return [], bloqueos, filas
+
+        hilos = options['lectores'] + options['escritores']
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            futuros = [pool.submit(lector, i) for i in range(options['lectores'])]
+            futuros += [pool.submit(escritor, i) for i in range(options['escritores'])]
+            inicio = time.perf_counter()
+            time.sleep(options['segundos'])
+            parada.set()
+            partes = [futuro.result() for futuro in futuros]
+            duracion = time.perf_counter() - inicio
+
+        tiempos = sorted(t for parte in partes for t in parte[0])
+        return {
+            'lecturas_por_segundo': round(len(tiempos) / duracion, 1),
+            'mediana_ms': _percentil(tiempos, 0.5),
+            'p95_ms': _percentil(tiempos, 0.95),
+            'max_ms': round(tiempos[-1] * 1000, 2) if tiempos else 0.0,
+            'filas_por_segundo': round(sum(parte[2] for parte in partes) / duracion, 1),
+            'bloqueos': sum(parte[1] for parte in partes),
+        }
@@ -1,129 +1,88 @@
 # backend/accounts/management/commands/crear_datos_ejemplo.py
 
-from django.core.management.base import BaseCommand
-from django.utils import timezone
-from datetime import date, timedelta
-from decimal import Decimal
-import random
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+import time
 
-from accounts.models import Ingreso, Gasto
+from accounts.datos_sinteticos import DOMINIO, PASSWORD, generar
 
 
 class Command(BaseCommand):
-    help = 'Crea datos de ejemplo para Q3 2025'
+    help = (
+        'Genera usuarios de ejemplo con perfil fiscal, ingresos y gastos '
+        'deterministas (misma semilla, mismos datos) para desarrollo y pruebas de carga'
+    )
 
-    def handle(self, *args, **kwargs):
-        self.stdout.write('Creando datos de ejemplo para Q3 2025...')
-        
-        # Limpiar datos existentes del Q3 2025
-        Ingreso.objects.filter(trimestre=3, año=2025).delete()
-        Gasto.objects.filter(trimestre=3, año=2025).delete()
-        
-        # Datos de ejemplo basados en tu Excel
-        ingresos_data = [
-            {
-                'fecha': date(2025, 7, 1),
-                'descripcion': 'Demo IA',
-                'cliente': 'Urodata',
-                'importe': Decimal('500.00'),
-                'iva_porcentaje': 0,
-                'irpf_porcentaje': 0,
-            },
-            {
-                'fecha': date(2025, 7, 7),
-                'descripcion': 'Kidsy MVP 1 fase',
-                'cliente': 'Ware26',
-                'importe': Decimal('1750.00'),
-                'iva_porcentaje': 21,
-                'irpf_porcentaje': 7,
-            },
-            {
-                'fecha': date(2025, 7, 9),
-                'descripcion': 'Desarrollo 1 Hito MVP',
-                'cliente': 'Ontrackia',
-                'importe': Decimal('1000.00'),
-                'iva_porcentaje': 21,
-                'irpf_porcentaje': 0,
-            },
-        ]
-        
-        gastos_data = [
-            {
-                'fecha': date(2025, 7, 1),
-                'descripcion': 'Servidor',
-                'proveedor': 'Digital Ocean',
-                'importe': Decimal('38.98'),
-                'iva_porcentaje': 0,
-            },
-            {
-                'fecha': date(2025, 7, 4),
-                'descripcion': 'Línea de Internet',
-                'proveedor': 'Movistar',
-                'importe': Decimal('41.40'),
-                'iva_porcentaje': 21,
-            },
-            {
-                'fecha': date(2025, 7, 5),
-                'descripcion': 'Claude AI',
-                'proveedor': 'Anthropic',
-                'importe': Decimal('179.90'),
-                'iva_porcentaje': 0,
-            },
-            {
-                'fecha': date(2025, 7, 7),
-                'descripcion': 'Gastos Malt Kidsy 1 Fase',
-                'proveedor': 'Malt',
-                'importe': Decimal('175.00'),
-                'iva_porcentaje': 0,
-            },
-            {
-                'fecha': date(2025, 7, 14),
-                'descripcion': 'Almacenamiento',
-                'proveedor': 'Apple',
-                'importe': Decimal('0.82'),
-                'iva_porcentaje': 21,
-            },
-            {
-                'fecha': date(2025, 7, 17),
-                'descripcion': 'Almacenamiento Google',
-                'proveedor': 'Google',
-                'importe': Decimal('1.64'),
-                'iva_porcentaje': 21,
-            },
-            {
-                'fecha': date(2025, 7, 19),
-                'descripcion': 'Renovación Dominio quinterodev.com',
-                'proveedor': 'GoDaddy',
-                'importe': Decimal('22.16'),
-                'iva_porcentaje': 0,
-            },
-        ]
-        
-        # Crear ingresos
-        for ingreso_data in ingresos_data:
-            ingreso = Ingreso.objects.create(
-                **ingreso_data,
-                trimestre=3,
-                año=2025
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', '--users', type=int, default=1)
+        parser.add_argument(
+            '--años', '--years', type=int, default=1,
+            help='Número de años, terminando en --hasta'
+        )
+        parser.add_argument('--hasta', type=int, default=2025, help='Último año generado')
+        parser.add_argument(
+            '--filas-por-trimestre', '--rows-per-quarter', type=int, default=10,
+            help='Movimientos (ingresos + gastos) por usuario y trimestre'
+        )
+        parser.add_argument('--semilla', '--seed', type=int, default=42)
+        parser.add_argument(
+            '--prefijo', default='ejemplo',
+            help=f'Los usuarios se llaman <prefijo>-<n>@{DOMINIO}'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Filas aproximadas por transacción'
+        )
+        parser.add_argument(
+            '--procesos', type=int, default=1,
+            help='Procesos que generan los datos en paralelo a la inserción'
+        )
+        parser.add_argument(
+            '--borrar', action='store_true',
+            help='Borra antes los usuarios generados con el mismo prefijo'
+        )
+
+    def handle(self, *args, **options):
+        if options['usuarios'] < 1 or options['años'] < 1 or options['filas_por_trimestre'] < 1:
+            raise CommandError('--usuarios, --años y --filas-por-trimestre deben ser positivos')
+
+        prefijo = options['prefijo']
+        existentes = User.objects.filter(
+            username__startswith=f'{prefijo}-', username__endswith=f'@{DOMINIO}'
+        )
+        if options['borrar']:
+            borrados = existentes.count()
+            existentes.delete()
+            self.stdout.write(f'Borrados {borrados} usuarios de ejemplo anteriores')
+        elif existentes.exists():
+            raise CommandError(
+                f'Ya hay usuarios con el prefijo "{prefijo}": usa --borrar u otro --prefijo'
             )
-            self.stdout.write(f'✓ Ingreso creado: {ingreso}')
-        
-        # Crear gastos
-        for gasto_data in gastos_data:
-            gasto = Gasto.objects.create(
-                **gasto_data,
-                trimestre=3,
-                año=2025
+
+        años = range(options['hasta'] - options['años'] + 1, options['hasta'] + 1)
+        self.stdout.write(
+            f'Generando {options["usuarios"]} usuarios, años {años[0]}-{años[-1]}, '
+            f'{options["filas_por_trimestre"]} movimientos por trimestre '
+            f'(semilla {options["semilla"]})...'
+        )
+
+        inicio = time.perf_counter()
+
+        def progreso(usuarios, filas):
+            segundos = time.perf_counter() - inicio
+            self.stdout.write(
+                f'  {usuarios} usuarios, {filas} filas ({filas / segundos:.0f} filas/s)'
             )
-            self.stdout.write(f'✓ Gasto creado: {gasto}')
-        
-        # Mostrar resumen
-        total_ingresos = sum(i['importe'] for i in ingresos_data)
-        total_gastos = sum(g['importe'] for g in gastos_data)
-        
+
+        filas = generar(
+            options['usuarios'], años, options['filas_por_trimestre'],
+            semilla=options['semilla'], prefijo=prefijo,
+            batch_size=options['batch_size'], procesos=options['procesos'],
+            progreso=progreso,
+        )
+
+        segundos = time.perf_counter() - inicio
         self.stdout.write(self.style.SUCCESS(
-            f'\n✨ Datos creados exitosamente!\n'
-            f'Total ingresos: {total_ingresos:.2f} €\n'
-            f'Total gastos: {total_gastos:.2f} €\n'
-            f'Beneficio neto: {total_ingresos - total_gastos:.2f} €'
-        ))
\ No newline at end of file
+            f'\n✨ {options["usuarios"]} usuarios y {filas} movimientos creados en {segundos:.1f} s\n'
+            f'Usuario: {prefijo}-0@{DOMINIO} / contraseña: {PASSWORD}'
+        ))
@@ -0,0 +1,64 @@
+# backend/accounts/management/commands/importar_movimientos.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+import time
+
+from accounts.importacion import ErrorImportacion, importar
+
+
+class Command(BaseCommand):
+    help = 'Importa ingresos o gastos desde un CSV/XLSX (exportaciones del banco o de Excel)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo CSV o XLSX')
+        parser.add_argument('--usuario', required=True, help='Email del usuario propietario')
+        parser.add_argument(
+            '--tipo', choices=['ingresos', 'gastos'], required=True,
+            help='Tipo de movimientos del archivo'
+        )
+        parser.add_argument(
+            '--columna', action='append', default=[], metavar='CAMPO=CABECERA',
+            help='Cabecera del archivo para un campo, p. ej. --columna importe="Base imponible"'
+        )
+        parser.add_argument('--chunk', type=int, default=None, help='Filas por bloque')
+
+    def handle(self, *args, **options):
+        try:
+            usuario = User.objects.get(email=options['usuario'])
+        except User.DoesNotExist:
+            raise CommandError(f'No existe ningún usuario con email {options["usuario"]}')
+
+        mapeo = {}
+        for columna in options['columna']:
+            campo, _, cabecera = columna.partition('=')
+            if not cabecera:
+                raise CommandError(f'Formato de --columna inválido: {columna}')
+            mapeo[campo.strip()] = cabecera.strip()
+
+        inicio = time.perf_counter()
+
+        def progreso(resultado):
+            segundos = time.perf_counter() - inicio
+            self.stdout.write(
+                f'{resultado["procesadas"]} filas procesadas, '
+                f'{resultado["creadas"]} creadas, '
+                f'{resultado["con_errores"]} con errores '
+                f'({resultado["procesadas"] / max(segundos, 1e-9):.0f} filas/s)'
+            )
+
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                resultado = importar(
+                    archivo, options['archivo'], options['tipo'], usuario,
+                    mapeo=mapeo, chunk_size=options['chunk'], progreso=progreso
+                )
+        except (OSError, ErrorImportacion) as e:
+            raise CommandError(str(e))
+
+        for error in resultado['errores']:
+            self.stdout.write(self.style.WARNING(f'Fila {error["fila"]}: {error["errores"]}'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✨ Importación terminada: {resultado["creadas"]} {options["tipo"]} creados'
+        ))
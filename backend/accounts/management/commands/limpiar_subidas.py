@@ -0,0 +1,25 @@
+# backend/accounts/management/commands/limpiar_subidas.py
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.subidas import limpiar_subidas
+
+
+class Command(BaseCommand):
+    help = 'Borra las subidas de facturas que se quedaron a medias'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horas', type=int, default=24,
+            help='Horas sin recibir trozos para dar una subida por abandonada'
+        )
+
+    def handle(self, *args, **options):
+        antes_de = timezone.now() - timedelta(hours=options['horas'])
+        borradas = limpiar_subidas(antes_de)
+        self.stdout.write(self.style.SUCCESS(
+            f'✨ {borradas} subidas abandonadas borradas'
+        ))
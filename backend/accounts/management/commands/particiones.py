@@ -0,0 +1,46 @@
+# backend/accounts/management/commands/particiones.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from accounts.particiones import (
+    activo, asegurar_particiones, desacoplar, nombre_particion, particiones, tablas
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Particiones por año de ingresos y gastos (PostgreSQL): crea las que '
+        'faltan, lista las existentes o desacopla un ejercicio antiguo'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--crear', type=int, nargs='*', default=[], metavar='AÑO',
+            help='Años para los que crear partición (además del actual y el siguiente)'
+        )
+        parser.add_argument(
+            '--desacoplar', type=int, metavar='AÑO',
+            help='Saca de las tablas la partición de ese año (queda como tabla suelta)'
+        )
+
+    def handle(self, *args, **options):
+        if not activo(connection):
+            raise CommandError(
+                'El particionado solo se usa con PostgreSQL y PARTICIONAR_POR_AÑO'
+            )
+
+        if options['desacoplar']:
+            for tabla in tablas():
+                particion = desacoplar(tabla, options['desacoplar'])
+                self.stdout.write(self.style.WARNING(
+                    f'⚠️  {particion} desacoplada: sus filas ya no se ven en la aplicación'
+                ))
+            return
+
+        for tabla, año in asegurar_particiones(connection, options['crear']):
+            self.stdout.write(self.style.SUCCESS(f'✨ {nombre_particion(tabla, año)} creada'))
+
+        self.stdout.write(f'\n  {"tabla":<18} {"partición":<24} {"valores":<22} {"filas aprox.":>12}')
+        for tabla, particion, limites, filas in particiones(connection):
+            self.stdout.write(f'  {tabla:<18} {particion:<24} {limites:<22} {max(filas, 0):>12}')
@@ -0,0 +1,32 @@
+# backend/accounts/management/commands/procesar_facturas.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.procesado import procesar_pendientes
+
+
+class Command(BaseCommand):
+    help = 'Analiza las facturas pendientes (texto, miniatura y datos sugeridos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--procesos', type=int, default=max(settings.FACTURAS_PROCESOS, 1),
+            help='Procesos en paralelo (por defecto FACTURAS_PROCESOS)'
+        )
+        parser.add_argument(
+            '--reprocesar', action='store_true',
+            help='Analiza de nuevo todas las facturas, también las ya hechas'
+        )
+
+    def handle(self, *args, **options):
+        def progreso(hechos, errores, total):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {hechos + errores}/{total}')
+
+        hechos, errores = procesar_pendientes(
+            options['procesos'], options['reprocesar'], progreso
+        )
+        self.stdout.write(self.style.SUCCESS(f'✨ {hechos} facturas analizadas'))
+        if errores:
+            self.stdout.write(self.style.WARNING(f'⚠️  {errores} con errores (ver el admin)'))
@@ -0,0 +1,15 @@
+# backend/accounts/management/commands/purgar_tokens.py
+
+from django.core.management.base import BaseCommand
+
+from accounts.autenticacion import purgar_revocados
+
+
+class Command(BaseCommand):
+    help = 'Borra de la lista negra los refresh tokens que ya han caducado'
+
+    def handle(self, *args, **options):
+        borrados = purgar_revocados()
+        self.stdout.write(self.style.SUCCESS(
+            f'✨ {borrados} tokens revocados caducados borrados'
+        ))
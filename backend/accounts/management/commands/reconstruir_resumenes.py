@@ -0,0 +1,23 @@
+# backend/accounts/management/commands/reconstruir_resumenes.py
+
+from django.core.management.base import BaseCommand
+
+from accounts.resumen import reconstruir_resumenes
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los resúmenes trimestrales materializados desde ingresos y gastos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--usuario', type=int, nargs='+',
+            help='IDs de usuario a reconstruir (por defecto, todos)'
+        )
+
+    def handle(self, *args, **options):
+        usuarios = options['usuario']
+        self.stdout.write('Reconstruyendo resúmenes trimestrales...')
+        creados = reconstruir_resumenes(usuarios=usuarios)
+        self.stdout.write(self.style.SUCCESS(
+            f'✨ {creados} resúmenes reconstruidos'
+        ))
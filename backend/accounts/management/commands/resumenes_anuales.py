@@ -0,0 +1,59 @@
+# backend/accounts/management/commands/resumenes_anuales.py
+
+import os
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.anual import generar_resumenes_anuales
+
+
+class Command(BaseCommand):
+    help = (
+        'Calcula el ResumenAnual (Modelo 390 y cuenta de resultados) de todos '
+        'los perfiles en lotes repartidos en varios procesos. Si se interrumpe, '
+        'volver a lanzarlo sigue con los que faltan'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--año', type=int, default=date.today().year - 1,
+            help='Ejercicio (por defecto el anterior)'
+        )
+        parser.add_argument(
+            '--procesos', type=int, default=os.cpu_count() or 1,
+            help='Procesos en paralelo (por defecto uno por núcleo; 1 = en este proceso)'
+        )
+        parser.add_argument('--lote', type=int, default=500, help='Usuarios por lote')
+        parser.add_argument(
+            '--recalcular', action='store_true',
+            help='Calcula de nuevo también los usuarios que ya tienen resumen del año'
+        )
+
+    def handle(self, *args, **options):
+        if options['procesos'] < 1 or options['lote'] < 1:
+            raise CommandError('--procesos y --lote deben ser positivos')
+
+        def progreso(hechos, total, segundos):
+            por_segundo = hechos / segundos if segundos else 0
+            restante = (total - hechos) / por_segundo if por_segundo else 0
+            self.stdout.write(
+                f'  {hechos}/{total} usuarios  {por_segundo:.0f} usuarios/s  '
+                f'quedan {restante:.0f} s'
+            )
+
+        self.stdout.write(
+            f'Resúmenes de {options["año"]}: {options["procesos"]} procesos, '
+            f'lotes de {options["lote"]} usuarios'
+        )
+        try:
+            hechos = generar_resumenes_anuales(
+                options['año'], options['procesos'], options['lote'],
+                options['recalcular'], progreso
+            )
+        except KeyboardInterrupt:
+            raise CommandError(
+                'Interrumpido: los lotes terminados están guardados; '
+                'vuelve a lanzarlo (sin --recalcular) para seguir'
+            )
+        self.stdout.write(self.style.SUCCESS(f'✨ {hechos} resúmenes anuales guardados'))
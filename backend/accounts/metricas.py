@@ -0,0 +1,164 @@
+# backend/accounts/metricas.py
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+# Métricas por vista (nombre de la URL, p. ej. 'resumen-calcular') guardadas
+# en memoria del proceso y expuestas en formato de texto de Prometheus.
+# Con varios workers cada proceso tiene las suyas: Prometheus las
+# distingue por instancia al hacer scrape a cada uno.
+
+logger = logging.getLogger(__name__)
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_QUERIES = (1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+# nombre: (ayuda, buckets, clave en las medidas de la petición)
+HISTOGRAMAS = {
+    'helptax_peticion_duracion_segundos': (
+        'Latencia de la petición', BUCKETS_SEGUNDOS, 'duracion'),
+    'helptax_sql_queries': (
+        'Queries SQL por petición', BUCKETS_QUERIES, 'queries'),
+    'helptax_sql_duracion_segundos': (
+        'Tiempo en SQL por petición', BUCKETS_SEGUNDOS, 'sql'),
+    'helptax_serializacion_duracion_segundos': (
+        'Tiempo serializando la respuesta', BUCKETS_SEGUNDOS, 'serializacion'),
+}
+PRESUPUESTO_SUPERADO = 'helptax_presupuesto_queries_superado_total'
+
+_medidas = ContextVar('medidas_peticion', default=None)
+
+
+class PresupuestoQueriesSuperado(AssertionError):
+    """Una vista ha hecho más queries de las de su presupuesto"""
+
+
+class Histograma:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.contadores = [0] * len(buckets)
+        self.suma = 0
+        self.total = 0
+
+    def observar(self, valor):
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                self.contadores[i] += 1
+        self.suma += valor
+        self.total += 1
+
+
+class Registro:
+    """Histogramas por (métrica, vista) protegidos con un lock"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histogramas = {}
+        self.superados = {}
+
+    def observar(self, vista, medidas):
+        with self.lock:
+            for nombre, (_, buckets, clave) in HISTOGRAMAS.items():
+                histograma = self.histogramas.get((nombre, vista))
+                if histograma is None:
+                    histograma = self.histogramas[(nombre, vista)] = Histograma(buckets)
+                histograma.observar(medidas[clave])
+
+    def presupuesto_superado(self, vista):
+        with self.lock:
+            self.superados[vista] = self.superados.get(vista, 0) + 1
+
+    def limpiar(self):
+        with self.lock:
+            self.histogramas.clear()
+            self.superados.clear()
+
+    def exportar(self):
+        """Texto en el formato de exposición de Prometheus"""
+        lineas = []
+        with self.lock:
+            for nombre, (ayuda, _, _) in HISTOGRAMAS.items():
+                lineas.append(f'# HELP {nombre} {ayuda}')
+                lineas.append(f'# TYPE {nombre} histogram')
+                for (metrica, vista), h in sorted(self.histogramas.items()):
+                    if metrica != nombre:
+                        continue
+                    etiqueta = _etiqueta(vista)
+                    for limite, cuenta in zip(h.buckets, h.contadores):
+                        lineas.append(f'{nombre}_bucket{{vista="{etiqueta}",le="{limite}"}} {cuenta}')
+                    lineas.append(f'{nombre}_bucket{{vista="{etiqueta}",le="+Inf"}} {h.total}')
+                    lineas.append(f'{nombre}_sum{{vista="{etiqueta}"}} {h.suma}')
+                    lineas.append(f'{nombre}_count{{vista="{etiqueta}"}} {h.total}')
+
+            lineas.append(f'# HELP {PRESUPUESTO_SUPERADO} Peticiones por encima del presupuesto de queries')
+            lineas.append(f'# TYPE {PRESUPUESTO_SUPERADO} counter')
+            for vista, cuenta in sorted(self.superados.items()):
+                lineas.append(f'{PRESUPUESTO_SUPERADO}{{vista="{_etiqueta(vista)}"}} {cuenta}')
+        return '\n'.join(lineas) + '\n'
+
+
+def _etiqueta(valor):
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registro = Registro()
+
+
+def iniciar_peticion():
+    """Empieza a acumular las medidas de la petición en curso"""
+    medidas = {'queries': 0, 'sql': 0.0, 'serializacion': 0.0}
+    return medidas, _medidas.set(medidas)
+
+
+def terminar_peticion(token):
+    _medidas.reset(token)
+
+
+@contextmanager
+def cronometro(clave):
+    """Suma el tiempo del bloque a la medida `clave` de la petición en curso"""
+    medidas = _medidas.get()
+    if medidas is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        medidas[clave] += time.perf_counter() - inicio
+
+
+def contar_query(execute, sql, params, many, context):
+    """execute_wrapper de Django: cuenta las queries y el tiempo en la BD"""
+    medidas = _medidas.get()
+    if medidas is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medidas['sql'] += time.perf_counter() - inicio
+        medidas['queries'] += 1
+
+
+def comprobar_presupuesto(vista, queries):
+    """
+    Compara las queries de la petición con settings.PRESUPUESTO_QUERIES.
+    Si se supera se registra siempre; con PRESUPUESTO_QUERIES_ESTRICTO
+    (pensado para los tests) además se lanza PresupuestoQueriesSuperado.
+    """
+    maximo = getattr(settings, 'PRESUPUESTO_QUERIES', {}).get(vista)
+    if maximo is None or queries <= maximo:
+        return
+
+    registro.presupuesto_superado(vista)
+    mensaje = f'{vista}: {queries} queries (presupuesto {maximo})'
+    if getattr(settings, 'PRESUPUESTO_QUERIES_ESTRICTO', False):
+        raise PresupuestoQueriesSuperado(mensaje)
+    logger.warning('Presupuesto de queries superado en %s', mensaje)
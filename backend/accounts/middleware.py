@@ -0,0 +1,130 @@
+# backend/accounts/middleware.py
+
+import time
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from django.conf import settings
+from django.db import connections
+
+from .conexiones import en_lectura
+from .metricas import (
+    comprobar_presupuesto, contar_query, iniciar_peticion, registro, terminar_peticion
+)
+
+
+def nombre_vista(request):
+    """Nombre de la URL resuelta ('resumen-calcular'); acota la cardinalidad"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'sin_vista'
+    return match.view_name or match._func_path
+
+
+@contextmanager
+def _contar_queries():
+    with ExitStack() as pila:
+        for conexion in connections.all():
+            pila.enter_context(conexion.execute_wrapper(contar_query))
+        yield
+
+
+class MetricasMiddleware:
+    """
+    Mide por vista la latencia, el número de queries, el tiempo en SQL y el
+    de serialización (ver metricas.cronometro) de cada petición. Las medidas
+    van a los histogramas de /metrics y, con DEBUG, a cabeceras de la respuesta.
+    En las respuestas en streaming solo se mide hasta que empieza el envío.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.asincrono = iscoroutinefunction(get_response)
+        if self.asincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+
+        medidas, token = iniciar_peticion()
+        inicio = time.perf_counter()
+        try:
+            with _contar_queries():
+                response = self.get_response(request)
+        finally:
+            terminar_peticion(token)
+        return self.registrar(request, response, medidas, inicio)
+
+    async def __acall__(self, request):
+        medidas, token = iniciar_peticion()
+        inicio = time.perf_counter()
+        # Las conexiones son por hilo y el ORM asíncrono las usa desde el hilo
+        # síncrono de la petición: los wrappers se instalan allí
+        pila = ExitStack()
+        await sync_to_async(pila.enter_context)(_contar_queries())
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(pila.close)()
+            terminar_peticion(token)
+        return self.registrar(request, response, medidas, inicio)
+
+    def registrar(self, request, response, medidas, inicio):
+        medidas['duracion'] = time.perf_counter() - inicio
+
+        vista = nombre_vista(request)
+        if vista == 'metricas':
+            return response
+        registro.observar(vista, medidas)
+
+        if settings.DEBUG:
+            response['X-Vista'] = vista
+            response['X-SQL-Queries'] = str(medidas['queries'])
+            response['Server-Timing'] = ', '.join([
+                f'sql;dur={medidas["sql"] * 1000:.2f}',
+                f'serializacion;dur={medidas["serializacion"] * 1000:.2f}',
+                f'total;dur={medidas["duracion"] * 1000:.2f}',
+            ])
+
+        # Los presupuestos son de lectura: el POST a 'gasto-list' crea, no lista
+        if request.method in ('GET', 'HEAD'):
+            comprobar_presupuesto(vista, medidas['queries'])
+        return response
+
+
+class LecturaMiddleware:
+    """
+    Las peticiones GET/HEAD/OPTIONS leen por el alias de lectura (accounts/conexiones.py).
+    Lo que escriban (sesiones, análisis encolados...) sigue yendo a 'default'.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    METODOS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.asincrono = iscoroutinefunction(get_response)
+        if self.asincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+        if request.method not in self.METODOS:
+            return self.get_response(request)
+        with en_lectura():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if request.method not in self.METODOS:
+            return await self.get_response(request)
+        # sync_to_async copia el contexto: el ORM del hilo síncrono también lo ve
+        with en_lectura():
+            return await self.get_response(request)
@@ -0,0 +1,125 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:00
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def borrar_resumenes(apps, schema_editor):
+    # La tabla nunca se escribía; se vacía antes de añadir el usuario
+    apps.get_model('accounts', 'ResumenTrimestral').objects.all().delete()
+
+
+def poblar_resumenes(apps, schema_editor):
+    Ingreso = apps.get_model('accounts', 'Ingreso')
+    Gasto = apps.get_model('accounts', 'Gasto')
+    ResumenTrimestral = apps.get_model('accounts', 'ResumenTrimestral')
+
+    cero = Decimal('0')
+    resumenes = {}
+
+    def resumen(fila):
+        clave = (fila.usuario_id, fila.trimestre, fila.año)
+        if clave not in resumenes:
+            resumenes[clave] = ResumenTrimestral(
+                usuario_id=fila.usuario_id, trimestre=fila.trimestre, año=fila.año,
+                ingresos_totales=cero, gastos_totales=cero, beneficio_neto=cero,
+                iva_repercutido=cero, iva_soportado=cero, iva_a_pagar=cero,
+                irpf_retenido=cero, num_ingresos=0, num_gastos=0,
+            )
+        return resumenes[clave]
+
+    for ingreso in Ingreso.objects.order_by().iterator(chunk_size=2000):
+        r = resumen(ingreso)
+        iva = ingreso.importe * ingreso.iva_porcentaje / 100
+        r.ingresos_totales += ingreso.importe
+        r.beneficio_neto += ingreso.importe
+        r.iva_repercutido += iva
+        r.iva_a_pagar += iva
+        r.irpf_retenido += ingreso.importe * ingreso.irpf_porcentaje / 100
+        r.num_ingresos += 1
+
+    for gasto in Gasto.objects.order_by().iterator(chunk_size=2000):
+        r = resumen(gasto)
+        iva = gasto.importe * gasto.iva_porcentaje / 100
+        r.gastos_totales += gasto.importe
+        r.beneficio_neto -= gasto.importe
+        r.iva_soportado += iva
+        r.iva_a_pagar -= iva
+        r.num_gastos += 1
+
+    ResumenTrimestral.objects.bulk_create(resumenes.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_perfilautonomo_gasto_usuario_ingreso_usuario_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(borrar_resumenes, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='resumentrimestral',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='resumentrimestral',
+            name='usuario',
+            field=models.ForeignKey(default=1, on_delete=django.db.models.deletion.CASCADE, related_name='resumenes', to=settings.AUTH_USER_MODEL),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='resumentrimestral',
+            name='num_gastos',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='resumentrimestral',
+            name='num_ingresos',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='resumentrimestral',
+            name='beneficio_neto',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AlterField(
+            model_name='resumentrimestral',
+            name='gastos_totales',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AlterField(
+            model_name='resumentrimestral',
+            name='ingresos_totales',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AlterField(
+            model_name='resumentrimestral',
+            name='irpf_retenido',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=16),
+        ),
+        migrations.AlterField(
+            model_name='resumentrimestral',
+            name='iva_a_pagar',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=16),
+        ),
+        migrations.AlterField(
+            model_name='resumentrimestral',
+            name='iva_repercutido',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=16),
+        ),
+        migrations.AlterField(
+            model_name='resumentrimestral',
+            name='iva_soportado',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=16),
+        ),
+        migrations.AlterUniqueTogether(
+            name='resumentrimestral',
+            unique_together={('usuario', 'trimestre', 'año')},
+        ),
+        migrations.RunPython(poblar_resumenes, migrations.RunPython.noop),
+    ]
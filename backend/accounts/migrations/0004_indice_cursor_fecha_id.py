@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_resumen_trimestral_por_usuario'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='gasto',
+            name='accounts_ga_usuario_b8a053_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='ingreso',
+            name='accounts_in_usuario_aeba56_idx',
+        ),
+        migrations.AddIndex(
+            model_name='gasto',
+            index=models.Index(fields=['usuario', '-fecha', '-id'], name='accounts_ga_usuario_c0fea8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ingreso',
+            index=models.Index(fields=['usuario', '-fecha', '-id'], name='accounts_in_usuario_7a2fee_idx'),
+        ),
+    ]
@@ -0,0 +1,123 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:52
+
+import unicodedata
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+# Usuarios procesados por lote en el backfill
+USUARIOS_POR_LOTE = 200
+
+
+def normalizar_nombre(nombre):
+    # Copia de accounts.terceros.normalizar_nombre (las migraciones no importan código de la app)
+    texto = unicodedata.normalize('NFKD', str(nombre or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.lower().split())[:100]
+
+
+def backfill_terceros(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    configuracion = [
+        (apps.get_model('accounts', 'Ingreso'), apps.get_model('accounts', 'Cliente'), 'cliente', 'cliente_ref'),
+        (apps.get_model('accounts', 'Gasto'), apps.get_model('accounts', 'Proveedor'), 'proveedor', 'proveedor_ref'),
+    ]
+    usuario_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+
+    for inicio in range(0, len(usuario_ids), USUARIOS_POR_LOTE):
+        lote = usuario_ids[inicio:inicio + USUARIOS_POR_LOTE]
+        for modelo, dimension, campo, campo_fk in configuracion:
+            # Un GROUP BY por lote con los nombres tal cual están escritos
+            grupos = modelo.objects.filter(usuario_id__in=lote).order_by().values(
+                'usuario_id', campo
+            ).annotate(num=Count('id'), total=Sum('importe'))
+
+            terceros = {}
+            for grupo in grupos:
+                clave = (grupo['usuario_id'], normalizar_nombre(grupo[campo]))
+                tercero = terceros.setdefault(clave, {
+                    'nombre': grupo[campo].strip()[:100],
+                    'num': 0,
+                    'total': Decimal('0'),
+                    'variantes': [],
+                })
+                tercero['num'] += grupo['num']
+                tercero['total'] += grupo['total'] or Decimal('0')
+                tercero['variantes'].append(grupo[campo])
+
+            creados = dimension.objects.bulk_create([
+                dimension(
+                    usuario_id=usuario_id, nombre=datos['nombre'],
+                    nombre_normalizado=normalizado, num_facturas=datos['num'],
+                    total_facturado=datos['total'].quantize(Decimal('0.01')),
+                )
+                for (usuario_id, normalizado), datos in terceros.items()
+            ], batch_size=1000)
+
+            # Un UPDATE por cliente/proveedor con todas sus variantes de nombre
+            for objeto, datos in zip(creados, terceros.values()):
+                modelo.objects.filter(
+                    usuario_id=objeto.usuario_id, **{f'{campo}__in': datos['variantes']}
+                ).update(**{campo_fk: objeto.pk})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_indice_cursor_fecha_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Cliente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('nombre_normalizado', models.CharField(max_length=100)),
+                ('num_facturas', models.IntegerField(default=0)),
+                ('total_facturado', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='clientes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Cliente',
+                'verbose_name_plural': 'Clientes',
+                'ordering': ['nombre_normalizado'],
+                'abstract': False,
+                'unique_together': {('usuario', 'nombre_normalizado')},
+            },
+        ),
+        migrations.AddField(
+            model_name='ingreso',
+            name='cliente_ref',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ingresos', to='accounts.cliente'),
+        ),
+        migrations.CreateModel(
+            name='Proveedor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('nombre_normalizado', models.CharField(max_length=100)),
+                ('num_facturas', models.IntegerField(default=0)),
+                ('total_facturado', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='proveedores', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Proveedor',
+                'verbose_name_plural': 'Proveedores',
+                'ordering': ['nombre_normalizado'],
+                'abstract': False,
+                'unique_together': {('usuario', 'nombre_normalizado')},
+            },
+        ),
+        migrations.AddField(
+            model_name='gasto',
+            name='proveedor_ref',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='gastos', to='accounts.proveedor'),
+        ),
+        migrations.RunPython(backfill_terceros, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:17
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_clientes_proveedores'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivoFactura',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('archivo', models.FileField(max_length=200, upload_to='')),
+                ('tamaño', models.BigIntegerField()),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archivo de factura',
+                'verbose_name_plural': 'Archivos de facturas',
+            },
+        ),
+        migrations.CreateModel(
+            name='SubidaFactura',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('nombre', models.CharField(max_length=255)),
+                ('tamaño', models.BigIntegerField()),
+                ('recibido', models.BigIntegerField(default=0)),
+                ('sha256', models.CharField(blank=True, max_length=64)),
+                ('creada', models.DateTimeField(auto_now_add=True)),
+                ('actualizada', models.DateTimeField(auto_now=True)),
+                ('archivo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='subidas', to='accounts.archivofactura')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subidas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Subida de factura',
+                'verbose_name_plural': 'Subidas de facturas',
+                'ordering': ['-creada'],
+                'indexes': [models.Index(fields=['usuario', 'sha256'], name='accounts_su_usuario_9c3619_idx')],
+            },
+        ),
+    ]
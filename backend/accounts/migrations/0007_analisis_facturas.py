@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_subidas_facturas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalisisFactura',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('archivo', models.CharField(max_length=200, unique=True)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('hecho', 'Hecho'), ('error', 'Error')], default='pendiente', max_length=10)),
+                ('texto', models.TextField(blank=True)),
+                ('miniatura', models.CharField(blank=True, max_length=220)),
+                ('base_sugerida', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('total_sugerido', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('fecha_sugerida', models.DateField(blank=True, null=True)),
+                ('proveedor_sugerido', models.CharField(blank=True, max_length=100)),
+                ('error', models.TextField(blank=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Análisis de factura',
+                'verbose_name_plural': 'Análisis de facturas',
+                'indexes': [models.Index(fields=['estado', 'actualizado'], name='accounts_an_estado_e0b2f4_idx')],
+            },
+        ),
+    ]
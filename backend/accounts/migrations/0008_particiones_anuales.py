@@ -0,0 +1,163 @@
+# Generated by Django 5.2.4 on 2026-10-17 23:05
+#
+# Particionado por año de Ingreso y Gasto (solo PostgreSQL con PARTICIONAR_POR_AÑO)
+
+import re
+
+from django.conf import settings
+from django.db import migrations
+
+
+MODELOS = ['Ingreso', 'Gasto']
+CAMPO = 'año'
+
+
+# El SQL de la conversión va aquí y no en accounts.particiones (las
+# migraciones no importan código de la app); crear_particion es la misma
+# operación que particiones._crear sin comprobar si ya existe.
+
+def esta_particionada(cursor, tabla):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [tabla]
+    )
+    return cursor.fetchone() is not None
+
+
+def restricciones(cursor, tabla, tipos):
+    """[(nombre, definición)] de las restricciones de `tabla` de esos tipos"""
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype::text = ANY(%s) ORDER BY conname",
+        [tabla, list(tipos)]
+    )
+    return cursor.fetchall()
+
+
+def indices(cursor, tabla):
+    """Definiciones de los índices de `tabla` que no son de restricciones"""
+    cursor.execute(
+        "SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i "
+        "WHERE i.indrelid = to_regclass(%s) AND NOT EXISTS ("
+        "  SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid"
+        ") ORDER BY 1",
+        [tabla]
+    )
+    return [fila[0] for fila in cursor.fetchall()]
+
+
+def sobre(definicion, origen, destino):
+    """CREATE INDEX ... ON [ONLY] [esquema.]origen ... -> ... ON [esquema.]destino ..."""
+    return re.sub(
+        rf' ON (?:ONLY )?((?:\w+\.)?){re.escape(origen)} ', rf' ON \g<1>{destino} ', definicion, count=1
+    )
+
+
+def crear_particion(cursor, q, tabla, año):
+    """Partición de `año`, con las filas de ese año que hubiera en la DEFAULT"""
+    particion = f'{tabla}_{año}'
+    cursor.execute(f'CREATE TABLE {q(particion)} (LIKE {q(tabla)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(
+        f'WITH movidas AS (DELETE FROM {q(f"{tabla}_otros")} WHERE {q(CAMPO)} = %s RETURNING *) '
+        f'INSERT INTO {q(particion)} SELECT * FROM movidas',
+        [año]
+    )
+    cursor.execute(f'ALTER TABLE {q(tabla)} ATTACH PARTITION {q(particion)} FOR VALUES IN ({int(año)})')
+
+
+def convertir(conexion, tabla):
+    """
+    Convierte `tabla` en una tabla particionada por año con las mismas
+    columnas, índices y claves ajenas. La clave primaria pasa a ser
+    (id, año); el id sigue saliendo de una única secuencia.
+    """
+    antigua = f'{tabla}_sin_particionar'
+    secuencia = f'{tabla}_id_seq'
+    q = conexion.ops.quote_name
+
+    with conexion.cursor() as cursor:
+        if esta_particionada(cursor, tabla):
+            return
+        cursor.execute(f'ALTER TABLE {q(tabla)} RENAME TO {q(antigua)}')
+        definiciones = indices(cursor, antigua)
+        claves_ajenas = restricciones(cursor, antigua, ['f'])
+        cursor.execute(
+            f'CREATE TABLE {q(tabla)} (LIKE {q(antigua)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY LIST ({q(CAMPO)})'
+        )
+        cursor.execute(f'CREATE TABLE {q(f"{tabla}_otros")} PARTITION OF {q(tabla)} DEFAULT')
+        cursor.execute(f'SELECT DISTINCT {q(CAMPO)} FROM {q(antigua)}')
+        for (año,) in cursor.fetchall():
+            crear_particion(cursor, q, tabla, año)
+        cursor.execute(f'INSERT INTO {q(tabla)} SELECT * FROM {q(antigua)}')
+        # Con la antigua fuera quedan libres los nombres de índices y secuencia
+        cursor.execute(f'DROP TABLE {q(antigua)}')
+
+        cursor.execute(f'CREATE SEQUENCE {q(secuencia)} OWNED BY {q(tabla)}.{q("id")}')
+        cursor.execute(
+            f"SELECT setval('{secuencia}', COALESCE((SELECT MAX({q('id')}) FROM {q(tabla)}), 0) + 1, false)"
+        )
+        cursor.execute(
+            f"ALTER TABLE {q(tabla)} ALTER COLUMN {q('id')} SET DEFAULT nextval('{secuencia}'::regclass)"
+        )
+        cursor.execute(f'ALTER TABLE {q(tabla)} ADD PRIMARY KEY ({q("id")}, {q(CAMPO)})')
+        for definicion in definiciones:
+            cursor.execute(sobre(definicion, antigua, tabla))
+        for nombre, definicion in claves_ajenas:
+            cursor.execute(f'ALTER TABLE {q(tabla)} ADD CONSTRAINT {q(nombre)} {definicion}')
+
+
+def revertir(conexion, tabla):
+    """Vuelve a una tabla normal"""
+    antigua = f'{tabla}_particionada'
+    q = conexion.ops.quote_name
+
+    with conexion.cursor() as cursor:
+        if not esta_particionada(cursor, tabla):
+            return
+        cursor.execute(f'ALTER TABLE {q(tabla)} RENAME TO {q(antigua)}')
+        definiciones = indices(cursor, antigua)
+        claves_ajenas = restricciones(cursor, antigua, ['f'])
+        cursor.execute(
+            f'CREATE TABLE {q(tabla)} (LIKE {q(antigua)} INCLUDING CONSTRAINTS)'
+        )
+        cursor.execute(f'INSERT INTO {q(tabla)} SELECT * FROM {q(antigua)}')
+        cursor.execute(f'DROP TABLE {q(antigua)} CASCADE')
+        cursor.execute(
+            f'ALTER TABLE {q(tabla)} ALTER COLUMN {q("id")} ADD GENERATED BY DEFAULT AS IDENTITY'
+        )
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{tabla}', 'id'), "
+            f"COALESCE((SELECT MAX({q('id')}) FROM {q(tabla)}), 0) + 1, false)"
+        )
+        cursor.execute(f'ALTER TABLE {q(tabla)} ADD PRIMARY KEY ({q("id")})')
+        for definicion in definiciones:
+            cursor.execute(sobre(definicion, antigua, tabla))
+        for nombre, definicion in claves_ajenas:
+            cursor.execute(f'ALTER TABLE {q(tabla)} ADD CONSTRAINT {q(nombre)} {definicion}')
+
+
+def particionar(apps, schema_editor):
+    conexion = schema_editor.connection
+    if conexion.vendor != 'postgresql' or not getattr(settings, 'PARTICIONAR_POR_AÑO', False):
+        return
+    for nombre in MODELOS:
+        convertir(conexion, apps.get_model('accounts', nombre)._meta.db_table)
+
+
+def desparticionar(apps, schema_editor):
+    conexion = schema_editor.connection
+    if conexion.vendor != 'postgresql':
+        return
+    for nombre in MODELOS:
+        revertir(conexion, apps.get_model('accounts', nombre)._meta.db_table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_analisis_facturas'),
+    ]
+
+    operations = [
+        migrations.RunPython(particionar, desparticionar),
+    ]
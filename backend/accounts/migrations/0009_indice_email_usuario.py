@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-17 23:40
+#
+# Índice sobre auth_user.email para el login por email (accounts.autenticacion).
+# La tabla es de django.contrib.auth, así que va con SQL.
+
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_particiones_anuales'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS accounts_auth_user_email_idx ON auth_user (email)',
+            reverse_sql='DROP INDEX IF EXISTS accounts_auth_user_email_idx',
+        ),
+    ]
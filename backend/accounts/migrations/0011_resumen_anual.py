@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_tokens_revocados'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenAnual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('año', models.IntegerField()),
+                ('regimen_iva', models.CharField(max_length=20)),
+                ('ingresos_totales', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('gastos_totales', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('rendimiento_neto', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('irpf_retenido', models.DecimalField(decimal_places=4, default=0, max_digits=16)),
+                ('pagos_130', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('base_imponible', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('iva_devengado', models.DecimalField(decimal_places=4, default=0, max_digits=16)),
+                ('base_deducible', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('iva_deducible', models.DecimalField(decimal_places=4, default=0, max_digits=16)),
+                ('resultado_iva', models.DecimalField(decimal_places=4, default=0, max_digits=16)),
+                ('iva_a_devolver', models.DecimalField(decimal_places=4, default=0, max_digits=16)),
+                ('volumen_operaciones', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('num_ingresos', models.IntegerField(default=0)),
+                ('num_gastos', models.IntegerField(default=0)),
+                ('calculado', models.DateTimeField(auto_now=True)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_anuales', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Resumen Anual',
+                'verbose_name_plural': 'Resúmenes Anuales',
+                'ordering': ['-año'],
+                'unique_together': {('usuario', 'año')},
+            },
+        ),
+    ]
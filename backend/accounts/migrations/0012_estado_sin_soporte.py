@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 23:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_resumen_anual'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='analisisfactura',
+            name='estado',
+            field=models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('hecho', 'Hecho'), ('sin_soporte', 'Sin soporte'), ('error', 'Error')], default='pendiente', max_length=12),
+        ),
+    ]
@@ -0,0 +1,195 @@
+# backend/accounts/modelos_fiscales.py
+
+from decimal import Decimal, ROUND_HALF_UP
+from itertools import accumulate
+
+
+# Casillas de los modelos 130 (pago fraccionado del IRPF en estimación
+# directa) y 303 (autoliquidación del IVA) de los cuatro trimestres de un
+# año. El 130 es acumulado desde enero: con las sumas prefijas de los
+# totales trimestrales salen los cuatro en una pasada, arrastrando los
+# pagos y resultados negativos de los trimestres anteriores. No consulta
+# la BD: los totales los lee accounts.resumen.
+
+CERO = Decimal('0')
+CIEN = Decimal('100')
+CENTIMO = Decimal('0.01')
+
+# Pago fraccionado: 20% del rendimiento neto acumulado
+PORCENTAJE_130 = Decimal('20')
+# No hay que presentar el 130 si al menos el 70% de los ingresos llevan retención
+UMBRAL_RETENCION_130 = Decimal('0.70')
+
+# Casillas (base, tipo, cuota) del IVA devengado en el régimen general
+CASILLAS_DEVENGADO = {
+    4: ('01', '02', '03'),
+    10: ('04', '05', '06'),
+    21: ('07', '08', '09'),
+}
+
+MOTIVOS_SIN_303 = {
+    'recargo': 'En recargo de equivalencia no se presenta el 303: el IVA lo ingresa el proveedor',
+    'simplificado': 'En el régimen simplificado la cuota sale de los módulos, no de las facturas',
+}
+MOTIVO_SIN_130 = 'El régimen simplificado va con estimación objetiva: se presenta el 131'
+
+
+def aplica_130(regimen_iva):
+    """El 130 es de la estimación directa; el simplificado presenta el 131"""
+    return regimen_iva != 'simplificado'
+
+
+def _redondear(valor):
+    return valor.quantize(CENTIMO, rounding=ROUND_HALF_UP)
+
+
+def modelo_130(trimestres):
+    """
+    Casillas del Modelo 130 de cada trimestre a partir de los totales
+    trimestrales del año (ingresos_totales, gastos_totales, irpf_retenido),
+    en orden desde el primero. No hace falta pasar los cuatro.
+    """
+    ingresos = accumulate(t['ingresos_totales'] for t in trimestres)
+    gastos = accumulate(t['gastos_totales'] for t in trimestres)
+    retenciones = accumulate(t['irpf_retenido'] for t in trimestres)
+
+    modelos = []
+    pagos_anteriores = CERO  # [07] positivos de los trimestres anteriores
+    negativos = CERO         # [19] negativos anteriores aún sin deducir
+    for ingresos_acumulados, gastos_acumulados, retenciones_acumuladas in zip(
+        ingresos, gastos, retenciones
+    ):
+        c03 = ingresos_acumulados - gastos_acumulados
+        c04 = _redondear(max(c03, CERO) * PORCENTAJE_130 / CIEN)
+        c06 = _redondear(retenciones_acumuladas)
+        c07 = c04 - pagos_anteriores - c06
+        # Sin actividades agrícolas ([08]-[11]), minoración por rendimientos
+        # bajos ([13]) ni deducción por vivienda ([16])
+        c12 = c14 = c07
+        c15 = min(negativos, max(c14, CERO))
+        c17 = c19 = c14 - c15
+
+        modelos.append({
+            'casillas': {
+                '01': ingresos_acumulados,
+                '02': gastos_acumulados,
+                '03': c03,
+                '04': c04,
+                '05': pagos_anteriores,
+                '06': c06,
+                '07': c07,
+                '12': c12,
+                '13': CERO,
+                '14': c14,
+                '15': c15,
+                '16': CERO,
+                '17': c17,
+                '19': c19,
+            },
+            'resultado': 'a_ingresar' if c19 > 0 else 'negativa',
+            'importe': max(c19, CERO),
+        })
+        pagos_anteriores += max(c07, CERO)
+        negativos += max(-c19, CERO) - c15
+    return modelos
+
+
+def modelo_303(trimestres, regimen_iva='general'):
+    """
+    Casillas del Modelo 303 de cada trimestre en el régimen general. Cada
+    trimestre trae 'devengado' y 'deducible': {tipo de IVA: (base, cuota)}.
+    Los resultados negativos se compensan en los trimestres siguientes y en
+    el cuarto se pide la devolución de lo pendiente.
+    """
+    if regimen_iva in MOTIVOS_SIN_303:
+        return [
+            {'aplica': False, 'motivo': MOTIVOS_SIN_303[regimen_iva]}
+            for _ in trimestres
+        ]
+
+    modelos = []
+    pendiente = CERO  # Cuotas a compensar de trimestres anteriores
+    for numero, trimestre in enumerate(trimestres, 1):
+        casillas = {}
+        c27 = CERO
+        for tipo, (base, cuota) in sorted(trimestre['devengado'].items()):
+            if tipo not in CASILLAS_DEVENGADO:
+                continue  # Operaciones sin IVA: no suman cuota
+            casilla_base, casilla_tipo, casilla_cuota = CASILLAS_DEVENGADO[tipo]
+            casillas[casilla_base] = base
+            casillas[casilla_tipo] = Decimal(tipo)
+            casillas[casilla_cuota] = cuota = _redondear(cuota)
+            c27 += cuota
+
+        c28 = sum((base for tipo, (base, _) in trimestre['deducible'].items() if tipo), CERO)
+        c29 = _redondear(sum((cuota for _, cuota in trimestre['deducible'].values()), CERO))
+        c45 = c29
+        c46 = c64 = c66 = c27 - c45  # Todo atribuible a la Administración del Estado
+        # En el cuarto trimestre se aplica todo lo pendiente para pedir la devolución
+        if numero == 4:
+            c78 = pendiente
+        else:
+            c78 = min(pendiente, max(c66, CERO))
+        c69 = c71 = c66 - c78
+
+        if c71 > 0:
+            resultado = 'a_ingresar'
+        elif c71 == 0:
+            resultado = 'cero'
+        elif numero == 4:
+            resultado = 'a_devolver'
+        else:
+            resultado = 'a_compensar'
+
+        casillas.update({
+            '27': c27, '28': c28, '29': c29, '45': c45, '46': c46,
+            '64': c64, '65': CIEN, '66': c66, '110': pendiente, '78': c78,
+            '87': pendiente - c78, '69': c69, '71': c71,
+        })
+        modelos.append({
+            'aplica': True,
+            'casillas': casillas,
+            'resultado': resultado,
+            'importe': abs(c71),
+        })
+        pendiente -= c78
+        if resultado == 'a_compensar':
+            pendiente -= c71
+    return modelos
+
+
+def obligado_130(trimestres, anteriores, tipo_irpf_default):
+    """
+    ¿Hay que presentar el 130? No si el 70% o más de los ingresos del año
+    anterior llevó retención; al empezar la actividad se miran los de este
+    año y, sin ingresos todavía, el tipo de retención con el que factura.
+    """
+    for totales in (anteriores, trimestres):
+        ingresos = sum((t['ingresos_totales'] for t in totales), CERO)
+        if ingresos > 0:
+            con_retencion = sum((t['ingresos_con_retencion'] for t in totales), CERO)
+            return con_retencion < ingresos * UMBRAL_RETENCION_130
+    return not tipo_irpf_default
+
+
+def modelos_trimestrales(trimestres, anteriores, regimen_iva, tipo_irpf_default):
+    """
+    Modelos 130 y 303 de cada trimestre del año. `trimestres` y
+    `anteriores` son los totales trimestrales de este año y del anterior
+    (los de accounts.resumen.modelos_año).
+    """
+    if not aplica_130(regimen_iva):
+        modelos_130 = [{'aplica': False, 'motivo': MOTIVO_SIN_130} for _ in trimestres]
+    else:
+        modelos_130 = [dict(modelo, aplica=True) for modelo in modelo_130(trimestres)]
+        for numero, modelo in enumerate(modelos_130, 1):
+            modelo['obligado'] = obligado_130(
+                trimestres[:numero], anteriores, tipo_irpf_default
+            )
+
+    return [
+        {'trimestre': numero, 'modelo_130': m130, 'modelo_303': m303}
+        for numero, (m130, m303) in enumerate(
+            zip(modelos_130, modelo_303(trimestres, regimen_iva)), 1
+        )
+    ]
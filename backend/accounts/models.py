@@ -4,6 +4,46 @@ from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.models import User
 from decimal import Decimal
+import uuid
+
+class Tercero(models.Model):
+    """Base para clientes y proveedores normalizados por usuario"""
+    nombre = models.CharField(max_length=100)
+    # Minúsculas, sin tildes ni espacios repetidos: clave para agrupar y autocompletar
+    nombre_normalizado = models.CharField(max_length=100)
+    
+    # Contadores mantenidos al crear, modificar o borrar ingresos/gastos
+    num_facturas = models.IntegerField(default=0)
+    total_facturado = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        abstract = True
+        ordering = ['nombre_normalizado']
+    
+    def __str__(self):
+        return self.nombre
+
+
+class Cliente(Tercero):
+    """Cliente de un autónomo (dimensión normalizada de Ingreso.cliente)"""
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='clientes')
+    
+    class Meta(Tercero.Meta):
+        verbose_name = 'Cliente'
+        verbose_name_plural = 'Clientes'
+        # También sirve como índice para el autocompletado por prefijo
+        unique_together = ['usuario', 'nombre_normalizado']
+
+
+class Proveedor(Tercero):
+    """Proveedor de un autónomo (dimensión normalizada de Gasto.proveedor)"""
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='proveedores')
+    
+    class Meta(Tercero.Meta):
+        verbose_name = 'Proveedor'
+        verbose_name_plural = 'Proveedores'
+        unique_together = ['usuario', 'nombre_normalizado']
+
 
 class Ingreso(models.Model):
     """Modelo para registrar ingresos trimestrales"""
@@ -11,6 +51,10 @@ class Ingreso(models.Model):
     fecha = models.DateField()
     descripcion = models.CharField(max_length=200)
     cliente = models.CharField(max_length=100)
+    cliente_ref = models.ForeignKey(
+        Cliente, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='ingresos', editable=False
+    )
     importe = models.DecimalField(
         max_digits=10, 
         decimal_places=2,
@@ -56,7 +100,8 @@ class Ingreso(models.Model):
         verbose_name_plural = 'Ingresos'
         # Índice para mejorar queries por usuario
         indexes = [
-            models.Index(fields=['usuario', '-fecha']),
+            # Incluye id para la paginación por cursor (fecha, id)
+            models.Index(fields=['usuario', '-fecha', '-id']),
             models.Index(fields=['usuario', 'trimestre', 'año']),
         ]
     
@@ -70,6 +115,10 @@ class Gasto(models.Model):
     fecha = models.DateField()
     descripcion = models.CharField(max_length=200)
     proveedor = models.CharField(max_length=100)
+    proveedor_ref = models.ForeignKey(
+        Proveedor, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='gastos', editable=False
+    )
     importe = models.DecimalField(
         max_digits=10, 
         decimal_places=2,
@@ -112,7 +161,8 @@ class Gasto(models.Model):
         verbose_name_plural = 'Gastos'
         # Índice para mejorar queries por usuario
         indexes = [
-            models.Index(fields=['usuario', '-fecha']),
+            # Incluye id para la paginación por cursor (fecha, id)
+            models.Index(fields=['usuario', '-fecha', '-id']),
             models.Index(fields=['usuario', 'trimestre', 'año']),
         ]
     
@@ -120,6 +170,99 @@ class Gasto(models.Model):
         return f"{self.fecha} - {self.proveedor} - {self.importe}€"
 
 
+class ArchivoFactura(models.Model):
+    """
+    Contenido de una factura guardado una sola vez, con el SHA-256 como
+    nombre (facturas/sha256/ab/abcd....pdf). Lo comparten todas las
+    subidas y gastos con el mismo contenido.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    archivo = models.FileField(max_length=200)
+    tamaño = models.BigIntegerField()
+    creado = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Archivo de factura'
+        verbose_name_plural = 'Archivos de facturas'
+    
+    def __str__(self):
+        return self.archivo.name
+
+
+class SubidaFactura(models.Model):
+    """
+    Subida de una factura por trozos (accounts/subidas.py). Mientras está a
+    medias los bytes van a SUBIDAS_DIR; `recibido` dice por dónde seguir.
+    Al completarse apunta al ArchivoFactura con su contenido.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='subidas')
+    nombre = models.CharField(max_length=255)
+    tamaño = models.BigIntegerField()
+    recibido = models.BigIntegerField(default=0)
+    # SHA-256 declarado por el cliente (opcional); se comprueba al completar
+    sha256 = models.CharField(max_length=64, blank=True)
+    archivo = models.ForeignKey(
+        ArchivoFactura, on_delete=models.PROTECT, null=True, blank=True,
+        related_name='subidas'
+    )
+    creada = models.DateTimeField(auto_now_add=True)
+    actualizada = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-creada']
+        verbose_name = 'Subida de factura'
+        verbose_name_plural = 'Subidas de facturas'
+        indexes = [
+            models.Index(fields=['usuario', 'sha256']),
+        ]
+    
+    @property
+    def completa(self):
+        return self.archivo_id is not None
+    
+    def __str__(self):
+        return f"{self.nombre} ({self.recibido}/{self.tamaño})"
+
+
+class AnalisisFactura(models.Model):
+    """
+    Texto, miniatura y datos sugeridos de un archivo de factura, calculados
+    fuera de la petición (accounts/procesado.py). Uno por archivo: las
+    facturas con el mismo contenido se analizan una vez.
+    """
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('hecho', 'Hecho'),
+        # Faltan las librerías para sacar el texto (pypdf, PyMuPDF, pytesseract)
+        ('sin_soporte', 'Sin soporte'),
+        ('error', 'Error'),
+    ]
+    
+    # Nombre en el storage, el mismo que Gasto.factura
+    archivo = models.CharField(max_length=200, unique=True)
+    estado = models.CharField(max_length=12, choices=ESTADOS, default='pendiente')
+    texto = models.TextField(blank=True)
+    miniatura = models.CharField(max_length=220, blank=True)
+    base_sugerida = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    total_sugerido = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    fecha_sugerida = models.DateField(null=True, blank=True)
+    proveedor_sugerido = models.CharField(max_length=100, blank=True)
+    error = models.TextField(blank=True)
+    actualizado = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Análisis de factura'
+        verbose_name_plural = 'Análisis de facturas'
+        indexes = [
+            models.Index(fields=['estado', 'actualizado']),
+        ]
+    
+    def __str__(self):
+        return f"{self.archivo} ({self.estado})"
+
+
 # Modelo de perfil de usuario (opcional pero útil)
 class PerfilAutonomo(models.Model):
     """Perfil extendido para autónomos"""
@@ -155,10 +298,14 @@ class PerfilAutonomo(models.Model):
         return f"{self.nombre_fiscal} ({self.nif})"
 
 
-# No necesitamos cambiar ResumenTrimestral porque se calcula dinámicamente
-
 class ResumenTrimestral(models.Model):
-    """Modelo calculado para el resumen trimestral"""
+    """
+    Resumen trimestral materializado por usuario.
+    Se mantiene con deltas al crear, modificar o borrar ingresos y gastos
+    (ver accounts/signals.py). Se puede reconstruir con
+    `python manage.py reconstruir_resumenes`.
+    """
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='resumenes')
     trimestre = models.IntegerField(
         choices=[
             (1, 'Q1 - Primer Trimestre'),
@@ -169,20 +316,80 @@ class ResumenTrimestral(models.Model):
     )
     año = models.IntegerField(default=2025)
     
-    # Estos campos se calculan automáticamente
-    ingresos_totales = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    gastos_totales = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    beneficio_neto = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    iva_repercutido = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    iva_soportado = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    iva_a_pagar = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    irpf_retenido = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # Estos campos se mantienen automáticamente
+    # IVA e IRPF con 4 decimales: importe (2) * porcentaje / 100 (2) es exacto
+    ingresos_totales = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    gastos_totales = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    beneficio_neto = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    iva_repercutido = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    iva_soportado = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    iva_a_pagar = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    irpf_retenido = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    num_ingresos = models.IntegerField(default=0)
+    num_gastos = models.IntegerField(default=0)
     
     class Meta:
-        unique_together = ['trimestre', 'año']
+        unique_together = ['usuario', 'trimestre', 'año']
         ordering = ['-año', '-trimestre']
         verbose_name = 'Resumen Trimestral'
         verbose_name_plural = 'Resúmenes Trimestrales'
     
     def __str__(self):
-        return f"Q{self.trimestre} {self.año}"
\ No newline at end of file
+        return f"Q{self.trimestre} {self.año}"
+
+
+class ResumenAnual(models.Model):
+    """
+    Cifras anuales por usuario para el Modelo 390 y la cuenta de resultados,
+    calculadas al cierre del ejercicio por `python manage.py resumenes_anuales`.
+    Es una foto: no se actualiza al cambiar ingresos o gastos.
+    """
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='resumenes_anuales')
+    año = models.IntegerField()
+    regimen_iva = models.CharField(max_length=20)
+    
+    # Cuenta de resultados (IRPF)
+    ingresos_totales = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    gastos_totales = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    rendimiento_neto = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    irpf_retenido = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    pagos_130 = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    # IVA del año (Modelo 390)
+    base_imponible = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    iva_devengado = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    base_deducible = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    iva_deducible = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    resultado_iva = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    iva_a_devolver = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    volumen_operaciones = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    num_ingresos = models.IntegerField(default=0)
+    num_gastos = models.IntegerField(default=0)
+    calculado = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['usuario', 'año']
+        ordering = ['-año']
+        verbose_name = 'Resumen Anual'
+        verbose_name_plural = 'Resúmenes Anuales'
+    
+    def __str__(self):
+        return f"{self.año}"
+
+
+class TokenRevocado(models.Model):
+    """
+    Refresh token ya rotado o revocado (accounts/autenticacion.py). Solo se
+    guarda su jti hasta que caduca: la tabla no crece con los tokens emitidos,
+    solo con los usados en su vida útil, y se purga por `caduca`.
+    """
+    jti = models.UUIDField(primary_key=True)
+    caduca = models.DateTimeField(db_index=True)
+    
+    class Meta:
+        verbose_name = 'Token revocado'
+        verbose_name_plural = 'Tokens revocados'
+    
+    def __str__(self):
+        return str(self.jti)
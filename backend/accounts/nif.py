@@ -0,0 +1,253 @@
+# backend/accounts/nif.py
+
+import hashlib
+import math
+import random
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import PerfilAutonomo
+
+
+# Validación de NIF (DNI, NIE, NIF K/L/M y CIF de sociedades) con su dígito
+# o letra de control, sin tocar la BD. Delante del índice único de
+# PerfilAutonomo.nif hay además un filtro de Bloom por proceso: si dice que
+# un NIF no está, no está (los registrados en otros procesos llegan por la
+# caché de Django); si dice que puede estar, se pregunta a la BD.
+
+LETRAS_DNI = 'TRWAGMYFPDXBNJZSQVHLCKE'
+LETRAS_CIF = 'JABCDEFGHI'
+PREFIJOS_NIE = {'X': '0', 'Y': '1', 'Z': '2'}
+
+DNI = re.compile(r'^(\d{8})([A-Z])$')
+NIE = re.compile(r'^([XYZ])(\d{7})([A-Z])$')
+NIF_ESPECIAL = re.compile(r'^([KLM])(\d{7})([A-Z])$')
+CIF = re.compile(r'^([ABCDEFGHJNPQRSUVW])(\d{7})([0-9A-J])$')
+# Sociedades cuyo control es siempre letra o siempre dígito
+CIF_CON_LETRA = set('NPQRSW')
+CIF_CON_DIGITO = set('ABEH')
+
+CLAVE_GENERACION = 'nif_filtro:generacion'
+# Con más NIF nuevos desde la última consulta sale más a cuenta rehacerlo
+MAX_PENDIENTES = 1000
+
+
+class NIFInvalido(ValueError):
+    """El NIF no tiene un formato válido o no cuadra su control"""
+
+
+def normalizar(valor):
+    """' 12.345.678-z ' -> '12345678Z'"""
+    return re.sub(r'[\s.\-]', '', str(valor or '')).upper()
+
+
+def control_cif(digitos):
+    """Dígito de control de los 7 dígitos de un CIF"""
+    total = 0
+    for posicion, digito in enumerate(digitos):
+        valor = int(digito)
+        if posicion % 2 == 0:  # Posiciones impares (1, 3, 5, 7): se doblan
+            valor = sum(divmod(valor * 2, 10))
+        total += valor
+    return (10 - total % 10) % 10
+
+
+def validar_nif(valor):
+    """
+    NIF normalizado si es un DNI, NIE, NIF K/L/M o CIF válido; si no,
+    NIFInvalido con el motivo.
+    """
+    nif = normalizar(valor)
+    if not nif:
+        raise NIFInvalido('El NIF es requerido')
+
+    coincide = DNI.match(nif)
+    if coincide:
+        numero, letra = coincide.groups()
+        if LETRAS_DNI[int(numero) % 23] != letra:
+            raise NIFInvalido('La letra del DNI no es correcta')
+        return nif
+
+    coincide = NIE.match(nif) or NIF_ESPECIAL.match(nif)
+    if coincide:
+        inicial, numero, letra = coincide.groups()
+        # El NIE cambia X/Y/Z por 0/1/2; los K/L/M usan solo los 7 dígitos
+        if LETRAS_DNI[int(PREFIJOS_NIE.get(inicial, '') + numero) % 23] != letra:
+            raise NIFInvalido('La letra del NIE no es correcta')
+        return nif
+
+    coincide = CIF.match(nif)
+    if coincide:
+        inicial, digitos, control = coincide.groups()
+        digito = control_cif(digitos)
+        validos = set()
+        if inicial not in CIF_CON_DIGITO:
+            validos.add(LETRAS_CIF[digito])
+        if inicial not in CIF_CON_LETRA:
+            validos.add(str(digito))
+        if control not in validos:
+            raise NIFInvalido('El dígito de control del CIF no es correcto')
+        return nif
+
+    raise NIFInvalido('Formato de NIF no válido')
+
+
+def _ttl():
+    return getattr(settings, 'NIF_FILTRO_TTL', 10 * 60)
+
+
+def _clave_nif(generacion):
+    return f'{CLAVE_GENERACION}:{generacion}'
+
+
+def _generacion_inicial():
+    # Al crear (o volver a crear) la clave se empieza en un número al azar,
+    # así un filtro no confunde la generación nueva con la que ya tenía
+    return random.getrandbits(48)
+
+
+def _generacion():
+    """Generación actual de los NIF publicados (la crea si no hay)"""
+    generacion = cache.get(CLAVE_GENERACION)
+    if generacion is None:
+        cache.add(CLAVE_GENERACION, _generacion_inicial(), timeout=None)
+        generacion = cache.get(CLAVE_GENERACION)
+    return generacion
+
+
+class FiltroBloom:
+    """
+    Conjunto aproximado en `bits` bits: sin falsos negativos y con una tasa
+    de falsos positivos de `error` hasta `capacidad` elementos.
+    """
+
+    def __init__(self, capacidad, error=0.01):
+        self.capacidad = max(int(capacidad), 1000)
+        self.bits = int(-self.capacidad * math.log(error) / math.log(2) ** 2) + 1
+        self.hashes = max(1, round(self.bits / self.capacidad * math.log(2)))
+        self.elementos = 0
+        self._tabla = bytearray((self.bits + 7) // 8)
+
+    def _posiciones(self, valor):
+        # Doble hash (Kirsch-Mitzenmacher): k posiciones con un solo blake2b
+        resumen = hashlib.blake2b(valor.encode(), digest_size=16).digest()
+        a = int.from_bytes(resumen[:8], 'little')
+        b = int.from_bytes(resumen[8:], 'little') | 1
+        return [(a + i * b) % self.bits for i in range(self.hashes)]
+
+    def añadir(self, valor):
+        for posicion in self._posiciones(valor):
+            self._tabla[posicion >> 3] |= 1 << (posicion & 7)
+        self.elementos += 1
+
+    def __contains__(self, valor):
+        return all(
+            self._tabla[posicion >> 3] & (1 << (posicion & 7))
+            for posicion in self._posiciones(valor)
+        )
+
+    def __len__(self):
+        return self.elementos
+
+
+class FiltroNIF:
+    """
+    Filtro de Bloom con los NIF de PerfilAutonomo. Se construye al primer
+    uso y se rehace cada NIF_FILTRO_TTL segundos o al llenarse. Los perfiles
+    guardados en este proceso se añaden al momento y, al confirmarse, se
+    publican en la caché de Django bajo una generación compartida: antes de
+    responder, el filtro lee la generación y añade los NIF que le faltan (o
+    se rehace si ya no están en la caché).
+    """
+
+    def __init__(self):
+        self._filtro = None
+        self._creado = 0.0
+        self._generacion = None
+        self._lock = threading.Lock()
+
+    def _construir(self):
+        nifs = PerfilAutonomo.objects.values_list('nif', flat=True)
+        # Margen para crecer hasta el siguiente rehacer
+        filtro = FiltroBloom(nifs.count() * 2, getattr(settings, 'NIF_FILTRO_ERROR', 0.01))
+        for nif in nifs.iterator(chunk_size=10000):
+            filtro.añadir(normalizar(nif))
+        return filtro
+
+    def _pendientes(self, generacion):
+        """NIF publicados desde la generación del filtro; None si hay que rehacerlo"""
+        if generacion is None or self._generacion is None:
+            return None
+        if not 0 < generacion - self._generacion <= MAX_PENDIENTES:
+            return None
+        claves = [_clave_nif(numero) for numero in range(self._generacion + 1, generacion + 1)]
+        nifs = cache.get_many(claves)
+        if len(nifs) < len(claves):
+            # Expulsados o todavía sin escribir
+            return None
+        return nifs.values()
+
+    def _vigente(self):
+        # La generación se lee antes que la BD: lo que se publique mientras
+        # se construye se ve en la siguiente consulta
+        generacion = _generacion()
+        with self._lock:
+            filtro = self._filtro
+            if (
+                filtro is None or time.monotonic() - self._creado > _ttl()
+                or filtro.elementos > filtro.capacidad
+            ):
+                self._filtro = filtro = self._construir()
+                self._creado = time.monotonic()
+            elif generacion != self._generacion:
+                pendientes = self._pendientes(generacion)
+                if pendientes is None:
+                    self._filtro = filtro = self._construir()
+                    self._creado = time.monotonic()
+                else:
+                    for nif in pendientes:
+                        filtro.añadir(nif)
+            self._generacion = generacion
+            return filtro
+
+    def puede_existir(self, nif):
+        """False: seguro que no está registrado. True: hay que preguntar a la BD"""
+        return normalizar(nif) in self._vigente()
+
+    def añadir(self, nif):
+        with self._lock:
+            if self._filtro is not None:
+                self._filtro.añadir(normalizar(nif))
+
+    def publicar(self, nif):
+        """
+        Avisa a los demás procesos de un NIF guardado: sube la generación y
+        deja el NIF bajo la nueva. Llamar con la transacción ya confirmada.
+        """
+        while True:
+            generacion = _generacion_inicial()
+            if cache.add(CLAVE_GENERACION, generacion, timeout=None):
+                break
+            try:
+                generacion = cache.incr(CLAVE_GENERACION)
+                break
+            except ValueError:
+                # Expulsada entre add() e incr()
+                continue
+        cache.set(_clave_nif(generacion), normalizar(nif), timeout=_ttl())
+
+    def invalidar(self):
+        with self._lock:
+            self._filtro = None
+
+
+filtro_nifs = FiltroNIF()
+
+
+def nif_registrado(nif):
+    """¿Hay un perfil con este NIF? Solo consulta la BD si el filtro no lo descarta"""
+    return filtro_nifs.puede_existir(nif) and PerfilAutonomo.objects.filter(nif=nif).exists()
@@ -0,0 +1,165 @@
+# backend/accounts/pagination.py
+
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date
+
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class FechaIdCursorPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre (fecha, id) descendente.
+    Cada página busca directamente en el índice (usuario, -fecha, -id):
+    sin COUNT(*) ni OFFSET, así una página profunda cuesta lo mismo que la primera.
+    Solo avanza hacia delante (devuelve `next`).
+    """
+    page_size = 100
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering = ('-fecha', '-id')
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def codificar_cursor(self, fila):
+        # La fila puede ser un modelo o un dict de .values() (lectura rápida)
+        if isinstance(fila, dict):
+            fecha, pk = fila['fecha'], fila['id']
+        else:
+            fecha, pk = fila.fecha, fila.pk
+        posicion = f'{fecha.isoformat()}|{pk}'
+        return urlsafe_b64encode(posicion.encode()).decode().rstrip('=')
+
+    def decodificar_cursor(self, cursor):
+        try:
+            relleno = '=' * (-len(cursor) % 4)
+            fecha, pk = urlsafe_b64decode(cursor + relleno).decode().split('|')
+            return date.fromisoformat(fecha), int(pk)
+        except (ValueError, UnicodeDecodeError):
+            raise NotFound('Cursor inválido')
+
+    def _pagina(self, queryset, request):
+        self.request = request
+        self.tamaño = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            fecha, pk = self.decodificar_cursor(cursor)
+            queryset = queryset.filter(Q(fecha__lt=fecha) | Q(fecha=fecha, id__lt=pk))
+
+        # Se pide una fila de más para saber si hay página siguiente
+        return queryset[:self.tamaño + 1]
+
+    def _recortar(self, filas):
+        self.siguiente = None
+        if len(filas) > self.tamaño:
+            filas = filas[:self.tamaño]
+            self.siguiente = self.codificar_cursor(filas[-1])
+        return filas
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self._recortar(list(self._pagina(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self._recortar([fila async for fila in self._pagina(queryset, request)])
+
+    def get_next_link(self):
+        if self.siguiente is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.siguiente)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class PaginacionNumerada(PageNumberPagination):
+    """PageNumberPagination que además se puede usar desde vistas asíncronas"""
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Como paginate_queryset con el ORM asíncrono: un COUNT(*) y la página,
+        que se descarta si el número no es válido.
+        """
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Antes de get_page_number: con ?page=last pide num_pages, que sin
+        # el total haría un COUNT(*) síncrono
+        paginator.count = await queryset.acount()
+        numero = self.get_page_number(request, paginator)
+
+        try:
+            inicio = max(int(numero) - 1, 0) * page_size
+        except ValueError:
+            inicio = 0
+
+        filas = [fila async for fila in queryset[inicio:inicio + page_size]]
+        try:
+            self.page = paginator.page(numero)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=numero, message=str(exc))
+            raise NotFound(msg)
+
+        self.page.object_list = filas
+        self.request = request
+        return filas
+
+
+class IngresoGastoPagination(BasePagination):
+    """
+    Paginación de los listados de ingresos y gastos.
+    Por defecto PageNumberPagination (compatible con el frontend);
+    con ?paginacion=cursor o ?cursor=... usa FechaIdCursorPagination.
+    """
+
+    def usa_cursor(self, request):
+        return (
+            request.query_params.get('paginacion') == 'cursor'
+            or FechaIdCursorPagination.cursor_query_param in request.query_params
+        )
+
+    def elegir_paginador(self, request):
+        if self.usa_cursor(request):
+            self.paginador = FechaIdCursorPagination()
+        else:
+            self.paginador = PaginacionNumerada()
+        return self.paginador
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.elegir_paginador(request).paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return await self.elegir_paginador(request).apaginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginador.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return PageNumberPagination().get_paginated_response_schema(schema)
@@ -0,0 +1,27 @@
+# backend/accounts/parsers.py
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class TrozoParser(BaseParser):
+    """
+    Cuerpo binario de un trozo de subida (ver accounts/subidas.py). Devuelve
+    los bytes tal cual; como mucho SUBIDA_TROZO_MAX_BYTES por petición.
+    """
+    media_type = 'application/octet-stream'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if stream is None:
+            return b''
+        limite = settings.SUBIDA_TROZO_MAX_BYTES
+        datos = stream.read(limite + 1)
+        if len(datos) > limite:
+            raise ParseError(f'Cada trozo puede tener como mucho {limite} bytes')
+        return datos
+
+
+class TrozoTusParser(TrozoParser):
+    """El mismo cuerpo con el tipo que usan los clientes de tus"""
+    media_type = 'application/offset+octet-stream'
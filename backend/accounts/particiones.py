@@ -0,0 +1,127 @@
+# backend/accounts/particiones.py
+
+from datetime import date
+
+from django.conf import settings
+from django.db import connection as conexion_por_defecto, transaction
+
+from .models import Ingreso, Gasto
+
+
+# Particionado por año de Ingreso y Gasto en PostgreSQL (PARTITION BY LIST
+# ("año")): las consultas de un año (todas las de la API filtran por usuario
+# y año) solo leen su partición, y un ejercicio cerrado se puede vaciar,
+# hacer VACUUM o desacoplar sin tocar el resto. Cada tabla tiene además una
+# partición DEFAULT para que una inserción de un año sin partición no falle;
+# `asegurar_particiones` (tras cada migrate y con `manage.py particiones`)
+# saca esas filas a la partición de su año. La conversión de las tablas (y
+# la vuelta atrás) está en la migración 0008. En SQLite no hace nada.
+
+PARTICIONADOS = [Ingreso, Gasto]
+CAMPO = 'año'
+
+
+def tablas():
+    return [modelo._meta.db_table for modelo in PARTICIONADOS]
+
+
+def activo(conexion=None):
+    conexion = conexion or conexion_por_defecto
+    return conexion.vendor == 'postgresql' and getattr(settings, 'PARTICIONAR_POR_AÑO', False)
+
+
+def _q(conexion, nombre):
+    return conexion.ops.quote_name(nombre)
+
+
+def nombre_particion(tabla, año):
+    return f'{tabla}_{año}'
+
+
+def nombre_defecto(tabla):
+    return f'{tabla}_otros'
+
+
+def esta_particionada(cursor, tabla):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [tabla]
+    )
+    return cursor.fetchone() is not None
+
+
+def _crear(cursor, conexion, tabla, año):
+    """
+    Crea la partición de `año` si no existe. Las filas de ese año que
+    estuvieran en la DEFAULT se mueven a la nueva: PostgreSQL no deja
+    adjuntar la partición mientras la DEFAULT tenga filas suyas.
+    """
+    particion = nombre_particion(tabla, año)
+    q = lambda nombre: _q(conexion, nombre)  # noqa: E731
+
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [particion])
+    if cursor.fetchone()[0]:
+        return False
+    cursor.execute(f'CREATE TABLE {q(particion)} (LIKE {q(tabla)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(
+        f'WITH movidas AS (DELETE FROM {q(nombre_defecto(tabla))} WHERE {q(CAMPO)} = %s RETURNING *) '
+        f'INSERT INTO {q(particion)} SELECT * FROM movidas',
+        [año]
+    )
+    cursor.execute(f'ALTER TABLE {q(tabla)} ATTACH PARTITION {q(particion)} FOR VALUES IN ({int(año)})')
+    return True
+
+
+def asegurar_particiones(conexion=None, años=()):
+    """
+    Crea las particiones de `años`, del año actual y el siguiente y de los
+    años que hayan caído en la DEFAULT. Devuelve [(tabla, año)] creadas.
+    """
+    conexion = conexion or conexion_por_defecto
+    if not activo(conexion):
+        return []
+    actual = date.today().year
+    creadas = []
+    with transaction.atomic(using=conexion.alias), conexion.cursor() as cursor:
+        for tabla in tablas():
+            if not esta_particionada(cursor, tabla):
+                continue
+            cursor.execute(
+                f'SELECT DISTINCT {_q(conexion, CAMPO)} FROM {_q(conexion, nombre_defecto(tabla))}'
+            )
+            pendientes = {fila[0] for fila in cursor.fetchall()} | {actual, actual + 1} | set(años)
+            for año in sorted(pendientes):
+                if _crear(cursor, conexion, tabla, año):
+                    creadas.append((tabla, año))
+    return creadas
+
+
+def desacoplar(tabla, año, conexion=None):
+    """
+    Saca la partición de `año` de la tabla (queda como tabla suelta para
+    archivarla o borrarla con DROP TABLE). Sus filas dejan de verse en la app.
+    """
+    conexion = conexion or conexion_por_defecto
+    particion = nombre_particion(tabla, año)
+    with conexion.cursor() as cursor:
+        cursor.execute(
+            f'ALTER TABLE {_q(conexion, tabla)} '
+            f'DETACH PARTITION {_q(conexion, particion)}'
+        )
+    return particion
+
+
+def particiones(conexion=None):
+    """[(tabla, partición, límites, filas aproximadas)] de las tablas particionadas"""
+    conexion = conexion or conexion_por_defecto
+    if conexion.vendor != 'postgresql':
+        return []
+    with conexion.cursor() as cursor:
+        cursor.execute(
+            "SELECT parent.relname, child.relname, pg_get_expr(child.relpartbound, child.oid), "
+            "child.reltuples::bigint FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = ANY(%s) ORDER BY 1, 2",
+            [tablas()]
+        )
+        return cursor.fetchall()
@@ -0,0 +1,202 @@
+# backend/accounts/procesado.py
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .analisis import analizar
+from .models import AnalisisFactura, ArchivoFactura, Gasto
+
+
+# Procesado de las facturas fuera de la petición: al guardar un gasto con
+# factura o completar una subida se manda el archivo a un pool de procesos
+# local (analisis.analizar). La miniatura se guarda junto al archivo
+# (<factura>.miniatura.jpg) y el resto en AnalisisFactura, de donde lo leen
+# los listados con una subconsulta. Lo que quede a medias (reinicio del
+# servidor, FACTURAS_PROCESOS = 0) lo termina `manage.py procesar_facturas`.
+
+logger = logging.getLogger(__name__)
+
+# Un análisis 'procesando' más antiguo se da por perdido
+PROCESANDO_MAXIMO = timedelta(hours=1)
+MAX_IMPORTE = Decimal('99999999.99')
+
+_pool = None
+_lock = threading.Lock()
+
+
+def _contexto():
+    # spawn: los hijos no heredan hilos ni conexiones del servidor web
+    return multiprocessing.get_context('spawn')
+
+
+def _obtener_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.FACTURAS_PROCESOS, mp_context=_contexto()
+            )
+        return _pool
+
+
+def _descartar_pool(roto):
+    """Un hijo murió (OOM, PDF que revienta la librería): el siguiente usa otro pool"""
+    global _pool
+    with _lock:
+        if _pool is roto:
+            _pool = None
+    roto.shutdown(wait=False)
+
+
+def nombre_miniatura(nombre):
+    return f'{nombre}.miniatura.jpg'
+
+
+def _importe(valor):
+    return valor if valor is not None and valor <= MAX_IMPORTE else None
+
+
+def guardar_resultado(nombre, resultado):
+    miniatura = ''
+    if resultado['miniatura']:
+        miniatura = nombre_miniatura(nombre)
+        if default_storage.exists(miniatura):
+            default_storage.delete(miniatura)
+        miniatura = default_storage.save(miniatura, ContentFile(resultado['miniatura']))
+
+    AnalisisFactura.objects.filter(archivo=nombre).update(
+        # Sin librería para sacar el texto no es un análisis hecho
+        estado='hecho' if resultado.get('soportado', True) else 'sin_soporte',
+        texto=resultado['texto'],
+        miniatura=miniatura,
+        base_sugerida=_importe(resultado['base']),
+        total_sugerido=_importe(resultado['total']),
+        fecha_sugerida=resultado['fecha'],
+        proveedor_sugerido=resultado['proveedor'],
+        error='',
+        actualizado=timezone.now(),
+    )
+
+
+def guardar_error(nombre, exc):
+    logger.warning('No se pudo analizar la factura %s: %s', nombre, exc)
+    AnalisisFactura.objects.filter(archivo=nombre).update(
+        estado='error', error=str(exc)[:1000], actualizado=timezone.now()
+    )
+
+
+def _terminado(nombre, pool, futuro):
+    """Callback del pool (en su hilo): guarda el resultado y suelta la conexión"""
+    try:
+        try:
+            guardar_resultado(nombre, futuro.result())
+        except BrokenProcessPool as exc:
+            _descartar_pool(pool)
+            guardar_error(nombre, exc)
+        except Exception as exc:
+            guardar_error(nombre, exc)
+    except Exception:
+        logger.exception('No se pudo guardar el análisis de %s', nombre)
+    finally:
+        connections.close_all()
+
+
+def _tomar(analisis):
+    """Pasa el análisis a 'procesando' si nadie lo ha cogido ya"""
+    return AnalisisFactura.objects.filter(
+        pk=analisis.pk, estado__in=['pendiente', 'error']
+    ).update(estado='procesando', actualizado=timezone.now())
+
+
+def encolar(nombre):
+    """
+    Programa el análisis del archivo `nombre` si no está hecho y devuelve su
+    AnalisisFactura. No espera: el resultado aparece cuando termina el pool.
+    """
+    analisis, _ = AnalisisFactura.objects.get_or_create(archivo=nombre)
+    if analisis.estado == 'hecho' or settings.FACTURAS_PROCESOS <= 0:
+        return analisis
+
+    try:
+        ruta = default_storage.path(nombre)
+    except NotImplementedError:
+        guardar_error(nombre, 'El storage no tiene rutas locales')
+        return analisis
+
+    if _tomar(analisis):
+        analisis.estado = 'procesando'
+        pool = _obtener_pool()
+        try:
+            futuro = pool.submit(analizar, ruta)
+        except BrokenProcessPool as exc:
+            _descartar_pool(pool)
+            guardar_error(nombre, exc)
+            analisis.estado = 'error'
+            return analisis
+        futuro.add_done_callback(lambda futuro: _terminado(nombre, pool, futuro))
+    return analisis
+
+
+def registrar_pendientes():
+    """Crea los análisis que faltan para facturas de gastos y subidas"""
+    analizados = AnalisisFactura.objects.values('archivo')
+    nombres = set(
+        Gasto.objects.exclude(Q(factura='') | Q(factura__isnull=True))
+        .exclude(factura__in=analizados).values_list('factura', flat=True).distinct()
+    )
+    nombres.update(
+        ArchivoFactura.objects.exclude(archivo__in=analizados).values_list('archivo', flat=True)
+    )
+    AnalisisFactura.objects.bulk_create(
+        [AnalisisFactura(archivo=nombre) for nombre in nombres], ignore_conflicts=True
+    )
+    return len(nombres)
+
+
+def procesar_pendientes(procesos=1, reprocesar=False, progreso=None):
+    """
+    Analiza lo pendiente, con error o perdido en 'procesando' (todo con
+    `reprocesar`) en un pool de `procesos` y espera a que termine.
+    Devuelve (hechos, errores).
+    """
+    registrar_pendientes()
+    analisis = AnalisisFactura.objects.all()
+    if not reprocesar:
+        analisis = analisis.filter(
+            Q(estado__in=['pendiente', 'error'])
+            | Q(estado='procesando', actualizado__lt=timezone.now() - PROCESANDO_MAXIMO)
+        )
+    nombres = list(analisis.order_by('pk').values_list('archivo', flat=True))
+
+    hechos = errores = 0
+    with ProcessPoolExecutor(max_workers=max(procesos, 1), mp_context=_contexto()) as pool:
+        futuros = []
+        for nombre in nombres:
+            try:
+                futuros.append((nombre, pool.submit(analizar, default_storage.path(nombre))))
+            except NotImplementedError:
+                guardar_error(nombre, 'El storage no tiene rutas locales')
+                errores += 1
+
+        for nombre, futuro in futuros:
+            try:
+                guardar_resultado(nombre, futuro.result())
+                hechos += 1
+            except Exception as exc:
+                guardar_error(nombre, exc)
+                errores += 1
+            if progreso:
+                progreso(hechos, errores, len(nombres))
+    return hechos, errores
@@ -0,0 +1,45 @@
+# backend/accounts/renderers.py
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+from .metricas import cronometro
+
+try:
+    import orjson
+except ImportError:  # sin orjson se usa el renderer de DRF
+    orjson = None
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    """
+    JSONRenderer que usa orjson si está instalado. Produce los mismos bytes
+    que el renderer por defecto de DRF (compacto, UTF-8, con U+2028/U+2029
+    escapados); si no hay orjson o la petición pide indentación, delega en DRF.
+    Fechas y horas las formatea el encoder de DRF: orjson escribiría
+    microsegundos y "+00:00" donde DRF pone milisegundos y "Z".
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with cronometro('serializacion'):
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            contenido = orjson.dumps(
+                data, default=encoders.JSONEncoder().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME
+            )
+        except TypeError:
+            # Tipos que orjson no admite (p. ej. enteros de más de 64 bits)
+            return super().render(data, accepted_media_type, renderer_context)
+        return contenido.replace(
+            '\u2028'.encode(), b'\\u2028'
+        ).replace(
+            '\u2029'.encode(), b'\\u2029'
+        )
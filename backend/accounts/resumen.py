@@ -0,0 +1,595 @@
+# backend/accounts/resumen.py
+
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Q, Sum
+
+from .cache import invalidar_dashboard
+from .modelos_fiscales import aplica_130, modelo_130, modelos_trimestrales
+from .models import Ingreso, Gasto, ResumenTrimestral, Cliente, PerfilAutonomo
+
+
+# Meses de inicio y fin de cada trimestre
+TRIMESTRE_MESES = {
+    1: (1, 3),
+    2: (4, 6),
+    3: (7, 9),
+    4: (10, 12)
+}
+
+CERO = Decimal('0')
+CIEN = Decimal('100')
+CENTIMO = Decimal('0.01')
+
+
+def fechas_trimestre(trimestre, año):
+    """Devuelve (fecha_inicio, fecha_fin) del trimestre"""
+    mes_inicio, mes_fin = TRIMESTRE_MESES[trimestre]
+    fecha_inicio = date(año, mes_inicio, 1)
+
+    if mes_fin == 12:
+        fecha_fin = date(año, 12, 31)
+    else:
+        fecha_fin = date(año, mes_fin + 1, 1) - timedelta(days=1)
+
+    return fecha_inicio, fecha_fin
+
+
+def _suma_porcentaje(campo):
+    """
+    Suma de importe * porcentaje en céntimos de porcentaje.
+    El porcentaje es entero, así que el producto tiene 2 decimales exactos
+    y la división entre 100 se hace en Python sin perder precisión.
+    """
+    return Sum(
+        F('importe') * F(campo),
+        output_field=DecimalField(max_digits=20, decimal_places=2)
+    )
+
+
+def _decimal(valor):
+    """
+    Normaliza una suma a céntimos. Todas las sumas (importes e importe *
+    porcentaje entero) son exactas a 2 decimales; SQLite las devuelve como
+    float y hay que redondear el ruido.
+    """
+    if valor is None:
+        return CERO
+    return valor.quantize(CENTIMO)
+
+
+def totales_ingresos(queryset):
+    """Totales de ingresos con una sola query de agregación"""
+    datos = queryset.order_by().aggregate(
+        total=Sum('importe'),
+        iva=_suma_porcentaje('iva_porcentaje'),
+        irpf=_suma_porcentaje('irpf_porcentaje'),
+        numero=Count('id'),
+    )
+    return {
+        'ingresos_totales': _decimal(datos['total']),
+        'iva_repercutido': _decimal(datos['iva']) / CIEN,
+        'irpf_retenido': _decimal(datos['irpf']) / CIEN,
+        'num_ingresos': datos['numero'],
+    }
+
+
+def totales_gastos(queryset):
+    """Totales de gastos con una sola query de agregación"""
+    datos = queryset.order_by().aggregate(
+        total=Sum('importe'),
+        iva=_suma_porcentaje('iva_porcentaje'),
+        numero=Count('id'),
+    )
+    return {
+        'gastos_totales': _decimal(datos['total']),
+        'iva_soportado': _decimal(datos['iva']) / CIEN,
+        'num_gastos': datos['numero'],
+    }
+
+
+def resultados(totales):
+    """Añade los resultados derivados del trimestre (beneficio e IVA a pagar)"""
+    totales['beneficio_neto'] = totales['ingresos_totales'] - totales['gastos_totales']
+    totales['iva_a_pagar'] = totales['iva_repercutido'] - totales['iva_soportado']
+    return totales
+
+
+def con_pago_130(totales, anteriores, regimen_iva='general'):
+    """
+    Añade a los totales de un trimestre irpf_a_ingresar: el pago del Modelo
+    130, acumulado desde enero con los totales de los trimestres anteriores.
+    None si con el régimen del perfil no se presenta el 130 (como en modelos_año).
+    """
+    if not aplica_130(regimen_iva):
+        totales['irpf_a_ingresar'] = None
+        return totales
+    totales['irpf_a_ingresar'] = modelo_130(anteriores + [totales])[-1]['importe']
+    return totales
+
+
+def calcular_resumen(usuario, trimestre, año):
+    """
+    Calcula el resumen de un trimestre en SQL: una query por modelo,
+    sin materializar ninguna fila en Python.
+    """
+    totales = {}
+    totales.update(totales_ingresos(
+        Ingreso.objects.filter(usuario=usuario, trimestre=trimestre, año=año)
+    ))
+    totales.update(totales_gastos(
+        Gasto.objects.filter(usuario=usuario, trimestre=trimestre, año=año)
+    ))
+    return resultados(totales)
+
+
+# --- Resumen materializado (ResumenTrimestral) ---
+
+# Campos de cada modelo que afectan al resumen
+CAMPOS_INGRESO = ['usuario_id', 'trimestre', 'año', 'importe', 'iva_porcentaje', 'irpf_porcentaje']
+CAMPOS_GASTO = ['usuario_id', 'trimestre', 'año', 'importe', 'iva_porcentaje']
+
+CAMPOS_RESUMEN = [
+    'ingresos_totales', 'gastos_totales', 'iva_repercutido',
+    'iva_soportado', 'irpf_retenido', 'num_ingresos', 'num_gastos'
+]
+
+
+def _valor(fila, campo):
+    """Lee un campo de una instancia o de un dict de values()"""
+    if isinstance(fila, dict):
+        return fila[campo]
+    return getattr(fila, campo)
+
+
+def acumular_deltas(modelo, filas, signo=1, deltas=None):
+    """
+    Acumula en `deltas` lo que aportan `filas` (instancias o dicts) al resumen
+    de cada (usuario_id, trimestre, año). signo=-1 para restar.
+    """
+    if deltas is None:
+        deltas = {}
+
+    for fila in filas:
+        clave = (
+            _valor(fila, 'usuario_id'),
+            int(_valor(fila, 'trimestre')),
+            int(_valor(fila, 'año')),
+        )
+        delta = deltas.setdefault(clave, dict.fromkeys(CAMPOS_RESUMEN, CERO))
+        importe = Decimal(str(_valor(fila, 'importe'))) * signo
+        iva = importe * int(_valor(fila, 'iva_porcentaje')) / CIEN
+
+        if modelo is Ingreso:
+            delta['ingresos_totales'] += importe
+            delta['iva_repercutido'] += iva
+            delta['irpf_retenido'] += importe * int(_valor(fila, 'irpf_porcentaje')) / CIEN
+            delta['num_ingresos'] += signo
+        else:
+            delta['gastos_totales'] += importe
+            delta['iva_soportado'] += iva
+            delta['num_gastos'] += signo
+
+    return deltas
+
+
+def aplicar_deltas(deltas, crear=True):
+    """
+    Aplica los deltas acumulados sobre ResumenTrimestral con UPDATE atómicos.
+    Con crear=False no se crean filas nuevas (p. ej. al borrar en cascada).
+    """
+    with transaction.atomic():
+        for (usuario_id, trimestre, año), delta in deltas.items():
+            if not any(delta.values()):
+                continue
+
+            resumenes = ResumenTrimestral.objects.filter(
+                usuario_id=usuario_id, trimestre=trimestre, año=año
+            )
+            if crear:
+                ResumenTrimestral.objects.get_or_create(
+                    usuario_id=usuario_id, trimestre=trimestre, año=año
+                )
+
+            cambios = {
+                campo: F(campo) + valor
+                for campo, valor in delta.items() if valor
+            }
+            beneficio = delta['ingresos_totales'] - delta['gastos_totales']
+            if beneficio:
+                cambios['beneficio_neto'] = F('beneficio_neto') + beneficio
+            iva_a_pagar = delta['iva_repercutido'] - delta['iva_soportado']
+            if iva_a_pagar:
+                cambios['iva_a_pagar'] = F('iva_a_pagar') + iva_a_pagar
+
+            resumenes.update(**cambios)
+
+        # Las estadísticas cacheadas de estos usuarios dejan de ser válidas
+        invalidar_dashboard(usuario_id for usuario_id, _, _ in deltas)
+
+
+def registrar_creados(modelo, objetos):
+    """Suma al resumen las filas insertadas sin señales (bulk_create)"""
+    aplicar_deltas(acumular_deltas(modelo, objetos))
+
+
+def _totales_resumen(resumen):
+    if resumen is None:
+        return dict.fromkeys(CAMPOS_RESUMEN, CERO)
+    return {campo: getattr(resumen, campo) for campo in CAMPOS_RESUMEN}
+
+
+def _resumenes_hasta(usuario, trimestre, año):
+    """Resúmenes materializados del año hasta `trimestre` incluido"""
+    return ResumenTrimestral.objects.filter(
+        usuario=usuario, año=año, trimestre__lte=trimestre
+    ).order_by('trimestre')
+
+
+def _totales_hasta(resumenes, trimestre):
+    """Resúmenes del año -> totales de los trimestres 1..trimestre (a cero si faltan)"""
+    por_trimestre = {resumen.trimestre: resumen for resumen in resumenes}
+    return [_totales_resumen(por_trimestre.get(numero)) for numero in range(1, trimestre + 1)]
+
+
+def _leer_resumen(resumenes, trimestre, regimen_iva):
+    *anteriores, totales = _totales_hasta(resumenes, trimestre)
+    return con_pago_130(resultados(totales), anteriores, regimen_iva)
+
+
+def leer_resumen(usuario, trimestre, año, regimen_iva='general'):
+    """
+    Totales del resumen materializado y pago del 130 del trimestre: una
+    query por los resúmenes del año hasta ese trimestre (4 filas como mucho)
+    """
+    return _leer_resumen(_resumenes_hasta(usuario, trimestre, año), trimestre, regimen_iva)
+
+
+async def aleer_resumen(usuario, trimestre, año, regimen_iva='general'):
+    """leer_resumen con el ORM asíncrono"""
+    resumenes = [r async for r in _resumenes_hasta(usuario, trimestre, año)]
+    return _leer_resumen(resumenes, trimestre, regimen_iva)
+
+
+def leer_anteriores(usuario, trimestre, año):
+    """Totales de los trimestres anteriores del año (sin query en el primero)"""
+    if trimestre == 1:
+        return []
+    return _totales_hasta(_resumenes_hasta(usuario, trimestre - 1, año), trimestre - 1)
+
+
+async def aleer_anteriores(usuario, trimestre, año):
+    """leer_anteriores con el ORM asíncrono"""
+    if trimestre == 1:
+        return []
+    resumenes = [r async for r in _resumenes_hasta(usuario, trimestre - 1, año)]
+    return _totales_hasta(resumenes, trimestre - 1)
+
+
+def resumen_de_filas(ingresos, gastos):
+    """Totales de un trimestre a partir de sus filas ya cargadas, sin queries"""
+    deltas = acumular_deltas(Gasto, gastos, deltas=acumular_deltas(Ingreso, ingresos))
+    totales = dict.fromkeys(CAMPOS_RESUMEN, CERO)
+    for delta in deltas.values():
+        for campo, valor in delta.items():
+            totales[campo] += valor
+    return resultados(totales)
+
+
+def _consultas_dashboard(usuario, año):
+    totales = ResumenTrimestral.objects.filter(usuario=usuario, año=año)
+    # Clientes normalizados con al menos una factura (sin DISTINCT sobre el histórico)
+    clientes = Cliente.objects.filter(usuario=usuario, num_facturas__gt=0)
+    return totales, clientes
+
+
+def _estadisticas(totales, clientes_unicos):
+    ingresos_año = _decimal(totales['ingresos'])
+    gastos_año = _decimal(totales['gastos'])
+    return {
+        'ingresos_año': ingresos_año,
+        'gastos_año': gastos_año,
+        'beneficio_año': ingresos_año - gastos_año,
+        'clientes_unicos': clientes_unicos,
+    }
+
+
+SUMAS_DASHBOARD = {
+    'ingresos': Sum('ingresos_totales'),
+    'gastos': Sum('gastos_totales'),
+}
+
+
+def estadisticas_dashboard(usuario, año):
+    """
+    Totales del año desde los resúmenes materializados (4 filas como mucho)
+    y número de clientes distintos del histórico.
+    """
+    totales, clientes = _consultas_dashboard(usuario, año)
+    return _estadisticas(totales.aggregate(**SUMAS_DASHBOARD), clientes.count())
+
+
+async def aestadisticas_dashboard(usuario, año):
+    """estadisticas_dashboard con el ORM asíncrono"""
+    totales, clientes = _consultas_dashboard(usuario, año)
+    return _estadisticas(
+        await totales.aaggregate(**SUMAS_DASHBOARD), await clientes.acount()
+    )
+
+
+def consulta_agrupada(modelo, queryset):
+    """values() con los totales por (usuario, trimestre, año): una query GROUP BY"""
+    filas = queryset.order_by().values('usuario_id', 'trimestre', 'año')
+
+    if modelo is Ingreso:
+        return filas.annotate(
+            total=Sum('importe'),
+            iva=_suma_porcentaje('iva_porcentaje'),
+            irpf=_suma_porcentaje('irpf_porcentaje'),
+            numero=Count('id'),
+        )
+    return filas.annotate(
+        total=Sum('importe'),
+        iva=_suma_porcentaje('iva_porcentaje'),
+        numero=Count('id'),
+    )
+
+
+def fila_agrupada(modelo, fila):
+    """Fila de consulta_agrupada -> (clave, totales con los nombres del resumen)"""
+    clave = (fila['usuario_id'], fila['trimestre'], fila['año'])
+    if modelo is Ingreso:
+        return clave, {
+            'ingresos_totales': _decimal(fila['total']),
+            'iva_repercutido': _decimal(fila['iva']) / CIEN,
+            'irpf_retenido': _decimal(fila['irpf']) / CIEN,
+            'num_ingresos': fila['numero'],
+        }
+    return clave, {
+        'gastos_totales': _decimal(fila['total']),
+        'iva_soportado': _decimal(fila['iva']) / CIEN,
+        'num_gastos': fila['numero'],
+    }
+
+
+def totales_agrupados(modelo, queryset):
+    """Totales por (usuario, trimestre, año) con una query GROUP BY"""
+    for fila in consulta_agrupada(modelo, queryset):
+        yield fila_agrupada(modelo, fila)
+
+
+def filas_resumen(totales):
+    """
+    {(usuario_id, trimestre, año): totales} -> instancias de ResumenTrimestral
+    sin guardar, con beneficio e IVA a pagar calculados
+    """
+    nuevos = []
+    for (usuario_id, trimestre, año), valores in totales.items():
+        valores = resultados(dict(valores))
+        nuevos.append(ResumenTrimestral(
+            usuario_id=usuario_id, trimestre=trimestre, año=año, **valores
+        ))
+    return nuevos
+
+
+def reconstruir_resumenes(usuarios=None, batch_size=1000):
+    """
+    Recalcula ResumenTrimestral desde cero con una query agrupada por modelo.
+    `usuarios` limita la reconstrucción a esos IDs. Devuelve las filas creadas.
+    """
+    ingresos = Ingreso.objects.all()
+    gastos = Gasto.objects.all()
+    resumenes = ResumenTrimestral.objects.all()
+    if usuarios is not None:
+        ingresos = ingresos.filter(usuario_id__in=usuarios)
+        gastos = gastos.filter(usuario_id__in=usuarios)
+        resumenes = resumenes.filter(usuario_id__in=usuarios)
+
+    totales = {}
+    for modelo, queryset in ((Ingreso, ingresos), (Gasto, gastos)):
+        for clave, valores in totales_agrupados(modelo, queryset):
+            totales.setdefault(clave, dict.fromkeys(CAMPOS_RESUMEN, CERO)).update(valores)
+
+    nuevos = filas_resumen(totales)
+
+    with transaction.atomic():
+        afectados = set(resumenes.values_list('usuario_id', flat=True))
+        resumenes.delete()
+        ResumenTrimestral.objects.bulk_create(nuevos, batch_size=batch_size)
+        invalidar_dashboard(afectados | {usuario_id for usuario_id, _, _ in totales})
+
+    return len(nuevos)
+
+
+def _consultas_rango(usuario, desde, hasta):
+    for modelo in (Ingreso, Gasto):
+        queryset = modelo.objects.filter(
+            usuario=usuario, año__gte=desde, año__lte=hasta
+        )
+        yield modelo, consulta_agrupada(modelo, queryset)
+
+
+def _resumenes_rango(desde, hasta, filas, regimen_iva):
+    """(modelo, fila agrupada) -> resúmenes de todos los trimestres del rango"""
+    totales = {
+        (año, trimestre): dict.fromkeys(CAMPOS_RESUMEN, CERO)
+        for año in range(desde, hasta + 1)
+        for trimestre in TRIMESTRE_MESES
+    }
+
+    for modelo, fila in filas:
+        (_, trimestre, año), valores = fila_agrupada(modelo, fila)
+        totales[(año, trimestre)].update(valores)
+
+    resumenes = []
+    for (año, trimestre), valores in sorted(totales.items()):
+        fecha_inicio, fecha_fin = fechas_trimestre(trimestre, año)
+        # El rango tiene los cuatro trimestres de cada año: el 130 sale de los anteriores
+        anteriores = [totales[(año, numero)] for numero in range(1, trimestre)]
+        valores = con_pago_130(resultados(valores), anteriores, regimen_iva)
+        valores.update({
+            'trimestre': trimestre,
+            'año': año,
+            'fecha_inicio': fecha_inicio,
+            'fecha_fin': fecha_fin,
+        })
+        resumenes.append(valores)
+    return resumenes
+
+
+def calcular_rango(usuario, desde, hasta):
+    """
+    Resúmenes de todos los trimestres entre los años `desde` y `hasta`
+    (incluidos) con una query GROUP BY año, trimestre por modelo, más la
+    del régimen del perfil. Los trimestres sin movimientos se devuelven a cero.
+    """
+    filas = [
+        (modelo, fila)
+        for modelo, consulta in _consultas_rango(usuario, desde, hasta)
+        for fila in consulta
+    ]
+    return _resumenes_rango(desde, hasta, filas, regimen_iva_usuario(usuario))
+
+
+async def acalcular_rango(usuario, desde, hasta):
+    """calcular_rango con el ORM asíncrono"""
+    filas = [
+        (modelo, fila)
+        for modelo, consulta in _consultas_rango(usuario, desde, hasta)
+        async for fila in consulta
+    ]
+    return _resumenes_rango(desde, hasta, filas, await aregimen_iva_usuario(usuario))
+
+
+# --- Modelos 130 y 303 ---
+
+def consultas_modelos(**filtro):
+    """
+    Totales por usuario, año, trimestre y tipo de IVA de las filas que
+    cumplen `filtro`: una query GROUP BY por modelo
+    """
+    for modelo in (Ingreso, Gasto):
+        filas = modelo.objects.filter(**filtro).order_by().values(
+            'usuario_id', 'año', 'trimestre', 'iva_porcentaje'
+        )
+        sumas = {
+            'total': Sum('importe'),
+            'iva': _suma_porcentaje('iva_porcentaje'),
+            'numero': Count('id'),
+        }
+        if modelo is Ingreso:
+            sumas['irpf'] = _suma_porcentaje('irpf_porcentaje')
+            sumas['con_retencion'] = Sum('importe', filter=Q(irpf_porcentaje__gt=0))
+        yield modelo, filas.annotate(**sumas)
+
+
+def _totales_trimestre():
+    return {
+        'ingresos_totales': CERO, 'gastos_totales': CERO, 'irpf_retenido': CERO,
+        'ingresos_con_retencion': CERO, 'num_ingresos': 0, 'num_gastos': 0,
+        'devengado': {}, 'deducible': {},
+    }
+
+
+def totales_modelos(filas):
+    """
+    (modelo, fila de consultas_modelos) -> {(usuario_id, año, trimestre):
+    totales de accounts.modelos_fiscales}; las claves que falten salen a cero
+    """
+    totales = defaultdict(_totales_trimestre)
+    for modelo, fila in filas:
+        trimestre = totales[(fila['usuario_id'], fila['año'], fila['trimestre'])]
+        base = _decimal(fila['total'])
+        cuota = _decimal(fila['iva']) / CIEN
+        if modelo is Ingreso:
+            trimestre['ingresos_totales'] += base
+            trimestre['irpf_retenido'] += _decimal(fila['irpf']) / CIEN
+            trimestre['ingresos_con_retencion'] += _decimal(fila['con_retencion'])
+            trimestre['num_ingresos'] += fila['numero']
+            trimestre['devengado'][fila['iva_porcentaje']] = (base, cuota)
+        else:
+            trimestre['gastos_totales'] += base
+            trimestre['num_gastos'] += fila['numero']
+            trimestre['deducible'][fila['iva_porcentaje']] = (base, cuota)
+    return totales
+
+
+def trimestres_año(totales, usuario_id, año):
+    """Los totales de los cuatro trimestres del año de un usuario, en orden"""
+    return [totales[(usuario_id, año, trimestre)] for trimestre in TRIMESTRE_MESES]
+
+
+def consulta_perfiles(**filtro):
+    return PerfilAutonomo.objects.filter(**filtro).values(
+        'usuario_id', 'regimen_iva', 'tipo_irpf_default'
+    )
+
+
+def perfil_fiscal(perfil):
+    """Régimen de IVA y retención por defecto del perfil (los de por defecto si no hay)"""
+    if perfil is None:
+        campos = PerfilAutonomo._meta
+        return campos.get_field('regimen_iva').default, campos.get_field('tipo_irpf_default').default
+    return perfil['regimen_iva'], perfil['tipo_irpf_default']
+
+
+def regimen_iva_usuario(usuario):
+    """Régimen de IVA del perfil del usuario (una query)"""
+    return perfil_fiscal(consulta_perfiles(usuario=usuario).first())[0]
+
+
+async def aregimen_iva_usuario(usuario):
+    return perfil_fiscal(await consulta_perfiles(usuario=usuario).afirst())[0]
+
+
+def _modelos_año(usuario_id, año, filas, perfil):
+    """(modelo, fila agrupada) y perfil -> modelos 130 y 303 de los trimestres del año"""
+    totales = totales_modelos(filas)
+    regimen_iva, tipo_irpf_default = perfil_fiscal(perfil)
+    modelos = modelos_trimestrales(
+        trimestres_año(totales, usuario_id, año),
+        trimestres_año(totales, usuario_id, año - 1),
+        regimen_iva, tipo_irpf_default,
+    )
+    for modelo in modelos:
+        modelo['año'] = año
+        modelo['fecha_inicio'], modelo['fecha_fin'] = fechas_trimestre(modelo['trimestre'], año)
+    return {
+        'año': año,
+        'regimen_iva': regimen_iva,
+        'tipo_irpf_default': tipo_irpf_default,
+        'trimestres': modelos,
+    }
+
+
+def _consultas_año(usuario, año):
+    # El año anterior decide si hay que presentar el 130
+    return consultas_modelos(usuario=usuario, año__gte=año - 1, año__lte=año)
+
+
+def modelos_año(usuario, año):
+    """
+    Modelos 130 y 303 de los cuatro trimestres del año con el régimen de
+    IVA del perfil: tres queries (perfil y una agrupada por modelo) sea cual
+    sea el número de filas.
+    """
+    filas = [
+        (modelo, fila)
+        for modelo, consulta in _consultas_año(usuario, año)
+        for fila in consulta
+    ]
+    return _modelos_año(usuario.pk, año, filas, consulta_perfiles(usuario=usuario).first())
+
+
+async def amodelos_año(usuario, año):
+    """modelos_año con el ORM asíncrono"""
+    filas = [
+        (modelo, fila)
+        for modelo, consulta in _consultas_año(usuario, año)
+        async for fila in consulta
+    ]
+    perfil = await consulta_perfiles(usuario=usuario).afirst()
+    return _modelos_año(usuario.pk, año, filas, perfil)
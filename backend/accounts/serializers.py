@@ -1,9 +1,13 @@
 # backend/accounts/serializers.py
 
 from rest_framework import serializers
-from .models import Ingreso, Gasto, ResumenTrimestral
-from decimal import Decimal
-from django.db.models import Sum
+from .models import (
+    Ingreso, Gasto, ResumenTrimestral, Cliente, Proveedor, SubidaFactura, AnalisisFactura
+)
+from .descargas import url_firmada
+from .lotes import crear_en_lotes
+from .subidas import crear_subida, extension
+from django.conf import settings
 
 
 class IngresoSerializer(serializers.ModelSerializer):
@@ -27,39 +31,154 @@ class IngresoSerializer(serializers.ModelSerializer):
         return data
 
 
+class SubidaCompletaField(serializers.PrimaryKeyRelatedField):
+    """ID de una subida completa del usuario de la request"""
+    default_error_messages = {
+        'does_not_exist': 'La subida "{pk_value}" no existe o no está completa.',
+    }
+    
+    def get_queryset(self):
+        request = self.context.get('request')
+        if request is None:
+            return SubidaFactura.objects.none()
+        return SubidaFactura.objects.filter(
+            usuario=request.user, archivo__isnull=False
+        ).select_related('archivo')
+
+
+def url_factura(context):
+    """URL firmada de las facturas; una función por serializer raíz"""
+    if '_url_factura' not in context:
+        context['_url_factura'] = url_firmada(context.get('request'))
+    return context['_url_factura']
+
+
+class FacturaField(serializers.FileField):
+    """FileField que en vez de la URL pública de media da una URL firmada"""
+    
+    def to_representation(self, value):
+        if not value:
+            return None
+        return url_factura(self.context)(value.name)
+
+
 class GastoSerializer(serializers.ModelSerializer):
     """Serializer para el modelo Gasto"""
     iva_importe = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     total = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    factura = FacturaField(required=False, allow_null=True, max_length=100)
     factura_url = serializers.SerializerMethodField()
+    miniatura = serializers.SerializerMethodField()
+    # Alternativa a mandar el archivo: la factura subida antes por trozos
+    subida = SubidaCompletaField(write_only=True, required=False)
     
     class Meta:
         model = Gasto
         fields = [
             'id', 'fecha', 'descripcion', 'proveedor', 'importe',
             'iva_porcentaje', 'iva_importe', 'total', 'factura',
-            'factura_url', 'trimestre', 'año'
+            'factura_url', 'miniatura', 'subida', 'trimestre', 'año'
         ]
         
     def get_factura_url(self, obj):
         """Obtiene la URL completa de la factura"""
-        if obj.factura:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.factura.url)
+        if obj.factura and self.context.get('request'):
+            return url_factura(self.context)(obj.factura.name)
         return None
     
+    def get_miniatura(self, obj):
+        """URL de la miniatura si el queryset viene de lectura.con_miniatura"""
+        return url_factura(self.context)(getattr(obj, 'miniatura_nombre', None))
+    
     def validate(self, data):
         """Validación personalizada"""
         if data.get('importe', 0) <= 0:
             raise serializers.ValidationError("El importe debe ser mayor que 0")
+        
+        subida = data.pop('subida', None)
+        if subida is not None:
+            if data.get('factura'):
+                raise serializers.ValidationError("Envía la factura o la subida, no las dos")
+            # El gasto apunta al contenido ya guardado; no se copia nada
+            data['factura'] = subida.archivo.archivo.name
         return data
 
 
+class AnalisisFacturaSerializer(serializers.ModelSerializer):
+    """Texto, miniatura y datos sugeridos de una factura (ver accounts/procesado.py)"""
+    miniatura = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = AnalisisFactura
+        fields = [
+            'estado', 'texto', 'miniatura', 'base_sugerida', 'total_sugerido',
+            'fecha_sugerida', 'proveedor_sugerido', 'actualizado'
+        ]
+    
+    def get_miniatura(self, obj):
+        return url_factura(self.context)(obj.miniatura)
+
+
+class SubidaFacturaSerializer(serializers.ModelSerializer):
+    """Subida de una factura por trozos (ver accounts/subidas.py)"""
+    completa = serializers.BooleanField(read_only=True)
+    
+    class Meta:
+        model = SubidaFactura
+        fields = ['id', 'nombre', 'tamaño', 'recibido', 'sha256', 'completa', 'creada']
+        read_only_fields = ['id', 'recibido', 'creada']
+    
+    def validate_nombre(self, value):
+        if extension(value) not in settings.FACTURA_EXTENSIONES:
+            raise serializers.ValidationError(
+                f"Formato no admitido; usa {', '.join(settings.FACTURA_EXTENSIONES)}"
+            )
+        return value
+    
+    def validate_tamaño(self, value):
+        if not 0 < value <= settings.FACTURA_MAX_BYTES:
+            raise serializers.ValidationError(
+                f"El tamaño debe estar entre 1 y {settings.FACTURA_MAX_BYTES} bytes"
+            )
+        return value
+    
+    def validate_sha256(self, value):
+        value = value.lower()
+        if value and (len(value) != 64 or any(c not in '0123456789abcdef' for c in value)):
+            raise serializers.ValidationError("El SHA-256 debe tener 64 caracteres hexadecimales")
+        return value
+    
+    def create(self, validated_data):
+        return crear_subida(**validated_data)
+
+
+class ClienteSerializer(serializers.ModelSerializer):
+    """Serializer para clientes normalizados (autocompletado)"""
+    
+    class Meta:
+        model = Cliente
+        fields = ['id', 'nombre', 'num_facturas', 'total_facturado']
+        read_only_fields = fields
+
+
+class ProveedorSerializer(serializers.ModelSerializer):
+    """Serializer para proveedores normalizados (autocompletado)"""
+    
+    class Meta:
+        model = Proveedor
+        fields = ['id', 'nombre', 'num_facturas', 'total_facturado']
+        read_only_fields = fields
+
+
 class ResumenTrimestralSerializer(serializers.ModelSerializer):
     """Serializer para el resumen trimestral"""
     fecha_inicio = serializers.SerializerMethodField()
     fecha_fin = serializers.SerializerMethodField()
+    # Se guardan con 4 decimales para acumular sin error; se muestran con 2
+    iva_repercutido = serializers.DecimalField(max_digits=16, decimal_places=2, read_only=True)
+    iva_soportado = serializers.DecimalField(max_digits=16, decimal_places=2, read_only=True)
+    iva_a_pagar = serializers.DecimalField(max_digits=16, decimal_places=2, read_only=True)
+    irpf_retenido = serializers.DecimalField(max_digits=16, decimal_places=2, read_only=True)
     
     class Meta:
         model = ResumenTrimestral
@@ -67,7 +186,7 @@ class ResumenTrimestralSerializer(serializers.ModelSerializer):
             'id', 'trimestre', 'año', 'fecha_inicio', 'fecha_fin',
             'ingresos_totales', 'gastos_totales', 'beneficio_neto',
             'iva_repercutido', 'iva_soportado', 'iva_a_pagar',
-            'irpf_retenido'
+            'irpf_retenido', 'num_ingresos', 'num_gastos'
         ]
         
     def get_fecha_inicio(self, obj):
@@ -115,34 +234,64 @@ class ResumenCalculadoSerializer(serializers.Serializer):
     # Resultados
     beneficio_neto = serializers.DecimalField(max_digits=10, decimal_places=2)
     iva_a_pagar = serializers.DecimalField(max_digits=10, decimal_places=2)
-    irpf_a_ingresar = serializers.DecimalField(max_digits=10, decimal_places=2)
+    # None en el régimen simplificado (no hay 130)
+    irpf_a_ingresar = serializers.DecimalField(max_digits=10, decimal_places=2, allow_null=True)
     
     # Detalles
     ingresos_detalle = IngresoSerializer(many=True, read_only=True)
     gastos_detalle = GastoSerializer(many=True, read_only=True)
 
 
+class ModeloFiscalSerializer(serializers.Serializer):
+    """Un modelo 130 o 303 de un trimestre (accounts.modelos_fiscales)"""
+    aplica = serializers.BooleanField()
+    motivo = serializers.CharField(required=False)
+    obligado = serializers.BooleanField(required=False)
+    casillas = serializers.DictField(
+        child=serializers.DecimalField(max_digits=12, decimal_places=2), required=False
+    )
+    resultado = serializers.CharField(required=False)
+    importe = serializers.DecimalField(max_digits=12, decimal_places=2, required=False)
+
+
+class ModelosTrimestreSerializer(serializers.Serializer):
+    trimestre = serializers.IntegerField()
+    año = serializers.IntegerField()
+    fecha_inicio = serializers.DateField()
+    fecha_fin = serializers.DateField()
+    modelo_130 = ModeloFiscalSerializer()
+    modelo_303 = ModeloFiscalSerializer()
+
+
+class ModelosAñoSerializer(serializers.Serializer):
+    """Modelos 130 y 303 de los cuatro trimestres de un año"""
+    año = serializers.IntegerField()
+    regimen_iva = serializers.CharField()
+    tipo_irpf_default = serializers.IntegerField()
+    trimestres = ModelosTrimestreSerializer(many=True)
+
+
 class BulkIngresoSerializer(serializers.Serializer):
     """Serializer para crear múltiples ingresos de una vez"""
-    ingresos = IngresoSerializer(many=True)
+    ingresos = IngresoSerializer(many=True, allow_empty=False, max_length=settings.BULK_CREATE_MAX_FILAS)
     
     def create(self, validated_data):
-        ingresos_data = validated_data.pop('ingresos')
-        ingresos = []
-        for ingreso_data in ingresos_data:
-            ingreso = Ingreso.objects.create(**ingreso_data)
-            ingresos.append(ingreso)
-        return {'ingresos': ingresos}
+        usuario = validated_data['usuario']
+        ingresos = [
+            Ingreso(usuario=usuario, **ingreso_data)
+            for ingreso_data in validated_data['ingresos']
+        ]
+        return {'ingresos': crear_en_lotes(Ingreso, ingresos)}
 
 
 class BulkGastoSerializer(serializers.Serializer):
     """Serializer para crear múltiples gastos de una vez"""
-    gastos = GastoSerializer(many=True)
+    gastos = GastoSerializer(many=True, allow_empty=False, max_length=settings.BULK_CREATE_MAX_FILAS)
     
     def create(self, validated_data):
-        gastos_data = validated_data.pop('gastos')
-        gastos = []
-        for gasto_data in gastos_data:
-            gasto = Gasto.objects.create(**gasto_data)
-            gastos.append(gasto)
-        return {'gastos': gastos}
\ No newline at end of file
+        usuario = validated_data['usuario']
+        gastos = [
+            Gasto(usuario=usuario, **gasto_data)
+            for gasto_data in validated_data['gastos']
+        ]
+        return {'gastos': crear_en_lotes(Gasto, gastos)}
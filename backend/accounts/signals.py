@@ -0,0 +1,127 @@
+# backend/accounts/signals.py
+
+from django.db import connections, transaction
+from django.db.models.signals import pre_save, post_save, post_delete, post_migrate
+from django.dispatch import receiver
+
+from django.contrib.auth.models import User
+
+from .autenticacion import revocar
+from .models import Ingreso, Gasto, PerfilAutonomo
+from .nif import filtro_nifs
+from .particiones import asegurar_particiones
+from .procesado import encolar
+from .resumen import CAMPOS_INGRESO, CAMPOS_GASTO, acumular_deltas, aplicar_deltas
+from .terceros import (
+    TERCEROS, normalizar_nombre, resolver_terceros,
+    acumular_contadores, aplicar_contadores
+)
+
+
+CAMPOS = {
+    Ingreso: CAMPOS_INGRESO + ['cliente', 'cliente_ref_id'],
+    Gasto: CAMPOS_GASTO + ['proveedor', 'proveedor_ref_id'],
+}
+
+
+@receiver(pre_save, sender=Ingreso)
+@receiver(pre_save, sender=Gasto)
+def guardar_valores_anteriores(sender, instance, raw=False, **kwargs):
+    """
+    Guarda los valores previos para calcular el delta si es una edición
+    y asigna el cliente/proveedor normalizado.
+    """
+    if raw:
+        return
+    
+    anterior = None
+    if instance.pk is not None:
+        anterior = sender.objects.filter(
+            pk=instance.pk
+        ).values(*CAMPOS[sender]).first()
+    instance._resumen_anterior = anterior
+    
+    # Enlazar con el cliente/proveedor normalizado (solo si cambia el nombre)
+    _, campo, campo_fk = TERCEROS[sender]
+    if (
+        anterior and anterior[f'{campo_fk}_id'] is not None
+        and normalizar_nombre(anterior[campo]) == normalizar_nombre(getattr(instance, campo))
+    ):
+        setattr(instance, f'{campo_fk}_id', anterior[f'{campo_fk}_id'])
+    else:
+        resolver_terceros(sender, [instance])
+
+
+@receiver(post_save, sender=Ingreso)
+@receiver(post_save, sender=Gasto)
+def actualizar_resumen_al_guardar(sender, instance, raw=False, **kwargs):
+    """
+    Aplica al ResumenTrimestral y a los contadores del cliente/proveedor
+    el delta de la fila creada o modificada
+    """
+    if raw:
+        return
+    deltas = {}
+    anterior = getattr(instance, '_resumen_anterior', None)
+    if anterior:
+        # Resta los valores antiguos (cubre cambios de trimestre y porcentajes)
+        acumular_deltas(sender, [anterior], signo=-1, deltas=deltas)
+    acumular_deltas(sender, [instance], deltas=deltas)
+    aplicar_deltas(deltas)
+    
+    contadores = {}
+    if anterior:
+        acumular_contadores(sender, [anterior], signo=-1, deltas=contadores)
+    acumular_contadores(sender, [instance], deltas=contadores)
+    aplicar_contadores(sender, contadores)
+
+
+@receiver(post_save, sender=Gasto)
+def analizar_factura(sender, instance, raw=False, **kwargs):
+    """Encola el análisis de la factura cuando se confirma la transacción"""
+    if raw or not instance.factura:
+        return
+    nombre = instance.factura.name
+    transaction.on_commit(lambda: encolar(nombre))
+
+
+@receiver(post_delete, sender=Ingreso)
+@receiver(post_delete, sender=Gasto)
+def actualizar_resumen_al_borrar(sender, instance, **kwargs):
+    """Resta la fila borrada del ResumenTrimestral y de su cliente/proveedor"""
+    # Sin crear filas: en un borrado en cascada el resumen ya puede no existir
+    aplicar_deltas(acumular_deltas(sender, [instance], signo=-1), crear=False)
+    aplicar_contadores(sender, acumular_contadores(sender, [instance], signo=-1))
+
+
+@receiver(post_migrate)
+def crear_particiones(sender, using='default', **kwargs):
+    """Tras cada migrate, particiones del año actual, el siguiente y los nuevos"""
+    if sender.label == 'accounts':
+        asegurar_particiones(connections[using])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=PerfilAutonomo)
+@receiver(post_delete, sender=PerfilAutonomo)
+def revocar_datos_token(sender, instance, **kwargs):
+    """
+    Los tokens emitidos antes llevan el email y el perfil de entonces: en
+    cuanto se confirme el cambio, JWTClaimsAuthentication vuelve a leerlos.
+    """
+    usuario_id = instance.pk if sender is User else instance.usuario_id
+    borrado = sender is User and 'created' not in kwargs
+    transaction.on_commit(lambda: revocar(usuario_id, recargar=not borrado))
+
+
+@receiver(post_save, sender=PerfilAutonomo)
+def añadir_nif_al_filtro(sender, instance, **kwargs):
+    """
+    Al filtro de este proceso al momento y no al confirmar: si la transacción
+    falla solo queda un falso positivo, que se resuelve con una query. A los
+    demás procesos, por la caché, cuando el NIF ya se ve en la BD.
+    """
+    nif = instance.nif
+    filtro_nifs.añadir(nif)
+    transaction.on_commit(lambda: filtro_nifs.publicar(nif))
@@ -0,0 +1,181 @@
+# backend/accounts/subidas.py
+
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import ArchivoFactura, SubidaFactura
+from .procesado import encolar
+
+
+# Subida de facturas por trozos, reanudable y con el contenido guardado por
+# su SHA-256. Cada trozo es una petición corta: el cliente manda los bytes a
+# partir de `recibido` y, si se corta, pregunta por dónde iba y sigue.
+# Al llegar al final se calcula el hash y, si ese contenido ya estaba
+# guardado (la misma factura subida dos veces), se reutiliza.
+
+BLOQUE_HASH = 1024 * 1024
+
+
+class ErrorSubida(Exception):
+    """Trozo que no se puede aceptar (vacío, fuera de tamaño, hash distinto...)"""
+
+
+class OffsetIncorrecto(ErrorSubida):
+    """El trozo no empieza donde termina lo recibido; se sigue desde `recibido`"""
+
+    def __init__(self, mensaje, recibido):
+        super().__init__(mensaje)
+        self.recibido = recibido
+
+
+def extension(nombre):
+    return os.path.splitext(nombre)[1].lstrip('.').lower()
+
+
+def ruta_temporal(subida):
+    return os.path.join(settings.SUBIDAS_DIR, f'{subida.pk}.part')
+
+
+def nombre_contenido(sha256, ext):
+    """facturas/sha256/ab/abcd...ef.pdf: repartido en 256 directorios"""
+    return f'facturas/sha256/{sha256[:2]}/{sha256}.{ext}'
+
+
+def crear_subida(usuario, nombre, tamaño, sha256=''):
+    """
+    Empieza una subida. Si el cliente declara el SHA-256 y el mismo usuario
+    ya subió ese contenido, la subida nace completa y no hay que mandar nada
+    (solo con sus propias subidas, para no revelar qué han subido otros).
+    """
+    subida = SubidaFactura(usuario=usuario, nombre=nombre, tamaño=tamaño, sha256=sha256)
+    if sha256:
+        anterior = SubidaFactura.objects.filter(
+            usuario=usuario, sha256=sha256, archivo__isnull=False
+        ).select_related('archivo').first()
+        if anterior is not None and anterior.archivo.tamaño == tamaño:
+            subida.archivo = anterior.archivo
+            subida.recibido = tamaño
+    subida.save()
+    return subida
+
+
+def _escribir(ruta, offset, datos):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, 'r+b' if os.path.exists(ruta) else 'wb') as f:
+        f.seek(offset)
+        f.write(datos)
+        # Restos de un trozo anterior que se escribió pero no se confirmó
+        f.truncate()
+
+
+def _sha256(ruta):
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(BLOQUE_HASH), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _guardar_contenido(ruta, sha256, ext, tamaño):
+    """ArchivoFactura con ese hash; el contenido solo se copia la primera vez"""
+    archivo = ArchivoFactura.objects.filter(sha256=sha256).first()
+    if archivo is not None:
+        return archivo
+
+    nombre = nombre_contenido(sha256, ext)
+    if not default_storage.exists(nombre):
+        with open(ruta, 'rb') as f:
+            nombre = default_storage.save(nombre, File(f))
+    try:
+        with transaction.atomic():
+            return ArchivoFactura.objects.create(sha256=sha256, archivo=nombre, tamaño=tamaño)
+    except IntegrityError:
+        # Otra subida del mismo contenido ha terminado a la vez
+        return ArchivoFactura.objects.get(sha256=sha256)
+
+
+def escribir_trozo(subida, offset, datos):
+    """
+    Añade `datos` a la subida en la posición `offset`, que tiene que ser
+    justo lo recibido hasta ahora (si no -> OffsetIncorrecto y el cliente
+    reintenta desde `recibido`). Con el último trozo se completa la subida.
+    """
+    if not datos:
+        raise ErrorSubida('El trozo está vacío')
+
+    with transaction.atomic():
+        # El UPDATE condicional hace de cerrojo: otra petición con el mismo
+        # offset espera y luego no encuentra la fila con ese `recibido`
+        actualizadas = SubidaFactura.objects.filter(
+            pk=subida.pk, recibido=offset, archivo__isnull=True,
+            tamaño__gte=offset + len(datos),
+        ).update(recibido=F('recibido') + len(datos))
+        subida.refresh_from_db()
+
+        if not actualizadas:
+            if subida.completa:
+                raise OffsetIncorrecto('La subida ya está completa', subida.recibido)
+            if offset == subida.recibido:
+                raise ErrorSubida('El trozo pasa del tamaño declarado')
+            raise OffsetIncorrecto(f'Se esperaba el offset {subida.recibido}', subida.recibido)
+
+        ruta = ruta_temporal(subida)
+        _escribir(ruta, offset, datos)
+        if subida.recibido < subida.tamaño:
+            return subida
+
+        sha256 = _sha256(ruta)
+        corrupta = bool(subida.sha256) and sha256 != subida.sha256
+        if not corrupta:
+            subida.sha256 = sha256
+            subida.archivo = _guardar_contenido(ruta, sha256, extension(subida.nombre), subida.tamaño)
+            subida.save(update_fields=['sha256', 'archivo', 'actualizada'])
+
+    os.remove(ruta)
+    if corrupta:
+        SubidaFactura.objects.filter(pk=subida.pk).update(recibido=0)
+        raise OffsetIncorrecto(
+            'El SHA-256 del contenido no coincide con el declarado; '
+            'la subida vuelve a empezar', 0
+        )
+    # Miniatura y datos sugeridos listos (o en camino) antes de crear el gasto
+    encolar(subida.archivo.archivo.name)
+    return subida
+
+
+def cancelar_subida(subida):
+    """Borra la subida y lo recibido; el contenido de una completa se queda"""
+    ruta = ruta_temporal(subida)
+    subida.delete()
+    if os.path.exists(ruta):
+        os.remove(ruta)
+
+
+def limpiar_subidas(antes_de):
+    """
+    Borra las subidas a medias sin actividad desde `antes_de` y los trozos
+    que no pertenecen a ninguna subida. Devuelve cuántas subidas borra.
+    """
+    abandonadas = list(SubidaFactura.objects.filter(
+        archivo__isnull=True, actualizada__lt=antes_de
+    ))
+    for subida in abandonadas:
+        cancelar_subida(subida)
+
+    if os.path.isdir(settings.SUBIDAS_DIR):
+        # Primero los ficheros: uno de una subida que empieza ahora ya está en la BD
+        trozos = [n for n in os.listdir(settings.SUBIDAS_DIR) if n.endswith('.part')]
+        pendientes = {
+            f'{pk}.part' for pk in
+            SubidaFactura.objects.filter(archivo__isnull=True).values_list('pk', flat=True)
+        }
+        for nombre in trozos:
+            if nombre not in pendientes:
+                os.remove(os.path.join(settings.SUBIDAS_DIR, nombre))
+    return len(abandonadas)
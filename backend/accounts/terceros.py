@@ -0,0 +1,104 @@
+# backend/accounts/terceros.py
+
+import unicodedata
+from decimal import Decimal
+
+from django.db.models import F
+
+from .models import Ingreso, Gasto, Cliente, Proveedor
+
+
+# Para cada modelo: (dimensión, campo de texto, campo FK)
+TERCEROS = {
+    Ingreso: (Cliente, 'cliente', 'cliente_ref'),
+    Gasto: (Proveedor, 'proveedor', 'proveedor_ref'),
+}
+
+# Carácter más alto de Unicode: cierra el rango de búsqueda por prefijo
+FIN_PREFIJO = '\U0010ffff'
+
+
+def normalizar_nombre(nombre):
+    """'  Telefónica  S.A. ' -> 'telefonica s.a.'"""
+    texto = unicodedata.normalize('NFKD', str(nombre or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.lower().split())[:100]
+
+
+def resolver_terceros(modelo, objetos):
+    """
+    Asigna a cada objeto su Cliente/Proveedor según el nombre normalizado,
+    creando los que falten. Hace una query de lectura y, si hay nuevos,
+    un bulk_create y otra lectura, sea cual sea el número de objetos.
+    """
+    dimension, campo, campo_fk = TERCEROS[modelo]
+
+    nombres = {}
+    for objeto in objetos:
+        clave = (objeto.usuario_id, normalizar_nombre(getattr(objeto, campo)))
+        nombres.setdefault(clave, getattr(objeto, campo).strip()[:100])
+
+    def existentes():
+        filas = dimension.objects.filter(
+            usuario_id__in={usuario_id for usuario_id, _ in nombres},
+            nombre_normalizado__in={normalizado for _, normalizado in nombres},
+        ).values_list('usuario_id', 'nombre_normalizado', 'id')
+        return {(usuario_id, normalizado): pk for usuario_id, normalizado, pk in filas}
+
+    ids = existentes()
+    nuevos = [
+        dimension(usuario_id=usuario_id, nombre=nombre, nombre_normalizado=normalizado)
+        for (usuario_id, normalizado), nombre in nombres.items()
+        if (usuario_id, normalizado) not in ids
+    ]
+    if nuevos:
+        # ignore_conflicts: otro proceso puede haberlo creado a la vez
+        dimension.objects.bulk_create(nuevos, ignore_conflicts=True)
+        ids = existentes()
+
+    for objeto in objetos:
+        clave = (objeto.usuario_id, normalizar_nombre(getattr(objeto, campo)))
+        setattr(objeto, f'{campo_fk}_id', ids[clave])
+
+
+def acumular_contadores(modelo, filas, signo=1, deltas=None):
+    """Acumula por ID de cliente/proveedor el número de facturas y el importe"""
+    if deltas is None:
+        deltas = {}
+    campo_fk = f'{TERCEROS[modelo][2]}_id'
+
+    for fila in filas:
+        if isinstance(fila, dict):
+            pk, importe = fila[campo_fk], fila['importe']
+        else:
+            pk, importe = getattr(fila, campo_fk), fila.importe
+        if pk is None:
+            continue
+        num, total = deltas.get(pk, (0, Decimal('0')))
+        deltas[pk] = (num + signo, total + Decimal(str(importe)) * signo)
+    return deltas
+
+
+def aplicar_contadores(modelo, deltas):
+    """Actualiza los contadores con un UPDATE atómico por cliente/proveedor"""
+    dimension = TERCEROS[modelo][0]
+    for pk, (num, total) in deltas.items():
+        if num or total:
+            dimension.objects.filter(pk=pk).update(
+                num_facturas=F('num_facturas') + num,
+                total_facturado=F('total_facturado') + total,
+            )
+
+
+def autocompletar(dimension, usuario, prefijo, limite=10):
+    """
+    Clientes/proveedores del usuario cuyo nombre normalizado empieza por
+    `prefijo`. Se busca como rango [prefijo, prefijo + U+10FFFF) para que
+    la consulta recorra el índice (usuario, nombre_normalizado).
+    """
+    prefijo = normalizar_nombre(prefijo)
+    return dimension.objects.filter(
+        usuario=usuario,
+        nombre_normalizado__gte=prefijo,
+        nombre_normalizado__lt=prefijo + FIN_PREFIJO,
+    ).order_by('nombre_normalizado')[:limite]
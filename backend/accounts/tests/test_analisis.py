@@ -0,0 +1,59 @@
+# backend/accounts/tests/test_analisis.py
+
+import io
+import os
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+from unittest import skipIf
+
+from django.test import SimpleTestCase
+from PIL import Image
+
+from accounts.analisis import analizar, fitz, pytesseract
+
+
+TEXTO = 'Papeleria Sol S.L.\nFecha: 03/02/2025\nBase imponible 100,00\nTotal 121,00'
+
+
+class AnalisisTests(SimpleTestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, ignore_errors=True)
+
+    def ruta(self, nombre):
+        return os.path.join(self.directorio, nombre)
+
+    @skipIf(fitz is None, 'PyMuPDF no está instalado')
+    def test_pdf_con_texto(self):
+        documento = fitz.open()
+        documento.new_page().insert_text((72, 72), TEXTO)
+        documento.save(self.ruta('factura.pdf'))
+
+        resultado = analizar(self.ruta('factura.pdf'))
+        self.assertTrue(resultado['soportado'])
+        self.assertEqual(resultado['texto'], TEXTO)
+        self.assertEqual(resultado['base'], Decimal('100.00'))
+        self.assertEqual(resultado['total'], Decimal('121.00'))
+        self.assertEqual(resultado['fecha'], date(2025, 2, 3))
+        self.assertEqual(resultado['proveedor'], 'Papeleria Sol S.L.')
+
+        miniatura = Image.open(io.BytesIO(resultado['miniatura']))
+        self.assertEqual(miniatura.format, 'JPEG')
+        self.assertLessEqual(max(miniatura.size), 320)
+
+    def test_foto(self):
+        Image.new('RGB', (1200, 800), 'white').save(self.ruta('ticket.png'))
+        resultado = analizar(self.ruta('ticket.png'))
+        self.assertEqual(Image.open(io.BytesIO(resultado['miniatura'])).size, (320, 213))
+        # Sin OCR no hay texto: el análisis queda en sin_soporte
+        self.assertEqual(resultado['soportado'], pytesseract is not None)
+
+    def test_formato_desconocido(self):
+        with open(self.ruta('factura.txt'), 'w') as archivo:
+            archivo.write(TEXTO)
+        resultado = analizar(self.ruta('factura.txt'))
+        self.assertFalse(resultado['soportado'])
+        self.assertIsNone(resultado['miniatura'])
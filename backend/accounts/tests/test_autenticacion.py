@@ -0,0 +1,184 @@
+# backend/accounts/tests/test_autenticacion.py
+
+from datetime import timedelta
+from importlib import reload
+from uuid import UUID, uuid4
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts import autenticacion
+from accounts.autenticacion import construir_usuario, revocar_refresh, token_para
+from accounts.models import PerfilAutonomo, TokenRevocado
+
+
+# JWTClaimsAuthentication: un cambio del usuario hecho en otro proceso (o
+# antes de reiniciar) se ve por la caché de Django. Recargar el módulo
+# descarta todo lo que el proceso tiene en memoria, como un proceso nuevo.
+
+
+# Tras un cambio la primera petición lee el usuario: por encima del presupuesto
+@override_settings(PRESUPUESTO_QUERIES={})
+class RevocacionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        autenticacion.usuarios.clear()
+        self.usuario = User.objects.create_user('revocar@example.com', 'revocar@example.com', 'x')
+        self.perfil = PerfilAutonomo.objects.create(
+            usuario=self.usuario, nombre_fiscal='Ana Pérez', nif='12345678Z', direccion='Mayor 1',
+            codigo_postal='28001', ciudad='Madrid', provincia='Madrid'
+        )
+        self.cabeceras = {'Authorization': f'Bearer {token_para(self.usuario).access_token}'}
+
+    def get(self):
+        return self.client.get('/api/check-auth/', headers=self.cabeceras, SERVER_NAME='localhost')
+
+    def cambiar_en_otro_proceso(self, cambio):
+        with self.captureOnCommitCallbacks(execute=True):
+            cambio()
+        reload(autenticacion)
+
+    def test_token_con_claims_sin_consultas(self):
+        with self.assertNumQueries(0):
+            respuesta = self.get()
+        self.assertEqual(respuesta.json()['nombre'], 'Ana Pérez')
+
+    def test_usuario_desactivado(self):
+        def desactivar():
+            self.usuario.is_active = False
+            self.usuario.save()
+
+        self.cambiar_en_otro_proceso(desactivar)
+        self.assertEqual(self.get().status_code, 401)
+
+    def test_usuario_borrado_no_puede_escribir(self):
+        self.cambiar_en_otro_proceso(self.usuario.delete)
+        respuesta = self.client.post(
+            '/api/gastos/', {
+                'fecha': '2025-01-02', 'descripcion': 'Papel', 'proveedor': 'Papelería',
+                'importe': '10.00', 'iva_porcentaje': 21, 'trimestre': 1, 'año': 2025,
+            }, headers=self.cabeceras, SERVER_NAME='localhost', content_type='application/json'
+        )
+        self.assertEqual(respuesta.status_code, 401)
+
+    def test_cambio_de_perfil(self):
+        def renombrar():
+            self.perfil.nombre_fiscal = 'Ana Pérez Gil'
+            self.perfil.save()
+
+        self.cambiar_en_otro_proceso(renombrar)
+        # El token antiguo ya no vale para los datos: se leen una vez de la BD
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get().json()['nombre'], 'Ana Pérez Gil')
+        with self.assertNumQueries(0):
+            self.get()
+
+    def test_is_active_no_sale_del_token(self):
+        self.usuario.is_active = False
+        self.usuario.save()
+        usuario = construir_usuario(self.usuario.pk, {
+            'email': self.usuario.email, 'perfil_id': None, 'nombre_fiscal': None
+        })
+        with self.assertNumQueries(1):
+            self.assertFalse(usuario.is_active)
+
+
+# Rotación de refresh tokens: cada refresh da uno nuevo y el usado entra en
+# TokenRevocado; si vuelve a llegar (robado o repetido) choca con la clave
+# primaria y se rechaza.
+
+
+class RefreshTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user('refresh@example.com', 'refresh@example.com', 'x')
+        self.perfil = PerfilAutonomo.objects.create(
+            usuario=self.usuario, nombre_fiscal='Ana Pérez', nif='12345678Z', direccion='Mayor 1',
+            codigo_postal='28001', ciudad='Madrid', provincia='Madrid'
+        )
+        self.refresh = token_para(self.usuario)
+        # La purga toca en el primer refresh de cada test
+        autenticacion._ultima_purga = None
+
+    def refrescar(self, refresh):
+        return self.client.post(
+            '/api/auth/token/refresh/', {'refresh': str(refresh)},
+            SERVER_NAME='localhost', content_type='application/json'
+        )
+
+    def test_refresh_rota_el_token(self):
+        respuesta = self.refrescar(self.refresh)
+        self.assertEqual(respuesta.status_code, 200)
+        datos = respuesta.json()
+        self.assertNotEqual(datos['refresh'], str(self.refresh))
+        self.assertTrue(TokenRevocado.objects.filter(jti=self.refresh['jti']).exists())
+
+        # El access nuevo vale y el refresh nuevo también
+        cabeceras = {'Authorization': f'Bearer {datos["access"]}'}
+        self.assertEqual(
+            self.client.get('/api/check-auth/', headers=cabeceras, SERVER_NAME='localhost').status_code, 200
+        )
+        self.assertEqual(self.refrescar(datos['refresh']).status_code, 200)
+
+    def test_refresh_con_datos_nuevos_del_perfil(self):
+        self.perfil.nombre_fiscal = 'Ana Pérez Gil'
+        self.perfil.save()
+        access = self.refrescar(self.refresh).json()['access']
+        cabeceras = {'Authorization': f'Bearer {access}'}
+        with self.assertNumQueries(0):
+            respuesta = self.client.get('/api/check-auth/', headers=cabeceras, SERVER_NAME='localhost')
+        self.assertEqual(respuesta.json()['nombre'], 'Ana Pérez Gil')
+
+    def test_token_rotado_reutilizado(self):
+        self.assertEqual(self.refrescar(self.refresh).status_code, 200)
+        with self.assertLogs('accounts.auth_views_custom', 'WARNING') as logs:
+            respuesta = self.refrescar(self.refresh)
+        self.assertEqual(respuesta.status_code, 401)
+        self.assertEqual(respuesta.json(), {'error': 'Token inválido o caducado'})
+        self.assertEqual(logs.records[0].evento, 'refresh_reutilizado')
+        self.assertEqual(TokenRevocado.objects.count(), 1)
+
+    def test_revocar_refresh(self):
+        self.assertTrue(revocar_refresh(self.refresh))
+        # IntegrityError dentro de su savepoint: la transacción sigue usable
+        self.assertFalse(revocar_refresh(self.refresh))
+        self.assertEqual(TokenRevocado.objects.count(), 1)
+
+    def test_tokens_rechazados(self):
+        caducado = token_para(self.usuario)
+        caducado.set_exp(lifetime=-timedelta(seconds=1))
+        access = token_para(self.usuario).access_token
+        for nombre, valor, codigo in (
+            ('sin token', '', 400),
+            ('caducado', caducado, 401),
+            ('access en vez de refresh', access, 401),
+            ('manipulado', str(self.refresh)[:-2] + 'xx', 401),
+        ):
+            with self.subTest(nombre):
+                self.assertEqual(self.refrescar(valor).status_code, codigo)
+        self.assertFalse(TokenRevocado.objects.exists())
+
+    def test_usuario_desactivado(self):
+        User.objects.filter(pk=self.usuario.pk).update(is_active=False)
+        self.assertEqual(self.refrescar(self.refresh).status_code, 401)
+
+    @override_settings(JWT_PURGA_INTERVALO=3600)
+    def test_purga_de_caducados(self):
+        ahora = timezone.now()
+        caducado = TokenRevocado.objects.create(jti=uuid4(), caduca=ahora - timedelta(seconds=1))
+        vigente = TokenRevocado.objects.create(jti=uuid4(), caduca=ahora + timedelta(days=1))
+
+        siguiente = self.refrescar(self.refresh).json()['refresh']
+        jtis = set(TokenRevocado.objects.values_list('jti', flat=True))
+        self.assertNotIn(caducado.jti, jtis)
+        self.assertIn(vigente.jti, jtis)
+        self.assertIn(UUID(self.refresh['jti']), jtis)
+
+        # Dentro del intervalo no se vuelve a purgar
+        otro = TokenRevocado.objects.create(jti=uuid4(), caduca=ahora - timedelta(seconds=1))
+        self.refrescar(siguiente)
+        self.assertTrue(TokenRevocado.objects.filter(jti=otro.jti).exists())
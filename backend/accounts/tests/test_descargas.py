@@ -0,0 +1,171 @@
+# backend/accounts/tests/test_descargas.py
+
+import hashlib
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import Http404
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from accounts.autenticacion import token_para
+from accounts.descargas import firmar, leer_firma, url_firmada
+from accounts.models import Gasto
+from accounts.subidas import nombre_contenido
+
+
+# Descarga de facturas: firmas que caducan y no se pueden manipular, rangos
+# (206/416) y revalidación con ETag/If-None-Match.
+
+MEDIA_TEMPORAL = tempfile.mkdtemp()
+CONTENIDO = bytes(range(256)) * 4
+NOMBRE = 'facturas/2025/02/factura.pdf'
+
+
+def manipular(firma):
+    """La misma firma con el último carácter del HMAC cambiado"""
+    return firma[:-1] + ('A' if firma[-1] != 'A' else 'B')
+
+
+class FirmaTests(SimpleTestCase):
+
+    def test_ida_y_vuelta(self):
+        nombre, caduca = leer_firma(firmar(NOMBRE))
+        self.assertEqual(nombre, NOMBRE)
+        self.assertGreater(caduca, time.time() + settings.FACTURAS_URL_CADUCIDAD)
+
+    def test_misma_firma_dentro_de_la_ventana(self):
+        ventana = settings.FACTURAS_URL_CADUCIDAD
+        inicio = (int(time.time()) // ventana) * ventana
+        self.assertEqual(firmar(NOMBRE, inicio), firmar(NOMBRE, inicio + ventana - 1))
+        self.assertNotEqual(firmar(NOMBRE, inicio), firmar(NOMBRE, inicio + ventana))
+
+    def test_firma_caducada(self):
+        firma = firmar(NOMBRE, time.time() - 2 * settings.FACTURAS_URL_CADUCIDAD)
+        with self.assertRaisesMessage(Http404, 'El enlace de descarga ha caducado'):
+            leer_firma(firma)
+
+    def test_firma_manipulada(self):
+        firma = firmar(NOMBRE)
+        datos, hmac = firma.rsplit(':', 1)
+        otra = firmar('facturas/2025/02/otra.pdf')
+        for nombre, manipulada in (
+            ('hmac cambiado', manipular(firma)),
+            ('datos de otra firma', f'{otra.rsplit(":", 1)[0]}:{hmac}'),
+            ('sin hmac', datos),
+            ('vacía', ''),
+        ):
+            with self.subTest(nombre):
+                with self.assertRaisesMessage(Http404, 'Enlace de descarga no válido'):
+                    leer_firma(manipulada)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEMPORAL, FACTURAS_PROCESOS=0, FACTURAS_ENVIO=None, PRESUPUESTO_QUERIES={})
+class DescargaTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_TEMPORAL, ignore_errors=True)
+
+    def setUp(self):
+        if not default_storage.exists(NOMBRE):
+            default_storage.save(NOMBRE, ContentFile(CONTENIDO))
+        self.url = url_firmada()(NOMBRE)
+
+    def get(self, url=None, **cabeceras):
+        return self.client.get(url or self.url, headers=cabeceras, SERVER_NAME='localhost')
+
+    def test_archivo_completo(self):
+        respuesta = self.get()
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(b''.join(respuesta.streaming_content), CONTENIDO)
+        self.assertEqual(respuesta['Accept-Ranges'], 'bytes')
+        self.assertEqual(respuesta['Content-Type'], 'application/pdf')
+        max_age = int(respuesta['Cache-Control'].rsplit('=', 1)[1])
+        self.assertGreater(max_age, settings.FACTURAS_URL_CADUCIDAD)
+
+    def test_firmas_rechazadas_por_la_api(self):
+        caducada = firmar(NOMBRE, time.time() - 2 * settings.FACTURAS_URL_CADUCIDAD)
+        prefijo = self.url.rsplit('/', 2)[0]
+        for nombre, firma in (('caducada', caducada), ('manipulada', manipular(firmar(NOMBRE)))):
+            with self.subTest(nombre):
+                self.assertEqual(self.get(f'{prefijo}/{firma}/').status_code, 404)
+        inexistente = url_firmada()('facturas/2025/02/no-existe.pdf')
+        self.assertEqual(self.get(inexistente).status_code, 404)
+
+    def test_rangos(self):
+        tamaño = len(CONTENIDO)
+        for rango, inicio, fin in (
+            ('bytes=0-9', 0, 9),
+            ('bytes=100-', 100, tamaño - 1),
+            ('bytes=-5', tamaño - 5, tamaño - 1),
+            ('bytes=-5000', 0, tamaño - 1),
+            ('bytes=1000-5000', 1000, tamaño - 1),
+            (' bytes=3-3 ', 3, 3),
+        ):
+            with self.subTest(rango=rango):
+                respuesta = self.get(Range=rango)
+                self.assertEqual(respuesta.status_code, 206)
+                self.assertEqual(respuesta['Content-Range'], f'bytes {inicio}-{fin}/{tamaño}')
+                self.assertEqual(respuesta['Content-Length'], str(fin - inicio + 1))
+                self.assertEqual(b''.join(respuesta.streaming_content), CONTENIDO[inicio:fin + 1])
+
+    def test_rangos_no_satisfacibles(self):
+        for rango in (f'bytes={len(CONTENIDO)}-', 'bytes=5000-6000', 'bytes=-0'):
+            with self.subTest(rango=rango):
+                respuesta = self.get(Range=rango)
+                self.assertEqual(respuesta.status_code, 416)
+                self.assertEqual(respuesta['Content-Range'], f'bytes */{len(CONTENIDO)}')
+
+    def test_rangos_que_no_se_entienden(self):
+        # Se ignoran y se sirve el archivo entero
+        for rango in ('bytes=9-3', 'items=0-9', 'bytes=0-1,5-9', 'bytes=-'):
+            with self.subTest(rango=rango):
+                respuesta = self.get(Range=rango)
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertEqual(b''.join(respuesta.streaming_content), CONTENIDO)
+
+    def test_etag(self):
+        etag = self.get()['ETag']
+        respuesta = self.get(**{'If-None-Match': etag})
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta['ETag'], etag)
+        self.assertEqual(respuesta.content, b'')
+
+        self.assertEqual(self.get(**{'If-None-Match': '"otro"'}).status_code, 200)
+        # If-Range con otra versión: el rango no vale y va el archivo entero
+        self.assertEqual(self.get(Range='bytes=0-9', **{'If-Range': '"otro"'}).status_code, 200)
+        self.assertEqual(self.get(Range='bytes=0-9', **{'If-Range': etag}).status_code, 206)
+
+    def test_etag_del_contenido_por_hash(self):
+        sha256 = hashlib.sha256(CONTENIDO).hexdigest()
+        nombre = default_storage.save(nombre_contenido(sha256, 'pdf'), ContentFile(CONTENIDO))
+        self.assertEqual(self.get(url_firmada()(nombre))['ETag'], f'"{sha256}"')
+
+    def test_head(self):
+        respuesta = self.client.head(self.url, SERVER_NAME='localhost')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['Content-Length'], str(len(CONTENIDO)))
+
+    @override_settings(FACTURAS_ENVIO='x-accel-redirect', FACTURAS_ACCEL_PREFIJO='/media-protegida/')
+    def test_envio_por_nginx(self):
+        respuesta = self.get(Range='bytes=0-9')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['X-Accel-Redirect'], f'/media-protegida/{NOMBRE}')
+        self.assertEqual(respuesta.content, b'')
+
+    def test_descarga_desde_el_gasto(self):
+        usuario = User.objects.create_user('descargas@example.com', 'descargas@example.com', 'x')
+        gasto = Gasto.objects.create(
+            usuario=usuario, fecha='2025-02-10', descripcion='Material', proveedor='Papelería',
+            importe='10.00', iva_porcentaje=21, trimestre=1, año=2025, factura=NOMBRE
+        )
+        cabeceras = {'Authorization': f'Bearer {token_para(usuario).access_token}', 'Range': 'bytes=-4'}
+        respuesta = self.client.get(f'/api/gastos/{gasto.pk}/factura/', headers=cabeceras, SERVER_NAME='localhost')
+        self.assertEqual(respuesta.status_code, 206)
+        self.assertEqual(b''.join(respuesta.streaming_content), CONTENIDO[-4:])
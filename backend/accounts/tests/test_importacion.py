@@ -0,0 +1,137 @@
+# backend/accounts/tests/test_importacion.py
+
+import csv
+import io
+import json
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from openpyxl import Workbook
+
+from accounts.autenticacion import token_para
+from accounts.models import Ingreso, Gasto
+
+
+# Importación de CSV/XLSX por la API: cada línea del CSV se decodifica por
+# separado (UTF-8 o latin-1) y una fila que el lector no puede separar
+# (FilaIlegible) se informa con su número sin cortar la importación.
+
+CABECERA = 'Fecha;Concepto;Proveedor;Base imponible;IVA\n'
+
+
+def csv_de(*lineas, nombre='gastos.csv'):
+    contenido = b''.join(linea if isinstance(linea, bytes) else linea.encode() for linea in lineas)
+    return SimpleUploadedFile(nombre, contenido, content_type='text/csv')
+
+
+def xlsx_de(filas, nombre='ingresos.xlsx'):
+    libro = Workbook()
+    for fila in filas:
+        libro.active.append(fila)
+    contenido = io.BytesIO()
+    libro.save(contenido)
+    return SimpleUploadedFile(nombre, contenido.getvalue())
+
+
+@override_settings(PRESUPUESTO_QUERIES={})
+class ImportacionTests(TestCase):
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('importar@example.com', 'importar@example.com', 'x')
+        self.cabeceras = {'Authorization': f'Bearer {token_para(self.usuario).access_token}'}
+
+    def importar(self, tipo, archivo, query='', **datos):
+        return self.client.post(
+            f'/api/{tipo}/importar/{query}', {'archivo': archivo, **datos},
+            headers=self.cabeceras, SERVER_NAME='localhost'
+        )
+
+    def test_csv_con_lineas_en_utf8_y_latin1(self):
+        archivo = csv_de(
+            CABECERA.encode('utf-8-sig'),
+            '03/02/2025;Café;Bar Pepe;10,00;0\n'.encode('utf-8'),
+            '04/02/2025;Café;Bar Pepe;1.234,56;21%\n'.encode('latin-1'),
+            '05/02/2025;Cañas;Bar Ñu;-20;21\r\n'.encode('latin-1'),
+        )
+        respuesta = self.importar('gastos', archivo)
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(respuesta.json(), {'procesadas': 3, 'creadas': 3, 'con_errores': 0, 'errores': []})
+
+        gastos = list(Gasto.objects.filter(usuario=self.usuario).order_by('fecha'))
+        self.assertEqual([g.descripcion for g in gastos], ['Café', 'Café', 'Cañas'])
+        self.assertEqual([g.proveedor for g in gastos], ['Bar Pepe', 'Bar Pepe', 'Bar Ñu'])
+        self.assertEqual([g.importe for g in gastos], [Decimal('10.00'), Decimal('1234.56'), Decimal('20.00')])
+        self.assertEqual(gastos[0].fecha, date(2025, 2, 3))
+        self.assertEqual((gastos[0].trimestre, gastos[0].año), (1, 2025))
+
+    def test_fila_ilegible_no_corta_la_importacion(self):
+        enorme = 'x' * (csv.field_size_limit() + 1)
+        archivo = csv_de(
+            CABECERA,
+            '03/02/2025;Material;Papelería;10,00;21\n',
+            f'04/02/2025;{enorme};Papelería;10,00;21\n',
+            '05/02/2025;Material;Papelería;0;21\n',
+            ';;;;\n',
+            '06/02/2025;Material;Papelería;30,00;21\n',
+        )
+        datos = self.importar('gastos', archivo).json()
+        self.assertEqual((datos['procesadas'], datos['creadas'], datos['con_errores']), (4, 2, 2))
+        self.assertEqual([error['fila'] for error in datos['errores']], [3, 4])
+        self.assertIn('CSV no válido', datos['errores'][0]['errores']['archivo'][0])
+        self.assertIn('importe', datos['errores'][1]['errores'])
+        self.assertEqual(
+            list(Gasto.objects.order_by('fecha').values_list('importe', flat=True)),
+            [Decimal('10.00'), Decimal('30.00')]
+        )
+
+    def test_xlsx(self):
+        archivo = xlsx_de([
+            ['Fecha', 'Cliente', 'Importe', 'IVA', 'IRPF'],
+            [date(2025, 4, 1), 'Acme', 1500, 0.21, 0.15],
+            ['02/05/2025', None, '200,50', 21, None],
+            [None, None, None, None, None],
+            ['no es fecha', 'Acme', 10, 21, 15],
+        ])
+        datos = self.importar('ingresos', archivo).json()
+        self.assertEqual((datos['procesadas'], datos['creadas'], datos['con_errores']), (3, 2, 1))
+        self.assertEqual(datos['errores'][0]['fila'], 5)
+
+        ingresos = list(Ingreso.objects.filter(usuario=self.usuario).order_by('fecha'))
+        self.assertEqual(
+            [(i.cliente, i.importe, i.iva_porcentaje, i.irpf_porcentaje, i.trimestre) for i in ingresos],
+            [('Acme', Decimal('1500.00'), 21, 15, 2), ('Sin especificar', Decimal('200.50'), 21, 7, 2)]
+        )
+
+    def test_columnas_no_estandar(self):
+        archivo = csv_de('Día,Total neto,Cliente\n', '2025-07-01,100,Acme\n', nombre='ingresos.csv')
+        columnas = json.dumps({'fecha': 'Día', 'importe': 'Total neto'})
+        datos = self.importar('ingresos', archivo, columnas=columnas).json()
+        self.assertEqual(datos['creadas'], 1)
+
+    def test_progreso_en_ndjson(self):
+        filas = [f'0{dia}/02/2025;Material;Papelería;10,00;21\n' for dia in range(1, 6)]
+        with self.settings(BULK_CREATE_BATCH_SIZE=2):
+            respuesta = self.importar('gastos', csv_de(CABECERA, *filas), '?progreso=true')
+            lineas = [json.loads(linea) for linea in b''.join(respuesta.streaming_content).splitlines()]
+        self.assertEqual(respuesta['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([linea['creadas'] for linea in lineas], [2, 4, 5])
+        self.assertEqual(Gasto.objects.count(), 5)
+
+    def test_archivos_que_no_se_pueden_importar(self):
+        enorme = 'x' * (csv.field_size_limit() + 1)
+        for nombre, archivo, datos, query, error in (
+            ('formato', csv_de(CABECERA, nombre='gastos.pdf'), {}, '', 'Formato no soportado: .pdf (use CSV o XLSX)'),
+            ('vacío', csv_de(b''), {}, '', 'El archivo está vacío'),
+            ('sin importe', csv_de('Fecha;Concepto\n', '01/02/2025;x\n'), {}, '', 'Faltan columnas obligatorias: importe'),
+            ('cabecera ilegible', csv_de(f'Fecha;{enorme}\n'), {}, '?progreso=true', 'CSV no válido'),
+            ('xlsx roto', SimpleUploadedFile('gastos.xlsx', b'no es un zip'), {}, '', 'El archivo no es un XLSX válido'),
+            ('columnas', csv_de(CABECERA), {'columnas': '[1]'}, '', "'columnas' debe ser un objeto JSON"),
+        ):
+            with self.subTest(nombre):
+                respuesta = self.importar('gastos', archivo, query, **datos)
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertIn(error, respuesta.json()['error'])
+        self.assertFalse(Gasto.objects.exists())
@@ -0,0 +1,93 @@
+# backend/accounts/tests/test_lectura.py
+
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts.lectura import (
+    CAMPOS_INGRESO, CAMPOS_GASTO, con_miniatura, leer_ingresos, leer_gastos
+)
+from accounts.models import Ingreso, Gasto, AnalisisFactura
+from accounts.renderers import JSONRapidoRenderer
+from accounts.serializers import IngresoSerializer, GastoSerializer
+
+
+# La ruta de lectura rápida (lectura.py) y JSONRapidoRenderer prometen la
+# misma salida que los serializers y el renderer de DRF: se comparan los
+# dicts y los bytes.
+
+IMPORTES = ['0.01', '33.33', '99.99', '1234.56', '999999.99']
+
+
+class LecturaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario = User.objects.create_user('lectura@example.com', 'lectura@example.com', 'x')
+        for numero, importe in enumerate(IMPORTES):
+            Ingreso.objects.create(
+                usuario=usuario, fecha=date(2025, 1 + numero, 5), descripcion='Factura «ñ»',
+                cliente=f'Cliente {numero}', importe=Decimal(importe),
+                iva_porcentaje=(0, 4, 10, 21, 21)[numero], irpf_porcentaje=(0, 7, 15, 15, 19)[numero],
+                trimestre=1 + numero // 3, año=2025,
+            )
+            Gasto.objects.create(
+                usuario=usuario, fecha=date(2025, 1 + numero, 5), descripcion='Material\u2028',
+                proveedor=f'Proveedor {numero}', importe=Decimal(importe),
+                iva_porcentaje=(0, 4, 10, 21, 21)[numero],
+                factura=f'facturas/2025/01/f{numero}.pdf' if numero % 2 else None,
+                trimestre=1 + numero // 3, año=2025,
+            )
+        AnalisisFactura.objects.create(
+            archivo='facturas/2025/01/f1.pdf', estado='hecho', miniatura='facturas/miniaturas/f1.png'
+        )
+        cls.usuario = usuario
+
+    def setUp(self):
+        self.request = Request(APIRequestFactory().get('/api/gastos/', HTTP_HOST='localhost'))
+
+    def assertMismosBytes(self, rapida, drf):
+        self.assertEqual(JSONRapidoRenderer().render(rapida), JSONRenderer().render(drf))
+
+    def test_ingresos(self):
+        queryset = Ingreso.objects.filter(usuario=self.usuario).order_by('id')
+        rapida = leer_ingresos(queryset.values(*CAMPOS_INGRESO))
+        drf = IngresoSerializer(queryset, many=True).data
+        self.assertEqual(rapida, drf)
+        self.assertMismosBytes(rapida, drf)
+
+    def test_gastos(self):
+        queryset = con_miniatura(Gasto.objects.filter(usuario=self.usuario).order_by('id'))
+        rapida = leer_gastos(queryset.values(*CAMPOS_GASTO, 'miniatura_nombre'), self.request)
+        drf = GastoSerializer(queryset, many=True, context={'request': self.request}).data
+        self.assertEqual(rapida, drf)
+        self.assertMismosBytes(rapida, drf)
+        self.assertIsNotNone(rapida[1]['miniatura'])
+
+    def test_gastos_sin_request(self):
+        queryset = Gasto.objects.filter(usuario=self.usuario).order_by('id')
+        self.assertEqual(
+            leer_gastos(queryset.values(*CAMPOS_GASTO)),
+            GastoSerializer(queryset, many=True).data
+        )
+
+
+class JSONRapidoRendererTests(TestCase):
+
+    def test_fechas_como_drf(self):
+        datos = {
+            'utc': datetime(2025, 3, 1, 12, 30, 5, 123456, tzinfo=timezone.utc),
+            'sin_microsegundos': datetime(2025, 3, 1, 12, 30, 5, tzinfo=timezone.utc),
+            'ingenua': datetime(2025, 3, 1, 12, 30, 5, 120000),
+            'fecha': date(2025, 3, 1),
+            'hora': time(9, 15, 0, 654321),
+            'importe': Decimal('10.50'),
+            'texto': 'línea\u2028párrafo\u2029',
+            'lista': [None, True, 1.5],
+        }
+        self.assertEqual(JSONRapidoRenderer().render(datos), JSONRenderer().render(datos))
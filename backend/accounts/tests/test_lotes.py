@@ -0,0 +1,86 @@
+# backend/accounts/tests/test_lotes.py
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from accounts.autenticacion import token_para
+from accounts.models import Ingreso, Gasto
+
+
+# bulk_create: si alguna fila no valida no se inserta ninguna y la respuesta
+# dice qué filas fallan por su índice en la lista enviada.
+
+
+def ingreso(**campos):
+    datos = {
+        'fecha': '2025-02-10', 'descripcion': 'Factura', 'cliente': 'Cliente',
+        'importe': '100.00', 'iva_porcentaje': 21, 'irpf_porcentaje': 15,
+        'trimestre': 1, 'año': 2025,
+    }
+    datos.update(campos)
+    return datos
+
+
+def gasto(**campos):
+    datos = {
+        'fecha': '2025-02-10', 'descripcion': 'Material', 'proveedor': 'Proveedor',
+        'importe': '50.00', 'iva_porcentaje': 21, 'trimestre': 1, 'año': 2025,
+    }
+    datos.update(campos)
+    return datos
+
+
+@override_settings(PRESUPUESTO_QUERIES={}, BULK_CREATE_BATCH_SIZE=2)
+class BulkCreateTests(TestCase):
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('lotes@example.com', 'lotes@example.com', 'x')
+        self.cabeceras = {'Authorization': f'Bearer {token_para(self.usuario).access_token}'}
+
+    def post(self, url, datos):
+        return self.client.post(
+            url, datos, content_type='application/json', headers=self.cabeceras, SERVER_NAME='localhost'
+        )
+
+    def test_filas_validas_e_invalidas(self):
+        filas = [
+            ingreso(),
+            ingreso(importe='-5.00'),
+            ingreso(cliente='Otro'),
+            ingreso(fecha='no es fecha', iva_porcentaje=None),
+            ingreso(),
+        ]
+        respuesta = self.post('/api/ingresos/bulk_create/', {'ingresos': filas})
+        self.assertEqual(respuesta.status_code, 400)
+        datos = respuesta.json()
+        self.assertEqual(datos['error'], '2 filas con errores, no se ha creado ninguna')
+        self.assertEqual([fila['indice'] for fila in datos['filas']], [1, 3])
+        self.assertEqual(set(datos['filas'][0]['errores']), {'importe'})
+        self.assertEqual(set(datos['filas'][1]['errores']), {'fecha', 'iva_porcentaje'})
+        self.assertFalse(Ingreso.objects.exists())
+
+    def test_gastos_con_una_fila_invalida(self):
+        filas = [gasto(), gasto(), gasto(), gasto(proveedor='')]
+        respuesta = self.post('/api/gastos/bulk_create/', {'gastos': filas})
+        self.assertEqual(respuesta.status_code, 400)
+        filas_con_error = respuesta.json()['filas']
+        self.assertEqual([fila['indice'] for fila in filas_con_error], [3])
+        self.assertIn('proveedor', filas_con_error[0]['errores'])
+        self.assertFalse(Gasto.objects.exists())
+
+    def test_error_de_la_lista_completa(self):
+        for nombre, datos in (('vacía', {'ingresos': []}), ('sin lista', {}), ('no es lista', {'ingresos': 'x'})):
+            with self.subTest(nombre):
+                respuesta = self.post('/api/ingresos/bulk_create/', datos)
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertIn('ingresos', respuesta.json())
+                self.assertNotIn('filas', respuesta.json())
+
+    def test_todas_validas_en_varios_lotes(self):
+        filas = [ingreso(descripcion=f'Factura {numero}') for numero in range(5)]
+        respuesta = self.post('/api/ingresos/bulk_create/', {'ingresos': filas})
+        self.assertEqual(respuesta.status_code, 201)
+        datos = respuesta.json()
+        self.assertEqual([fila['descripcion'] for fila in datos], [fila['descripcion'] for fila in filas])
+        self.assertTrue(all(fila['id'] for fila in datos))
+        self.assertEqual(Ingreso.objects.filter(usuario=self.usuario).count(), 5)
@@ -0,0 +1,249 @@
+# backend/accounts/tests/test_modelos_fiscales.py
+
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from accounts.autenticacion import token_para
+from accounts.modelos_fiscales import (
+    MOTIVO_SIN_130, MOTIVOS_SIN_303, modelo_130, modelo_303, modelos_trimestrales, obligado_130
+)
+from accounts.models import Ingreso, Gasto, PerfilAutonomo
+
+
+# Trimestres calculados a mano con las casillas de los modelos 130 y 303
+
+D = Decimal
+
+
+def trimestre(ingresos='0', gastos='0', retenido='0', con_retencion='0', devengado=None, deducible=None):
+    return {
+        'ingresos_totales': D(ingresos),
+        'gastos_totales': D(gastos),
+        'irpf_retenido': D(retenido),
+        'ingresos_con_retencion': D(con_retencion),
+        'devengado': devengado or {},
+        'deducible': deducible or {},
+    }
+
+
+class Modelo130Tests(SimpleTestCase):
+
+    def test_arrastre_de_pagos_y_negativos(self):
+        modelos = modelo_130([
+            trimestre('10000', '2000', '500'),
+            trimestre('1000', '6000'),
+            trimestre('20000', '2000', '1000'),
+            trimestre('0', '11000'),
+        ])
+        casillas = [modelo['casillas'] for modelo in modelos]
+
+        # T1: 20% de 8000 = 1600 - 500 retenido
+        self.assertEqual(casillas[0]['04'], D('1600.00'))
+        self.assertEqual(casillas[0]['19'], D('1100'))
+        # T2: acumulado 11000 - 8000 = 3000; 600 - 1100 pagado - 500 retenido
+        self.assertEqual(casillas[1]['03'], D('3000'))
+        self.assertEqual(casillas[1]['05'], D('1100'))
+        self.assertEqual(casillas[1]['07'], D('-1000'))
+        self.assertEqual(casillas[1]['19'], D('-1000'))
+        # T3: 20% de 21000 = 4200 - 1100 - 1500 = 1600; se deducen los 1000 negativos de T2
+        self.assertEqual(casillas[2]['05'], D('1100'))
+        self.assertEqual(casillas[2]['07'], D('1600'))
+        self.assertEqual(casillas[2]['15'], D('1000'))
+        self.assertEqual(casillas[2]['19'], D('600'))
+        # T4: 2000 - (1100 + 1600) - 1500
+        self.assertEqual(casillas[3]['05'], D('2700'))
+        self.assertEqual(casillas[3]['15'], D('0'))
+        self.assertEqual(casillas[3]['19'], D('-2200'))
+
+        self.assertEqual(
+            [(modelo['resultado'], modelo['importe']) for modelo in modelos],
+            [('a_ingresar', D('1100')), ('negativa', D('0')),
+             ('a_ingresar', D('600')), ('negativa', D('0'))]
+        )
+
+    def test_negativo_mayor_que_el_positivo_siguiente(self):
+        modelos = modelo_130([
+            trimestre('1000', '6000'),   # 20% de 0 -> 0; sin negativo en [19]
+            trimestre('10000', '0', '1500'),
+        ])
+        # Un rendimiento negativo no da [19] negativa si no hay retenciones
+        self.assertEqual(modelos[0]['casillas']['04'], D('0.00'))
+        self.assertEqual(modelos[0]['casillas']['19'], D('0.00'))
+        # T2: 20% de 5000 = 1000 - 1500 retenido = -500
+        self.assertEqual(modelos[1]['casillas']['19'], D('-500.00'))
+        self.assertEqual(modelos[1]['resultado'], 'negativa')
+
+    def test_redondeo_al_centimo(self):
+        # 20% de 100.03 = 20.006 -> 20.01 (mitad hacia arriba)
+        self.assertEqual(modelo_130([trimestre('100.03')])[0]['casillas']['04'], D('20.01'))
+        self.assertEqual(modelo_130([trimestre('100.02')])[0]['casillas']['04'], D('20.00'))
+
+
+class Obligado130Tests(SimpleTestCase):
+
+    def test_umbral_del_70(self):
+        casos = [
+            # (ingresos con retención del año anterior de 1000, obligado)
+            ('700.00', False),
+            ('699.99', True),
+            ('1000.00', False),
+            ('0', True),
+        ]
+        for con_retencion, obligado in casos:
+            with self.subTest(con_retencion=con_retencion):
+                anteriores = [trimestre('600', con_retencion=con_retencion), trimestre('400')]
+                self.assertIs(obligado_130([], anteriores, 15), obligado)
+
+    def test_sin_año_anterior_mira_este(self):
+        este = [trimestre('1000', con_retencion='800')]
+        self.assertFalse(obligado_130(este, [trimestre()], 0))
+        este = [trimestre('1000', con_retencion='100')]
+        self.assertTrue(obligado_130(este, [], 15))
+
+    def test_sin_ingresos_decide_la_retencion_por_defecto(self):
+        self.assertFalse(obligado_130([trimestre()], [], 15))
+        self.assertTrue(obligado_130([trimestre()], [], 0))
+
+
+class Modelo303Tests(SimpleTestCase):
+
+    def test_compensacion_y_devolucion_en_el_cuarto(self):
+        modelos = modelo_303([
+            trimestre(devengado={21: (D('1000'), D('210')), 0: (D('300'), D('0'))},
+                      deducible={21: (D('2000'), D('420'))}),
+            trimestre(devengado={21: (D('1000'), D('210')), 10: (D('500'), D('50'))},
+                      deducible={21: (D('100'), D('21'))}),
+            trimestre(devengado={4: (D('100'), D('4'))}, deducible={21: (D('1000'), D('210'))}),
+            trimestre(devengado={21: (D('500'), D('105'))}),
+        ])
+        casillas = [modelo['casillas'] for modelo in modelos]
+
+        # T1: 210 - 420 -> 210 a compensar; las operaciones al 0% no tienen casillas
+        self.assertEqual(casillas[0]['27'], D('210'))
+        self.assertEqual(casillas[0]['71'], D('-210'))
+        self.assertNotIn('10', casillas[0])
+        # T2: 260 - 21 = 239, se compensan los 210 -> 29
+        self.assertEqual([casillas[1][c] for c in ('04', '05', '06')], [D('500'), D('10'), D('50')])
+        self.assertEqual(casillas[1]['27'], D('260'))
+        self.assertEqual(casillas[1]['110'], D('210'))
+        self.assertEqual(casillas[1]['78'], D('210'))
+        self.assertEqual(casillas[1]['87'], D('0'))
+        self.assertEqual(casillas[1]['71'], D('29'))
+        # T3: 4 - 210 -> 206 a compensar
+        self.assertEqual(casillas[2]['71'], D('-206'))
+        # T4: 105 - 206 pendientes -> se piden 101
+        self.assertEqual(casillas[3]['78'], D('206'))
+        self.assertEqual(casillas[3]['71'], D('-101'))
+
+        self.assertEqual(
+            [(modelo['resultado'], modelo['importe']) for modelo in modelos],
+            [('a_compensar', D('210')), ('a_ingresar', D('29')),
+             ('a_compensar', D('206')), ('a_devolver', D('101'))]
+        )
+
+    def test_compensacion_parcial(self):
+        modelos = modelo_303([
+            trimestre(deducible={21: (D('1000'), D('210'))}),
+            trimestre(devengado={21: (D('500'), D('105'))}),
+            trimestre(devengado={21: (D('1000'), D('210'))}),
+        ])
+        # T2 solo puede compensar 105 de los 210: quedan 105 para T3
+        self.assertEqual(modelos[1]['casillas']['78'], D('105'))
+        self.assertEqual(modelos[1]['casillas']['87'], D('105'))
+        self.assertEqual(modelos[1]['resultado'], 'cero')
+        self.assertEqual(modelos[2]['casillas']['78'], D('105'))
+        self.assertEqual(modelos[2]['importe'], D('105'))
+
+    def test_regimenes_sin_303(self):
+        for regimen_iva in ('recargo', 'simplificado'):
+            with self.subTest(regimen_iva=regimen_iva):
+                self.assertEqual(
+                    modelo_303([trimestre(devengado={21: (D('100'), D('21'))})], regimen_iva),
+                    [{'aplica': False, 'motivo': MOTIVOS_SIN_303[regimen_iva]}]
+                )
+
+
+class ModelosTrimestralesTests(SimpleTestCase):
+
+    def test_recargo_tiene_130_y_no_303(self):
+        modelos = modelos_trimestrales([trimestre('1000')], [], 'recargo', 15)
+        self.assertTrue(modelos[0]['modelo_130']['aplica'])
+        self.assertEqual(modelos[0]['modelo_130']['importe'], D('200.00'))
+        self.assertFalse(modelos[0]['modelo_303']['aplica'])
+
+    def test_simplificado_sin_130_ni_303(self):
+        modelos = modelos_trimestrales([trimestre('1000')] * 4, [], 'simplificado', 15)
+        self.assertEqual(len(modelos), 4)
+        for modelo in modelos:
+            self.assertEqual(modelo['modelo_130'], {'aplica': False, 'motivo': MOTIVO_SIN_130})
+            self.assertFalse(modelo['modelo_303']['aplica'])
+
+
+@override_settings(PRESUPUESTO_QUERIES_ESTRICTO=True)
+class PagoFraccionadoVistasTests(TestCase):
+    """irpf_a_ingresar de calcular y rango sigue el régimen del perfil, como modelos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('modelos@example.com', 'modelos@example.com', 'x')
+        cls.perfil = PerfilAutonomo.objects.create(
+            usuario=cls.usuario, nombre_fiscal='Ana Pérez', nif='12345678Z', direccion='Mayor 1',
+            codigo_postal='28001', ciudad='Madrid', provincia='Madrid', tipo_irpf_default=15
+        )
+        for trimestre_, importe in ((1, '10000.00'), (2, '1000.00')):
+            Ingreso.objects.create(
+                usuario=cls.usuario, fecha=date(2025, trimestre_ * 3, 1), descripcion='Factura',
+                cliente='Cliente', importe=D(importe), iva_porcentaje=21, irpf_porcentaje=0,
+                trimestre=trimestre_, año=2025,
+            )
+        Gasto.objects.create(
+            usuario=cls.usuario, fecha=date(2025, 2, 1), descripcion='Material', proveedor='Proveedor',
+            importe=D('2000.00'), iva_porcentaje=21, trimestre=1, año=2025,
+        )
+
+    def setUp(self):
+        self.cabeceras = {'Authorization': f'Bearer {token_para(self.usuario).access_token}'}
+
+    def get(self, url):
+        return self.client.get(url, headers=self.cabeceras, SERVER_NAME='localhost').json()
+
+    async def aget(self, url):
+        respuesta = await self.async_client.get(url, headers=self.cabeceras, SERVER_NAME='localhost')
+        return respuesta.json()
+
+    def urls(self, prefijo):
+        return [
+            f'{prefijo}/resumen/calcular/?trimestre=2&año=2025',
+            f'{prefijo}/resumen/calcular/?trimestre=2&año=2025&detalle=false',
+        ]
+
+    def test_general(self):
+        # T1 8000 -> 1600; T2 acumulado 9000 -> 1800 - 1600 pagado = 200
+        for url in self.urls('/api'):
+            with self.subTest(url=url):
+                self.assertEqual(self.get(url)['irpf_a_ingresar'], '200.00')
+        trimestres = self.get('/api/resumen/rango/?desde=2025&hasta=2025')['trimestres']
+        self.assertEqual([t['irpf_a_ingresar'] for t in trimestres], ['1600.00', '200.00', '0.00', '0.00'])
+        modelos = self.get('/api/resumen/modelos/?año=2025')['trimestres']
+        self.assertEqual(modelos[1]['modelo_130']['importe'], '200.00')
+
+    def test_simplificado(self):
+        PerfilAutonomo.objects.filter(pk=self.perfil.pk).update(regimen_iva='simplificado')
+        for url in self.urls('/api'):
+            with self.subTest(url=url):
+                self.assertIsNone(self.get(url)['irpf_a_ingresar'])
+        trimestres = self.get('/api/resumen/rango/?desde=2025&hasta=2025')['trimestres']
+        self.assertEqual({t['irpf_a_ingresar'] for t in trimestres}, {None})
+        modelos = self.get('/api/resumen/modelos/?año=2025')['trimestres']
+        self.assertFalse(modelos[1]['modelo_130']['aplica'])
+
+    async def test_simplificado_asincronas(self):
+        await PerfilAutonomo.objects.filter(pk=self.perfil.pk).aupdate(regimen_iva='simplificado')
+        for url in self.urls('/api/async'):
+            with self.subTest(url=url):
+                self.assertIsNone((await self.aget(url))['irpf_a_ingresar'])
+        trimestres = (await self.aget('/api/async/resumen/rango/?desde=2025&hasta=2025'))['trimestres']
+        self.assertEqual({t['irpf_a_ingresar'] for t in trimestres}, {None})
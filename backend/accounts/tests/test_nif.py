@@ -0,0 +1,129 @@
+# backend/accounts/tests/test_nif.py
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from accounts.models import PerfilAutonomo
+from accounts.nif import (
+    CLAVE_GENERACION, FiltroNIF, NIFInvalido, _clave_nif, filtro_nifs, validar_nif
+)
+
+
+# Letras y dígitos de control calculados a mano:
+# - DNI: número % 23 en TRWAGMYFPDXBNJZSQVHLCKE (12345678 % 23 = 14 -> Z)
+# - NIE: X/Y/Z -> 0/1/2 delante del número (01234567 % 23 = 19 -> L)
+# - K/L/M: solo los 7 dígitos (1234567 % 23 = 19 -> L)
+# - CIF 2801586: impares 2,0,5,6 doblados y sumando cifras 4+0+1+3 = 8,
+#   pares 8+1+8 = 17, control (10 - 25 % 10) % 10 = 5 o la letra J..I[5] = E
+#   CIF 2826000: 4+4+0+0 + 8+6+0 = 22 -> 8 o H
+
+VALIDOS = [
+    ('12345678Z', '12345678Z'),
+    (' 12.345.678-z ', '12345678Z'),
+    ('00000000T', '00000000T'),
+    ('99999999R', '99999999R'),
+    ('X1234567L', 'X1234567L'),
+    ('Y1234567X', 'Y1234567X'),
+    ('z1234567r', 'Z1234567R'),
+    ('K1234567L', 'K1234567L'),
+    ('L1234567L', 'L1234567L'),
+    ('M1234567L', 'M1234567L'),
+    ('A28015865', 'A28015865'),  # Sociedad anónima: siempre dígito
+    ('B-28015865', 'B28015865'),
+    ('Q2826000H', 'Q2826000H'),  # Organismo público: siempre letra
+    ('N2801586E', 'N2801586E'),
+    ('G28015865', 'G28015865'),  # Asociación: dígito o letra
+    ('G2801586E', 'G2801586E'),
+]
+
+INVALIDOS = [
+    ('', 'El NIF es requerido'),
+    (None, 'El NIF es requerido'),
+    ('12345678A', 'La letra del DNI no es correcta'),
+    ('X1234567A', 'La letra del NIE no es correcta'),
+    ('K1234567A', 'La letra del NIE no es correcta'),
+    ('A28015866', 'El dígito de control del CIF no es correcto'),
+    ('A2801586E', 'El dígito de control del CIF no es correcto'),
+    ('Q28260008', 'El dígito de control del CIF no es correcto'),
+    ('N28015865', 'El dígito de control del CIF no es correcto'),
+    ('1234567Z', 'Formato de NIF no válido'),
+    ('123456789Z', 'Formato de NIF no válido'),
+    ('I2801586E', 'Formato de NIF no válido'),
+    ('X12345678L', 'Formato de NIF no válido'),
+]
+
+
+class ValidarNIFTests(SimpleTestCase):
+
+    def test_validos(self):
+        for valor, normalizado in VALIDOS:
+            with self.subTest(valor=valor):
+                self.assertEqual(validar_nif(valor), normalizado)
+
+    def test_invalidos(self):
+        for valor, motivo in INVALIDOS:
+            with self.subTest(valor=valor):
+                with self.assertRaisesMessage(NIFInvalido, motivo):
+                    validar_nif(valor)
+
+
+class FiltroNIFTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        filtro_nifs.invalidar()
+        # El filtro de otro worker: no ve lo que este proceso añade en memoria
+        self.otro_proceso = FiltroNIF()
+
+    def registrar(self, nif, email='nif@example.com'):
+        usuario = User.objects.create_user(email, email, 'x')
+        with self.captureOnCommitCallbacks(execute=True):
+            PerfilAutonomo.objects.create(
+                usuario=usuario, nombre_fiscal='Ana Pérez', nif=nif, direccion='Mayor 1',
+                codigo_postal='28001', ciudad='Madrid', provincia='Madrid'
+            )
+
+    def test_nif_registrado_en_otro_proceso(self):
+        self.assertFalse(self.otro_proceso.puede_existir('12345678Z'))
+        self.registrar('12345678Z')
+        # Sin rehacer el filtro: el NIF llega por la caché
+        with self.assertNumQueries(0):
+            self.assertTrue(self.otro_proceso.puede_existir('12345678Z'))
+            self.assertFalse(self.otro_proceso.puede_existir('00000000T'))
+
+    def test_varios_registros_seguidos(self):
+        self.assertFalse(self.otro_proceso.puede_existir('12345678Z'))
+        self.registrar('12345678Z')
+        self.registrar('X1234567L', 'nie@example.com')
+        with self.assertNumQueries(0):
+            self.assertTrue(self.otro_proceso.puede_existir('12345678Z'))
+            self.assertTrue(self.otro_proceso.puede_existir('X1234567L'))
+
+    def test_se_rehace_si_el_nif_ya_no_esta_en_la_cache(self):
+        self.assertFalse(self.otro_proceso.puede_existir('12345678Z'))
+        self.registrar('12345678Z')
+        cache.delete(_clave_nif(cache.get(CLAVE_GENERACION)))
+        # COUNT y lectura de los NIF
+        with self.assertNumQueries(2):
+            self.assertTrue(self.otro_proceso.puede_existir('12345678Z'))
+
+    def test_se_rehace_si_se_pierde_la_generacion(self):
+        self.registrar('12345678Z')
+        self.assertTrue(self.otro_proceso.puede_existir('12345678Z'))
+        cache.clear()
+        self.registrar('X1234567L', 'nie@example.com')
+        with self.assertNumQueries(2):
+            self.assertTrue(self.otro_proceso.puede_existir('X1234567L'))
+
+    def test_check_nif(self):
+        self.registrar('12345678Z')
+        for nif, esperado in (('12.345.678-z', {'exists': True}), ('00000000T', {'exists': False})):
+            with self.subTest(nif=nif):
+                respuesta = self.client.post('/api/check-nif/', {'nif': nif}, SERVER_NAME='localhost')
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertEqual(respuesta.json(), esperado)
+
+        respuesta = self.client.post('/api/check-nif/', {'nif': '12345678A'}, SERVER_NAME='localhost')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.json(), {'error': 'La letra del DNI no es correcta'})
@@ -0,0 +1,131 @@
+# backend/accounts/tests/test_paginacion.py
+
+from base64 import urlsafe_b64encode
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from accounts.autenticacion import token_para
+from accounts.models import Ingreso
+from accounts.pagination import FechaIdCursorPagination
+
+
+# Paginación por cursor (?paginacion=cursor) de los listados: recorre todas
+# las filas una sola vez aunque compartan fecha y aunque se inserten filas
+# mientras se pagina, y un cursor manipulado da 404.
+
+
+def cursor_de(texto):
+    return urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+@override_settings(PRESUPUESTO_QUERIES={})
+class CursorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('cursor@example.com', 'cursor@example.com', 'x')
+        # Siete filas el mismo día y tres en días distintos
+        fechas = [date(2025, 3, 10)] * 7 + [date(2025, 3, 11), date(2025, 2, 1), date(2025, 1, 5)]
+        for numero, fecha in enumerate(fechas):
+            Ingreso.objects.create(
+                usuario=cls.usuario, fecha=fecha, descripcion=f'Factura {numero}',
+                cliente='Cliente', importe=Decimal('100.00'), iva_porcentaje=21,
+                irpf_porcentaje=15, trimestre=1, año=2025
+            )
+        cls.orden = list(
+            Ingreso.objects.filter(usuario=cls.usuario).order_by('-fecha', '-id').values_list('id', flat=True)
+        )
+
+    def setUp(self):
+        self.cabeceras = {'Authorization': f'Bearer {token_para(self.usuario).access_token}'}
+
+    def get(self, url):
+        return self.client.get(url, headers=self.cabeceras, SERVER_NAME='localhost')
+
+    def recorrer(self, url, antes_de_cada_pagina=None):
+        """Sigue los `next` y devuelve los ids en el orden recibido"""
+        ids = []
+        while url:
+            if antes_de_cada_pagina:
+                antes_de_cada_pagina()
+            respuesta = self.get(url)
+            self.assertEqual(respuesta.status_code, 200)
+            datos = respuesta.json()
+            self.assertNotIn('count', datos)
+            ids += [fila['id'] for fila in datos['results']]
+            url = datos['next']
+        return ids
+
+    def test_recorrido_con_fechas_iguales(self):
+        for tamaño in (1, 2, 3, 7, 10, 50):
+            with self.subTest(page_size=tamaño):
+                ids = self.recorrer(f'/api/ingresos/?paginacion=cursor&page_size={tamaño}')
+                self.assertEqual(ids, self.orden)
+
+    def test_recorrido_asincrono(self):
+        ids = []
+        url = '/api/async/ingresos/?paginacion=cursor&page_size=3'
+        while url:
+            respuesta = self.client.get(url, headers=self.cabeceras, SERVER_NAME='localhost')
+            datos = respuesta.json()
+            ids += [fila['id'] for fila in datos['results']]
+            url = datos['next']
+        self.assertEqual(ids, self.orden)
+
+    def test_filas_nuevas_no_desplazan_las_paginas(self):
+        nuevas = []
+
+        def insertar():
+            nuevas.append(Ingreso.objects.create(
+                usuario=self.usuario, fecha=date(2025, 3, 31), descripcion='Nueva',
+                cliente='Cliente', importe=Decimal('1.00'), iva_porcentaje=21,
+                irpf_porcentaje=15, trimestre=1, año=2025
+            ))
+
+        ids = self.recorrer('/api/ingresos/?paginacion=cursor&page_size=3', insertar)
+        # La primera nueva sale en la primera página; las demás quedan por
+        # delante del cursor y no se repite ni se salta ninguna antigua
+        self.assertEqual(ids, [nuevas[0].pk] + self.orden)
+
+    def test_ida_y_vuelta_del_cursor(self):
+        paginador = FechaIdCursorPagination()
+        for fila in Ingreso.objects.filter(usuario=self.usuario):
+            with self.subTest(id=fila.pk):
+                cursor = paginador.codificar_cursor(fila)
+                self.assertNotIn('=', cursor)
+                self.assertEqual(paginador.decodificar_cursor(cursor), (fila.fecha, fila.pk))
+                self.assertEqual(
+                    paginador.codificar_cursor({'fecha': fila.fecha, 'id': fila.pk}), cursor
+                )
+
+        # El cursor de `next` continúa justo después de la última fila
+        datos = self.get('/api/ingresos/?paginacion=cursor&page_size=4').json()
+        cursor = datos['next'].split('cursor=')[1].split('&')[0]
+        ultima = Ingreso.objects.get(pk=datos['results'][-1]['id'])
+        self.assertEqual(paginador.decodificar_cursor(cursor), (ultima.fecha, ultima.pk))
+        siguiente = self.get(f'/api/ingresos/?cursor={cursor}&page_size=4').json()
+        self.assertEqual([fila['id'] for fila in siguiente['results']], self.orden[4:8])
+
+    def test_cursor_manipulado(self):
+        fecha = date(2025, 3, 10)
+        for nombre, cursor in (
+            ('no es base64', '!!!'),
+            ('sin separador', cursor_de('2025-03-10')),
+            ('fecha inválida', cursor_de('2025-13-10|5')),
+            ('id no numérico', cursor_de(f'{fecha.isoformat()}|x')),
+            ('campos de más', cursor_de(f'{fecha.isoformat()}|5|1')),
+            ('bytes no UTF-8', urlsafe_b64encode(b'\xff\xfe|1').decode()),
+        ):
+            with self.subTest(nombre):
+                respuesta = self.get(f'/api/ingresos/?cursor={cursor}')
+                self.assertEqual(respuesta.status_code, 404)
+                self.assertEqual(respuesta.json(), {'detail': 'Cursor inválido'})
+
+    def test_cursor_valido_fuera_de_rango(self):
+        # Bien formado pero anterior a todas las filas: página vacía
+        cursor = cursor_de(f'{(date(2025, 1, 5) - timedelta(days=1)).isoformat()}|1')
+        datos = self.get(f'/api/ingresos/?cursor={cursor}').json()
+        self.assertEqual(datos, {'next': None, 'results': []})
@@ -0,0 +1,181 @@
+# backend/accounts/tests/test_particiones.py
+
+from datetime import date
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+
+from accounts import particiones
+from accounts.models import Ingreso, Gasto
+
+
+# Particionado por año (accounts/particiones.py). Solo con PostgreSQL:
+#   POSTGRES_DB=helptax POSTGRES_HOST=... python manage.py test accounts.tests.test_particiones
+
+CON_PARTICIONES = connection.vendor == 'postgresql' and particiones.activo(connection)
+MOTIVO = 'Necesita PostgreSQL (POSTGRES_DB) con PARTICIONAR_POR_AÑO'
+
+INGRESOS = Ingreso._meta.db_table
+GASTOS = Gasto._meta.db_table
+AÑO_ANTIGUO = 1999  # Sin partición: cae en la DEFAULT
+
+
+def crear_ingreso(usuario, año):
+    return Ingreso.objects.create(
+        usuario=usuario, fecha=date(año, 2, 1), descripcion='Factura', cliente='ACME',
+        importe=Decimal('100.00'), iva_porcentaje=21, irpf_porcentaje=15, trimestre=1, año=año
+    )
+
+
+def crear_gasto(usuario, año):
+    return Gasto.objects.create(
+        usuario=usuario, fecha=date(año, 5, 1), descripcion='Fibra', proveedor='Movistar',
+        importe=Decimal('40.00'), iva_porcentaje=21, trimestre=2, año=año
+    )
+
+
+def filas(tabla):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(tabla)}')
+        return cursor.fetchone()[0]
+
+
+def clave_primaria(tabla):
+    """Columnas de la clave primaria de `tabla`, en orden"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT a.attname FROM pg_index i "
+            "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey) "
+            "WHERE i.indrelid = to_regclass(%s) AND i.indisprimary "
+            "ORDER BY array_position(i.indkey::int2[], a.attnum)",
+            [tabla]
+        )
+        return [fila[0] for fila in cursor.fetchall()]
+
+
+def indices(tabla):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s", [tabla])
+        return {fila[0] for fila in cursor.fetchall()}
+
+
+def claves_ajenas(tabla):
+    """{nombre: definición} de las claves ajenas de `tabla`"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+            [tabla]
+        )
+        return dict(cursor.fetchall())
+
+
+def esta_particionada(tabla):
+    with connection.cursor() as cursor:
+        return particiones.esta_particionada(cursor, tabla)
+
+
+@skipUnless(CON_PARTICIONES, MOTIVO)
+class MigracionParticionesTests(TransactionTestCase):
+    """0008_particiones_anuales hacia atrás y hacia delante con datos"""
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('particiones@example.com', 'particiones@example.com', 'x')
+        self.ingresos = [crear_ingreso(self.usuario, 2024), crear_ingreso(self.usuario, AÑO_ANTIGUO)]
+        self.gasto = crear_gasto(self.usuario, 2024)
+
+    def comprobar_tabla(self, tabla, clave, indices_antes, claves_antes):
+        self.assertEqual(clave_primaria(tabla), clave)
+        self.assertEqual(indices(tabla) - {f'{tabla}_pkey'}, indices_antes)
+        self.assertEqual(claves_ajenas(tabla), claves_antes)
+
+    def test_migrar_hacia_atras_y_adelante(self):
+        antes = {
+            tabla: (indices(tabla) - {f'{tabla}_pkey'}, claves_ajenas(tabla))
+            for tabla in (INGRESOS, GASTOS)
+        }
+        self.assertTrue(esta_particionada(INGRESOS))
+        self.assertEqual(clave_primaria(INGRESOS), ['id', 'año'])
+        self.assertIn('usuario_id', ' '.join(antes[INGRESOS][1].values()))
+
+        self.addCleanup(call_command, 'migrate', 'accounts', verbosity=0)
+        call_command('migrate', 'accounts', '0007', verbosity=0)
+        for tabla in (INGRESOS, GASTOS):
+            self.assertFalse(esta_particionada(tabla))
+            self.comprobar_tabla(tabla, ['id'], *antes[tabla])
+        self.assertEqual(
+            sorted(Ingreso.objects.values_list('id', flat=True)),
+            sorted(ingreso.id for ingreso in self.ingresos)
+        )
+        # La identidad sigue después del último id
+        self.assertGreater(crear_ingreso(self.usuario, 2024).id, max(i.id for i in self.ingresos))
+
+        call_command('migrate', 'accounts', verbosity=0)
+        for tabla in (INGRESOS, GASTOS):
+            self.assertTrue(esta_particionada(tabla))
+            self.comprobar_tabla(tabla, ['id', 'año'], *antes[tabla])
+        self.assertEqual(Ingreso.objects.count(), 3)
+        self.assertEqual(filas(particiones.nombre_particion(INGRESOS, 2024)), 2)
+        self.assertEqual(filas(particiones.nombre_particion(GASTOS, 2024)), 1)
+        # La secuencia nueva sigue después del último id
+        ultimo = Ingreso.objects.order_by('-id').values_list('id', flat=True).first()
+        self.assertGreater(crear_ingreso(self.usuario, 2025).id, ultimo)
+
+        # Las claves ajenas se han vuelto a crear
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Ingreso.objects.filter(pk=self.ingresos[0].pk).update(usuario_id=self.usuario.pk + 1000)
+
+
+@skipUnless(CON_PARTICIONES, MOTIVO)
+class ParticionesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('anual@example.com', 'anual@example.com', 'x')
+
+    def test_asegurar_particiones_saca_las_filas_de_la_default(self):
+        otros = particiones.nombre_defecto(INGRESOS)
+        ingreso = crear_ingreso(self.usuario, AÑO_ANTIGUO)
+        self.assertEqual(filas(otros), 1)
+
+        creadas = particiones.asegurar_particiones(connection)
+
+        self.assertIn((INGRESOS, AÑO_ANTIGUO), creadas)
+        self.assertNotIn((GASTOS, AÑO_ANTIGUO), creadas)
+        self.assertEqual(filas(otros), 0)
+        self.assertEqual(filas(particiones.nombre_particion(INGRESOS, AÑO_ANTIGUO)), 1)
+        self.assertEqual(Ingreso.objects.get(año=AÑO_ANTIGUO).pk, ingreso.pk)
+        # Ya no queda nada que mover
+        self.assertEqual(particiones.asegurar_particiones(connection), [])
+
+    def test_desacoplar(self):
+        particiones.asegurar_particiones(connection, [2020, 2021])
+        crear_ingreso(self.usuario, 2020)
+        crear_ingreso(self.usuario, 2021)
+
+        particion = particiones.desacoplar(INGRESOS, 2020, connection)
+
+        self.assertEqual(particion, particiones.nombre_particion(INGRESOS, 2020))
+        self.assertEqual(list(Ingreso.objects.values_list('año', flat=True)), [2021])
+        self.assertEqual(filas(particion), 1)
+        self.assertNotIn(particion, [fila[1] for fila in particiones.particiones(connection)])
+        # Un ingreso nuevo de ese año va a la DEFAULT hasta que se vuelva a crear
+        crear_ingreso(self.usuario, 2020)
+        self.assertEqual(filas(particiones.nombre_defecto(INGRESOS)), 1)
+
+    def test_consulta_de_un_año_solo_lee_su_particion(self):
+        particiones.asegurar_particiones(connection, [2024, 2025])
+        for año in (2024, 2025, AÑO_ANTIGUO):
+            crear_ingreso(self.usuario, año)
+            crear_gasto(self.usuario, año)
+
+        for modelo in (Ingreso, Gasto):
+            tabla = modelo._meta.db_table
+            plan = modelo.objects.filter(usuario=self.usuario, año=2025).explain()
+            self.assertIn(particiones.nombre_particion(tabla, 2025), plan)
+            self.assertNotIn(particiones.nombre_particion(tabla, 2024), plan)
+            self.assertNotIn(particiones.nombre_defecto(tabla), plan)
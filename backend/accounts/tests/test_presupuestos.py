@@ -0,0 +1,155 @@
+# backend/accounts/tests/test_presupuestos.py
+
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from accounts.autenticacion import token_para
+from accounts.descargas import url_firmada
+from accounts.metricas import PresupuestoQueriesSuperado, registro
+from accounts.models import Ingreso, Gasto, PerfilAutonomo
+
+
+# Cada vista de PRESUPUESTO_QUERIES (settings) con datos de dos años: no pasa
+# de su presupuesto y, si se le baja, PRESUPUESTO_QUERIES_ESTRICTO lo detecta.
+# Se autentica con un token real, como el frontend: el usuario sale de él.
+
+MEDIA_TEMPORAL = tempfile.mkdtemp()
+
+AÑOS = (2024, 2025)
+FILAS_POR_TRIMESTRE = 3
+
+
+def urls(ingreso, gasto):
+    """URL de cada vista con presupuesto"""
+    return {
+        'ingreso-list': '/api/ingresos/?año=2025',
+        'ingreso-detail': f'/api/ingresos/{ingreso.pk}/',
+        'gasto-list': '/api/gastos/',
+        'gasto-detail': f'/api/gastos/{gasto.pk}/',
+        'resumen-calcular': '/api/resumen/calcular/?trimestre=2&año=2025',
+        'resumen-rango': '/api/resumen/rango/?desde=2024&hasta=2025',
+        'resumen-modelos': '/api/resumen/modelos/?año=2025',
+        'resumen-dashboard-stats': '/api/resumen/dashboard_stats/',
+        'cliente-list': '/api/clientes/',
+        'proveedor-list': '/api/proveedores/',
+        'gasto-factura': f'/api/gastos/{gasto.pk}/factura/',
+        'factura-firmada': url_firmada()(gasto.factura.name),
+        'check-auth': '/api/check-auth/',
+        'current-user': '/api/user/me/',
+        'perfil-autonomo': '/api/user/perfil/',
+        'async-ingreso-list': '/api/async/ingresos/?año=2025',
+        'async-gasto-list': '/api/async/gastos/',
+        'async-resumen-calcular': '/api/async/resumen/calcular/?trimestre=2&año=2025',
+        'async-resumen-rango': '/api/async/resumen/rango/?desde=2024&hasta=2025',
+        'async-resumen-modelos': '/api/async/resumen/modelos/?año=2025',
+        'async-resumen-dashboard-stats': '/api/async/resumen/dashboard_stats/',
+    }
+
+
+@override_settings(
+    PRESUPUESTO_QUERIES_ESTRICTO=True, FACTURAS_PROCESOS=0, MEDIA_ROOT=MEDIA_TEMPORAL
+)
+class PresupuestosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('presupuestos@example.com', 'presupuestos@example.com', 'x')
+        PerfilAutonomo.objects.create(
+            usuario=cls.usuario, nombre_fiscal='Ana Pérez', nif='12345678Z', direccion='Mayor 1',
+            codigo_postal='28001', ciudad='Madrid', provincia='Madrid'
+        )
+        for año in AÑOS:
+            for trimestre in range(1, 5):
+                for numero in range(FILAS_POR_TRIMESTRE):
+                    fecha = date(año, trimestre * 3, 1 + numero)
+                    cls.ingreso = Ingreso.objects.create(
+                        usuario=cls.usuario, fecha=fecha, descripcion='Factura',
+                        cliente=f'Cliente {numero}', importe=Decimal('1000.00'),
+                        iva_porcentaje=21, irpf_porcentaje=15, trimestre=trimestre, año=año
+                    )
+                    cls.gasto = Gasto.objects.create(
+                        usuario=cls.usuario, fecha=fecha, descripcion='Material',
+                        proveedor=f'Proveedor {numero}', importe=Decimal('120.00'),
+                        iva_porcentaje=21, trimestre=trimestre, año=año
+                    )
+        cls.gasto.factura = SimpleUploadedFile('factura.pdf', b'%PDF-1.4 factura')
+        cls.gasto.save()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_TEMPORAL, ignore_errors=True)
+
+    def setUp(self):
+        # dashboard_stats tiene que calcularse, no salir de la caché
+        cache.clear()
+        self.cabeceras = {'Authorization': f'Bearer {token_para(self.usuario).access_token}'}
+        self.urls = urls(self.ingreso, self.gasto)
+
+    def get(self, url):
+        return self.client.get(url, headers=self.cabeceras, SERVER_NAME='localhost')
+
+    async def aget(self, url):
+        return await self.async_client.get(url, headers=self.cabeceras, SERVER_NAME='localhost')
+
+    def test_todas_las_vistas_con_presupuesto_tienen_url(self):
+        self.assertEqual(set(self.urls), set(settings.PRESUPUESTO_QUERIES))
+
+    def test_vistas_dentro_del_presupuesto(self):
+        for vista, url in self.urls.items():
+            if vista.startswith('async-'):
+                continue
+            with self.subTest(vista=vista):
+                self.assertEqual(self.get(url).status_code, 200)
+
+    async def test_vistas_asincronas_dentro_del_presupuesto(self):
+        for vista, url in self.urls.items():
+            if not vista.startswith('async-'):
+                continue
+            with self.subTest(vista=vista):
+                self.assertEqual((await self.aget(url)).status_code, 200)
+
+    def test_presupuesto_superado(self):
+        # Con -1 hasta una vista sin queries lo supera: comprueba que el
+        # middleware encuentra el presupuesto por el nombre de la vista
+        for vista, url in self.urls.items():
+            if vista.startswith('async-'):
+                continue
+            with self.subTest(vista=vista), override_settings(PRESUPUESTO_QUERIES={vista: -1}):
+                cache.clear()
+                with self.assertRaisesMessage(PresupuestoQueriesSuperado, f'{vista}: '):
+                    self.get(url)
+
+    async def test_presupuesto_superado_asincronas(self):
+        for vista, url in self.urls.items():
+            if not vista.startswith('async-'):
+                continue
+            with self.subTest(vista=vista), override_settings(PRESUPUESTO_QUERIES={vista: -1}):
+                await cache.aclear()
+                with self.assertRaisesMessage(PresupuestoQueriesSuperado, f'{vista}: '):
+                    await self.aget(url)
+
+    @override_settings(PRESUPUESTO_QUERIES_ESTRICTO=False, PRESUPUESTO_QUERIES={'gasto-list': -1})
+    def test_sin_modo_estricto_solo_se_registra(self):
+        antes = registro.superados.get('gasto-list', 0)
+        with self.assertLogs('accounts.metricas', 'WARNING'):
+            self.assertEqual(self.get(self.urls['gasto-list']).status_code, 200)
+        self.assertEqual(registro.superados['gasto-list'], antes + 1)
+
+    @override_settings(PRESUPUESTO_QUERIES={'gasto-list': -1})
+    def test_escrituras_sin_presupuesto(self):
+        respuesta = self.client.post(
+            '/api/gastos/', {
+                'fecha': '2025-01-02', 'descripcion': 'Papel', 'proveedor': 'Papelería',
+                'importe': '10.00', 'iva_porcentaje': 21, 'trimestre': 1, 'año': 2025,
+            }, headers=self.cabeceras, SERVER_NAME='localhost', content_type='application/json'
+        )
+        self.assertEqual(respuesta.status_code, 201)
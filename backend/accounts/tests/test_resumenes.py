@@ -0,0 +1,129 @@
+# backend/accounts/tests/test_resumenes.py
+
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from accounts.lotes import crear_en_lotes
+from accounts.models import Ingreso, Gasto, ResumenTrimestral
+from accounts.resumen import CAMPOS_RESUMEN, reconstruir_resumenes
+
+
+# ResumenTrimestral se mantiene con deltas (signals.py y lotes.py). Tras cada
+# operación tiene que coincidir con lo que deja reconstruir_resumenes, que lo
+# recalcula desde ingresos y gastos. Importes con céntimos impares para que
+# el IVA y el IRPF tengan 4 decimales.
+
+CAMPOS = CAMPOS_RESUMEN + ['beneficio_neto', 'iva_a_pagar']
+
+
+class ResumenMaterializadoTests(TestCase):
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('resumen@example.com', 'resumen@example.com', 'x')
+
+    def ingreso(self, **campos):
+        valores = {
+            'usuario': self.usuario, 'fecha': date(2025, 2, 3), 'descripcion': 'Factura',
+            'cliente': 'Cliente', 'importe': Decimal('33.33'), 'iva_porcentaje': 21,
+            'irpf_porcentaje': 15, 'trimestre': 1, 'año': 2025,
+        }
+        valores.update(campos)
+        return Ingreso(**valores)
+
+    def gasto(self, **campos):
+        valores = {
+            'usuario': self.usuario, 'fecha': date(2025, 2, 3), 'descripcion': 'Material',
+            'proveedor': 'Proveedor', 'importe': Decimal('10.01'), 'iva_porcentaje': 21,
+            'trimestre': 1, 'año': 2025,
+        }
+        valores.update(campos)
+        return Gasto(**valores)
+
+    def resumenes(self):
+        """
+        {(trimestre, año): cifras} del usuario. Un trimestre que se queda
+        sin filas conserva su resumen a cero; reconstruir no lo crea.
+        """
+        resumenes = {}
+        for fila in ResumenTrimestral.objects.filter(usuario=self.usuario).values('trimestre', 'año', *CAMPOS):
+            clave = (fila.pop('trimestre'), fila.pop('año'))
+            if any(fila.values()):
+                resumenes[clave] = fila
+        return resumenes
+
+    def assertIgualQueReconstruido(self):
+        materializado = self.resumenes()
+        reconstruir_resumenes(usuarios=[self.usuario.pk])
+        self.assertEqual(materializado, self.resumenes())
+        return materializado
+
+    def test_crear(self):
+        self.ingreso().save()
+        self.ingreso(importe=Decimal('10.00'), irpf_porcentaje=7).save()
+        self.gasto().save()
+        resumen = self.assertIgualQueReconstruido()[(1, 2025)]
+        self.assertEqual(resumen['num_ingresos'], 2)
+        self.assertEqual(resumen['ingresos_totales'], Decimal('43.33'))
+        self.assertEqual(resumen['iva_repercutido'], Decimal('9.0993'))
+        self.assertEqual(resumen['irpf_retenido'], Decimal('5.6995'))
+        self.assertEqual(resumen['beneficio_neto'], Decimal('33.32'))
+
+    def test_cambio_de_trimestre(self):
+        ingreso = self.ingreso()
+        ingreso.save()
+        self.gasto().save()
+        ingreso.fecha, ingreso.trimestre = date(2025, 5, 3), 2
+        ingreso.save()
+        resumenes = self.assertIgualQueReconstruido()
+        self.assertEqual(resumenes[(2, 2025)]['num_ingresos'], 1)
+        self.assertEqual(resumenes[(1, 2025)]['num_ingresos'], 0)
+
+    def test_cambio_de_año(self):
+        gasto = self.gasto()
+        gasto.save()
+        gasto.fecha, gasto.año = date(2024, 2, 3), 2024
+        gasto.save()
+        self.assertEqual(list(self.assertIgualQueReconstruido()), [(1, 2024)])
+
+    def test_cambio_de_porcentajes_e_importe(self):
+        ingreso = self.ingreso()
+        ingreso.save()
+        gasto = self.gasto()
+        gasto.save()
+        ingreso.iva_porcentaje, ingreso.irpf_porcentaje = 10, 7
+        ingreso.save()
+        gasto.importe, gasto.iva_porcentaje = Decimal('20.03'), 4
+        gasto.save()
+        resumen = self.assertIgualQueReconstruido()[(1, 2025)]
+        self.assertEqual(resumen['iva_a_pagar'], Decimal('3.3330') - Decimal('0.8012'))
+
+    def test_borrar(self):
+        ingresos = [self.ingreso(), self.ingreso(trimestre=2, fecha=date(2025, 5, 3))]
+        for ingreso in ingresos:
+            ingreso.save()
+        gasto = self.gasto()
+        gasto.save()
+        ingresos[0].delete()
+        gasto.delete()
+        self.assertEqual(list(self.assertIgualQueReconstruido()), [(2, 2025)])
+
+    def test_crear_en_lotes(self):
+        self.ingreso().save()
+        crear_en_lotes(Ingreso, [
+            self.ingreso(importe=Decimal('10.00')),
+            self.ingreso(trimestre=3, fecha=date(2025, 8, 1), irpf_porcentaje=0),
+        ], batch_size=1)
+        crear_en_lotes(Gasto, [self.gasto(), self.gasto(trimestre=4, fecha=date(2025, 11, 1))])
+        resumenes = self.assertIgualQueReconstruido()
+        self.assertEqual(resumenes[(1, 2025)]['num_ingresos'], 2)
+        self.assertEqual(resumenes[(1, 2025)]['ingresos_totales'], Decimal('43.33'))
+        self.assertEqual(sorted(resumenes), [(1, 2025), (3, 2025), (4, 2025)])
+
+    def test_crear_en_lotes_y_despues_borrar(self):
+        creados = crear_en_lotes(Ingreso, [self.ingreso(), self.ingreso(trimestre=2)])
+        for ingreso in creados:
+            ingreso.delete()
+        self.assertEqual(self.assertIgualQueReconstruido(), {})
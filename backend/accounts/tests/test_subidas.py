@@ -0,0 +1,164 @@
+# backend/accounts/tests/test_subidas.py
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from accounts.autenticacion import token_para
+from accounts.models import ArchivoFactura, SubidaFactura
+from accounts.subidas import nombre_contenido, ruta_temporal
+
+
+# Subidas por trozos: cada trozo tiene que empezar justo en lo recibido (si
+# no, 409 con el offset por el que seguir), el SHA-256 declarado se comprueba
+# al final y el mismo contenido se guarda una sola vez.
+
+TEMPORAL = tempfile.mkdtemp()
+CONTENIDO = b'%PDF-1.4 factura ' + bytes(range(256)) * 4
+
+
+def sha256(datos):
+    return hashlib.sha256(datos).hexdigest()
+
+
+@override_settings(
+    MEDIA_ROOT=os.path.join(TEMPORAL, 'media'), SUBIDAS_DIR=os.path.join(TEMPORAL, 'subidas'),
+    FACTURAS_PROCESOS=0, PRESUPUESTO_QUERIES={}
+)
+class SubidasTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMPORAL, ignore_errors=True)
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('subidas@example.com', 'subidas@example.com', 'x')
+
+    def cabeceras(self, usuario=None):
+        return {'Authorization': f'Bearer {token_para(usuario or self.usuario).access_token}'}
+
+    def crear(self, usuario=None, **datos):
+        datos = {'nombre': 'factura.pdf', 'tamaño': len(CONTENIDO), **datos}
+        respuesta = self.client.post(
+            '/api/subidas/', datos, content_type='application/json',
+            headers=self.cabeceras(usuario), SERVER_NAME='localhost'
+        )
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        return respuesta.json()
+
+    def trozo(self, subida, offset, datos, usuario=None):
+        cabeceras = self.cabeceras(usuario)
+        if offset is not None:
+            cabeceras['Upload-Offset'] = str(offset)
+        return self.client.patch(
+            f'/api/subidas/{subida["id"]}/trozo/', datos, content_type='application/offset+octet-stream',
+            headers=cabeceras, SERVER_NAME='localhost'
+        )
+
+    def subir(self, subida, usuario=None, tamaño_trozo=400):
+        for offset in range(0, len(CONTENIDO), tamaño_trozo):
+            respuesta = self.trozo(subida, offset, CONTENIDO[offset:offset + tamaño_trozo], usuario)
+            self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        return respuesta
+
+    def test_subida_por_trozos(self):
+        subida = self.crear()
+        self.assertEqual(self.trozo(subida, 0, CONTENIDO[:400])['Upload-Offset'], '400')
+
+        # Al reanudar, HEAD dice por dónde va
+        respuesta = self.client.head(
+            f'/api/subidas/{subida["id"]}/', headers=self.cabeceras(), SERVER_NAME='localhost'
+        )
+        self.assertEqual((respuesta['Upload-Offset'], respuesta['Upload-Length']), ('400', str(len(CONTENIDO))))
+
+        self.trozo(subida, 400, CONTENIDO[400:800])
+        datos = self.trozo(subida, 800, CONTENIDO[800:]).json()
+        self.assertTrue(datos['completa'])
+        self.assertEqual(datos['sha256'], sha256(CONTENIDO))
+
+        guardada = SubidaFactura.objects.get(pk=subida['id'])
+        archivo = guardada.archivo
+        self.assertEqual(archivo.archivo.name, nombre_contenido(sha256(CONTENIDO), 'pdf'))
+        with default_storage.open(archivo.archivo.name) as f:
+            self.assertEqual(f.read(), CONTENIDO)
+        self.assertFalse(os.path.exists(ruta_temporal(guardada)))
+
+    def test_offset_incorrecto(self):
+        subida = self.crear()
+        self.trozo(subida, 0, CONTENIDO[:400])
+        for nombre, offset in (('reintento de un trozo guardado', 0), ('hueco', 500), ('por detrás', 399)):
+            with self.subTest(nombre):
+                respuesta = self.trozo(subida, offset, CONTENIDO[offset:offset + 100])
+                self.assertEqual(respuesta.status_code, 409)
+                self.assertEqual(respuesta.json()['recibido'], 400)
+                self.assertEqual(respuesta['Upload-Offset'], '400')
+
+        # Se sigue desde lo que dice el 409 y el contenido queda intacto
+        self.trozo(subida, 400, CONTENIDO[400:])
+        self.assertEqual(SubidaFactura.objects.get(pk=subida['id']).sha256, sha256(CONTENIDO))
+
+        respuesta = self.trozo(subida, len(CONTENIDO), b'x')
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(respuesta.json()['error'], 'La subida ya está completa')
+
+    def test_trozos_rechazados(self):
+        subida = self.crear()
+        for nombre, offset, datos, error in (
+            ('sin offset', None, CONTENIDO[:10], 'Falta la cabecera Upload-Offset'),
+            ('vacío', 0, b'', 'El trozo está vacío'),
+            ('más grande que lo declarado', 0, CONTENIDO + b'x', 'El trozo pasa del tamaño declarado'),
+        ):
+            with self.subTest(nombre):
+                respuesta = self.trozo(subida, offset, datos)
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertEqual(respuesta.json()['error'], error)
+        self.assertEqual(SubidaFactura.objects.get(pk=subida['id']).recibido, 0)
+
+        # Las subidas de otro usuario no existen para este
+        otro = User.objects.create_user('otro@example.com', 'otro@example.com', 'x')
+        self.assertEqual(self.trozo(subida, 0, CONTENIDO[:10], otro).status_code, 404)
+
+    def test_sha256_distinto_del_declarado(self):
+        subida = self.crear(sha256=sha256(b'otro contenido'))
+        self.trozo(subida, 0, CONTENIDO[:400])
+        respuesta = self.trozo(subida, 400, CONTENIDO[400:])
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(respuesta.json()['recibido'], 0)
+        self.assertIn('SHA-256', respuesta.json()['error'])
+
+        guardada = SubidaFactura.objects.get(pk=subida['id'])
+        self.assertEqual((guardada.recibido, guardada.archivo), (0, None))
+        self.assertFalse(os.path.exists(ruta_temporal(guardada)))
+        self.assertFalse(ArchivoFactura.objects.exists())
+
+    def test_mismo_contenido_se_guarda_una_vez(self):
+        otro = User.objects.create_user('otro@example.com', 'otro@example.com', 'x')
+        self.subir(self.crear())
+        self.subir(self.crear(otro), otro, tamaño_trozo=1000)
+
+        self.assertEqual(ArchivoFactura.objects.count(), 1)
+        self.assertEqual(
+            set(SubidaFactura.objects.values_list('archivo__sha256', flat=True)), {sha256(CONTENIDO)}
+        )
+        directorio = os.path.dirname(default_storage.path(nombre_contenido(sha256(CONTENIDO), 'pdf')))
+        self.assertEqual(len(os.listdir(directorio)), 1)
+
+    def test_contenido_ya_subido_por_el_mismo_usuario(self):
+        self.subir(self.crear())
+        # Declarando el hash nace completa sin mandar nada
+        subida = self.crear(sha256=sha256(CONTENIDO).upper(), nombre='copia.pdf')
+        self.assertTrue(subida['completa'])
+        self.assertEqual(subida['recibido'], len(CONTENIDO))
+
+        # Otro usuario con el mismo hash tiene que subirlo (no se revela qué hay)
+        otro = User.objects.create_user('otro@example.com', 'otro@example.com', 'x')
+        subida = self.crear(otro, sha256=sha256(CONTENIDO))
+        self.assertFalse(subida['completa'])
+        self.subir(subida, otro)
+        self.assertEqual(ArchivoFactura.objects.count(), 1)
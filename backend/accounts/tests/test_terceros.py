@@ -0,0 +1,167 @@
+# backend/accounts/tests/test_terceros.py
+
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from accounts.autenticacion import token_para
+from accounts.lotes import crear_en_lotes
+from accounts.models import Ingreso, Gasto, Cliente, Proveedor
+from accounts.terceros import autocompletar, normalizar_nombre, resolver_terceros
+
+
+# Clientes y proveedores normalizados: las variantes de un mismo nombre
+# (mayúsculas, tildes, espacios) van a una sola fila, sus contadores siguen
+# a cada alta, cambio y borrado, y el autocompletado busca por prefijo.
+
+
+def ingreso(usuario, cliente, importe='100.00', **campos):
+    datos = {
+        'usuario': usuario, 'fecha': date(2025, 2, 1), 'descripcion': 'Factura', 'cliente': cliente,
+        'importe': Decimal(importe), 'iva_porcentaje': 21, 'irpf_porcentaje': 15,
+        'trimestre': 1, 'año': 2025,
+    }
+    datos.update(campos)
+    return Ingreso(**datos)
+
+
+class TercerosTests(TestCase):
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('terceros@example.com', 'terceros@example.com', 'x')
+
+    def assertContadores(self, cliente, num, total):
+        cliente.refresh_from_db()
+        self.assertEqual((cliente.num_facturas, cliente.total_facturado), (num, Decimal(total)))
+
+    def test_normalizar_nombre(self):
+        for nombre, normalizado in (
+            ('  Telefónica  S.A. ', 'telefonica s.a.'),
+            ('PEÑA\tY CÍA', 'pena y cia'),
+            (None, ''),
+            ('x' * 150, 'x' * 100),
+        ):
+            with self.subTest(nombre=nombre):
+                self.assertEqual(normalizar_nombre(nombre), normalizado)
+
+    def test_variantes_van_al_mismo_cliente(self):
+        variantes = ['Telefónica S.A.', '  telefonica   s.a. ', 'TELEFÓNICA S.A.', 'Telefonica\tS.A.']
+        ingreso(self.usuario, variantes[0]).save()
+        crear_en_lotes(Ingreso, [ingreso(self.usuario, nombre) for nombre in variantes[1:]])
+
+        cliente = Cliente.objects.get(usuario=self.usuario)
+        # Se queda con cómo se escribió la primera vez
+        self.assertEqual(cliente.nombre, 'Telefónica S.A.')
+        self.assertEqual(
+            set(Ingreso.objects.values_list('cliente_ref_id', flat=True)), {cliente.pk}
+        )
+        self.assertContadores(cliente, 4, '400.00')
+
+    def test_clientes_por_usuario(self):
+        otro = User.objects.create_user('otro@example.com', 'otro@example.com', 'x')
+        crear_en_lotes(Ingreso, [ingreso(self.usuario, 'Acme'), ingreso(otro, 'ACME')])
+        self.assertEqual(Cliente.objects.filter(nombre_normalizado='acme').count(), 2)
+
+    def test_queries_fijas_por_lote(self):
+        Cliente.objects.create(usuario=self.usuario, nombre='Acme', nombre_normalizado='acme')
+        for numero in (3, 30):
+            with self.subTest(filas=numero):
+                objetos = [ingreso(self.usuario, f'Cliente {numero} {i % 3}') for i in range(numero)]
+                objetos.append(ingreso(self.usuario, 'acme'))
+                # Lectura, alta de los nuevos y relectura
+                with self.assertNumQueries(3):
+                    resolver_terceros(Ingreso, objetos)
+                self.assertEqual(len({objeto.cliente_ref_id for objeto in objetos}), 4)
+
+    def test_contadores_al_modificar_y_borrar(self):
+        primero = ingreso(self.usuario, 'Acme', '100.00')
+        primero.save()
+        segundo = ingreso(self.usuario, 'acme ', '50.00')
+        segundo.save()
+        acme = Cliente.objects.get(nombre_normalizado='acme')
+        self.assertContadores(acme, 2, '150.00')
+
+        segundo.importe = Decimal('80.00')
+        segundo.save()
+        self.assertContadores(acme, 2, '180.00')
+
+        # Solo cambia la forma de escribirlo: sigue en el mismo cliente
+        segundo.cliente = 'ACME'
+        segundo.save()
+        self.assertContadores(acme, 2, '180.00')
+
+        segundo.cliente = 'Globex'
+        segundo.save()
+        globex = Cliente.objects.get(nombre_normalizado='globex')
+        self.assertContadores(acme, 1, '100.00')
+        self.assertContadores(globex, 1, '80.00')
+
+        segundo.delete()
+        self.assertContadores(globex, 0, '0.00')
+        primero.delete()
+        self.assertContadores(acme, 0, '0.00')
+
+    def test_contadores_de_proveedores(self):
+        gastos = crear_en_lotes(Gasto, [
+            Gasto(
+                usuario=self.usuario, fecha=date(2025, 2, 1), descripcion='Material', proveedor=nombre,
+                importe=Decimal('10.00'), iva_porcentaje=21, trimestre=1, año=2025
+            )
+            for nombre in ('Papelería Sol', 'PAPELERIA SOL')
+        ])
+        proveedor = Proveedor.objects.get(usuario=self.usuario)
+        self.assertEqual((proveedor.num_facturas, proveedor.total_facturado), (2, Decimal('20.00')))
+        Gasto.objects.get(pk=gastos[0].pk).delete()
+        proveedor.refresh_from_db()
+        self.assertEqual((proveedor.num_facturas, proveedor.total_facturado), (1, Decimal('10.00')))
+
+
+NOMBRES = ['Acme', 'Acme Ibérica', 'Ácaro Textil', 'acn', 'Acme 😀', 'Zeta', 'Ac']
+
+
+@override_settings(PRESUPUESTO_QUERIES={})
+class AutocompletarTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('autocompletar@example.com', 'autocompletar@example.com', 'x')
+        otro = User.objects.create_user('otro@example.com', 'otro@example.com', 'x')
+        crear_en_lotes(Ingreso, [ingreso(cls.usuario, nombre) for nombre in NOMBRES])
+        crear_en_lotes(Ingreso, [ingreso(otro, 'Acme Otro')])
+
+    def nombres(self, prefijo, limite=10):
+        return [cliente.nombre for cliente in autocompletar(Cliente, self.usuario, prefijo, limite)]
+
+    def test_prefijos(self):
+        for prefijo, esperado in (
+            ('acm', ['Acme', 'Acme Ibérica', 'Acme 😀']),
+            ('  ACME  ', ['Acme', 'Acme Ibérica', 'Acme 😀']),
+            ('acme i', ['Acme Ibérica']),
+            ('Á', ['Ac', 'Ácaro Textil', 'Acme', 'Acme Ibérica', 'Acme 😀', 'acn']),
+            ('acn', ['acn']),
+            ('acmf', []),
+            ('z', ['Zeta']),
+            ('', ['Ac', 'Ácaro Textil', 'Acme', 'Acme Ibérica', 'Acme 😀', 'acn', 'Zeta']),
+        ):
+            with self.subTest(prefijo=prefijo):
+                self.assertEqual(self.nombres(prefijo), esperado)
+
+    def test_limite(self):
+        self.assertEqual(self.nombres('a', limite=2), ['Ac', 'Ácaro Textil'])
+
+    def test_api(self):
+        cabeceras = {'Authorization': f'Bearer {token_para(self.usuario).access_token}'}
+        respuesta = self.client.get(
+            '/api/clientes/?q=acme&limite=2', headers=cabeceras, SERVER_NAME='localhost'
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(
+            respuesta.json(),
+            [
+                {'id': cliente.pk, 'nombre': cliente.nombre, 'num_facturas': 1, 'total_facturado': '100.00'}
+                for cliente in Cliente.objects.filter(usuario=self.usuario, nombre__in=['Acme', 'Acme Ibérica'])
+                .order_by('nombre_normalizado')
+            ]
+        )
@@ -2,13 +2,20 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import IngresoViewSet, GastoViewSet, ResumenTrimestralViewSet
+from .views import (
+    IngresoViewSet, GastoViewSet, ResumenTrimestralViewSet,
+    ClienteViewSet, ProveedorViewSet, SubidaFacturaViewSet, factura_firmada
+)
 from .auth_views import CurrentUserView, PerfilAutonomoView, check_auth, check_nif
+from . import vistas_async
 
 router = DefaultRouter()
 router.register(r'ingresos', IngresoViewSet, basename='ingreso')
 router.register(r'gastos', GastoViewSet, basename='gasto')
+router.register(r'clientes', ClienteViewSet, basename='cliente')
+router.register(r'proveedores', ProveedorViewSet, basename='proveedor')
 router.register(r'resumen', ResumenTrimestralViewSet, basename='resumen')
+router.register(r'subidas', SubidaFacturaViewSet, basename='subida')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -16,4 +23,14 @@ urlpatterns = [
     path('user/perfil/', PerfilAutonomoView.as_view(), name='perfil-autonomo'),
     path('check-auth/', check_auth, name='check-auth'),
     path('check-nif/', check_nif, name='check-nif'),
+    path('facturas/<str:firma>/', factura_firmada, name='factura-firmada'),
+    # Versiones asíncronas para servir con ASGI (misma salida)
+    path('async/ingresos/', vistas_async.ingresos, name='async-ingreso-list'),
+    path('async/gastos/', vistas_async.gastos, name='async-gasto-list'),
+    path('async/resumen/', vistas_async.resumenes, name='async-resumen-list'),
+    path('async/resumen/calcular/', vistas_async.calcular, name='async-resumen-calcular'),
+    path('async/resumen/rango/', vistas_async.rango, name='async-resumen-rango'),
+    path('async/resumen/modelos/', vistas_async.modelos, name='async-resumen-modelos'),
+    path('async/resumen/dashboard_stats/', vistas_async.dashboard_stats,
+         name='async-resumen-dashboard-stats'),
 ]
\ No newline at end of file
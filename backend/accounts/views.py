@@ -1,24 +1,135 @@
 # backend/accounts/views.py
 
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from django.db.models import Sum, Q
-from datetime import date, timedelta
-from decimal import Decimal
+from django.core.serializers.json import DjangoJSONEncoder
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_safe
+from datetime import date
+import json
+import time
 
-from .models import Ingreso, Gasto, PerfilAutonomo
+from .cache import obtener_dashboard_stats, estadisticas_cache
+from .models import (
+    Ingreso, Gasto, ResumenTrimestral, Cliente, Proveedor, SubidaFactura
+)
+from .descargas import leer_firma, servir_factura
+from .exportacion import exportar_csv, exportar_ndjson
+from .importacion import ErrorImportacion, abrir_importacion, importar, importar_por_bloques
+from .lectura import CAMPOS_INGRESO, CAMPOS_GASTO, con_miniatura, leer_ingresos, leer_gastos
+from .lotes import errores_por_fila
+from .metricas import cronometro, registro
+from .modelos_fiscales import aplica_130
+from .pagination import IngresoGastoPagination
+from .procesado import encolar
+from .parsers import TrozoParser, TrozoTusParser
+from .resumen import (
+    TRIMESTRE_MESES, fechas_trimestre, leer_resumen, leer_anteriores, resumen_de_filas,
+    con_pago_130, calcular_rango, estadisticas_dashboard, modelos_año, regimen_iva_usuario
+)
 from .serializers import (
     IngresoSerializer, GastoSerializer, ResumenTrimestralSerializer,
-    ResumenCalculadoSerializer, BulkIngresoSerializer, BulkGastoSerializer
+    ResumenCalculadoSerializer, ModelosAñoSerializer, BulkIngresoSerializer, BulkGastoSerializer,
+    ClienteSerializer, ProveedorSerializer, SubidaFacturaSerializer, AnalisisFacturaSerializer
 )
+from .subidas import ErrorSubida, OffsetIncorrecto, cancelar_subida, escribir_trozo
+from .terceros import autocompletar
+
+
+def filtrar_periodo(queryset, params):
+    """Filtros opcionales ?trimestre= y ?año="""
+    trimestre = params.get('trimestre', None)
+    año = params.get('año', None)
+    
+    if trimestre:
+        queryset = queryset.filter(trimestre=trimestre)
+    if año:
+        queryset = queryset.filter(año=año)
+    return queryset
+
+
+def importar_archivo(request, tipo):
+    """
+    Importa el archivo subido en `archivo` (CSV/XLSX). `columnas` (JSON)
+    indica cabeceras no estándar: {"importe": "Base imponible"}.
+    Con ?progreso=true responde en NDJSON con una línea por bloque procesado.
+    """
+    archivo = request.FILES.get('archivo')
+    if not archivo:
+        return Response(
+            {"error": "Debe adjuntar el archivo en el campo 'archivo'"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        mapeo = json.loads(request.data.get('columnas') or '{}')
+        if not isinstance(mapeo, dict):
+            raise ValueError("'columnas' debe ser un objeto JSON")
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    progreso = request.query_params.get('progreso', 'false').lower()
+    try:
+        if progreso not in ('true', '1', 'si'):
+            resultado = importar(archivo, archivo.name, tipo, request.user, mapeo)
+            return Response(resultado, status=status.HTTP_201_CREATED)
+        filas, indices = abrir_importacion(archivo, archivo.name, tipo, mapeo)
+    except ErrorImportacion as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # El archivo subido ya está en disco o memoria; se procesa mientras se responde
+    lineas = (
+        json.dumps(resultado, cls=DjangoJSONEncoder) + '\n'
+        for resultado in importar_por_bloques(filas, indices, tipo, request.user)
+    )
+    return StreamingHttpResponse(lineas, content_type='application/x-ndjson')
+
+
+def exportar_archivo(request, queryset, tipo):
+    """
+    Exporta el queryset en streaming como CSV (por defecto) o NDJSON
+    según ?formato=csv|ndjson, con los importes de IVA, IRPF y total.
+    """
+    formato = request.query_params.get('formato', 'csv').lower()
+    if formato not in ('csv', 'ndjson'):
+        return Response(
+            {"error": "Formato debe ser csv o ndjson"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    if formato == 'csv':
+        contenido = exportar_csv(queryset, tipo, request)
+        content_type = 'text/csv; charset=utf-8'
+    else:
+        contenido = exportar_ndjson(queryset, tipo, request)
+        content_type = 'application/x-ndjson; charset=utf-8'
+    
+    response = StreamingHttpResponse(contenido, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{tipo}.{formato}"'
+    return response
+
+
+class IgnorarAccept(BaseContentNegotiation):
+    """Para vistas que devuelven archivos: el Accept del navegador no aplica"""
+    
+    def select_parser(self, request, parsers):
+        return parsers[0]
+    
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
 
 
 class IngresoViewSet(viewsets.ModelViewSet):
     """ViewSet para gestionar Ingresos - Multi-tenant"""
     serializer_class = IngresoSerializer
+    pagination_class = IngresoGastoPagination
     parser_classes = [JSONParser, FormParser, MultiPartParser]
     permission_classes = [IsAuthenticated]  # Solo usuarios autenticados
     
@@ -30,44 +141,61 @@ class IngresoViewSet(viewsets.ModelViewSet):
         queryset = Ingreso.objects.filter(usuario=self.request.user)
         
         # Mantener los filtros existentes
-        trimestre = self.request.query_params.get('trimestre', None)
-        año = self.request.query_params.get('año', None)
-        
-        if trimestre:
-            queryset = queryset.filter(trimestre=trimestre)
-        if año:
-            queryset = queryset.filter(año=año)
-            
-        return queryset
+        return filtrar_periodo(queryset, self.request.query_params)
     
     def perform_create(self, serializer):
         """Asigna automáticamente el usuario al crear"""
         serializer.save(usuario=self.request.user)
     
+    def list(self, request, *args, **kwargs):
+        """
+        Listado por la ruta de lectura rápida: valores planos e importes
+        calculados en bloque, con la misma salida que IngresoSerializer
+        """
+        queryset = self.filter_queryset(self.get_queryset()).values(*CAMPOS_INGRESO)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(leer_ingresos(page))
+        return Response(leer_ingresos(queryset))
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Detalle por la ruta de lectura rápida"""
+        valores = get_object_or_404(self.get_queryset().values(*CAMPOS_INGRESO), pk=kwargs['pk'])
+        return Response(leer_ingresos([valores])[0])
+    
     @action(detail=False, methods=['post'])
     def bulk_create(self, request):
         """Crear múltiples ingresos de una vez"""
         serializer = BulkIngresoSerializer(data=request.data)
-        if serializer.is_valid():
-            ingresos_data = serializer.validated_data['ingresos']
-            ingresos = []
-            for ingreso_data in ingresos_data:
-                ingreso = Ingreso.objects.create(
-                    usuario=request.user,  # Asignar usuario
-                    **ingreso_data
-                )
-                ingresos.append(ingreso)
-            
+        if not serializer.is_valid():
+            # Errores por índice de fila; no se inserta nada si alguna falla
             return Response(
-                IngresoSerializer(ingresos, many=True).data,
-                status=status.HTTP_201_CREATED
+                errores_por_fila(serializer.errors, 'ingresos'),
+                status=status.HTTP_400_BAD_REQUEST
             )
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Inserción en lotes dentro de una transacción
+        ingresos = serializer.save(usuario=request.user)['ingresos']  # Asignar usuario
+        
+        with cronometro('serializacion'):
+            datos = IngresoSerializer(ingresos, many=True, context=self.get_serializer_context()).data
+        return Response(datos, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def importar(self, request):
+        """Importar ingresos desde un CSV o XLSX"""
+        return importar_archivo(request, 'ingresos')
+    
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """Exportar ingresos (respeta los filtros de trimestre y año)"""
+        return exportar_archivo(request, self.get_queryset(), 'ingresos')
 
 
 class GastoViewSet(viewsets.ModelViewSet):
     """ViewSet para gestionar Gastos - Multi-tenant"""
     serializer_class = GastoSerializer
+    pagination_class = IngresoGastoPagination
     parser_classes = [JSONParser, FormParser, MultiPartParser]
     permission_classes = [IsAuthenticated]
     
@@ -75,179 +203,357 @@ class GastoViewSet(viewsets.ModelViewSet):
         """Filtra gastos solo del usuario autenticado"""
         queryset = Gasto.objects.filter(usuario=self.request.user)
         
-        trimestre = self.request.query_params.get('trimestre', None)
-        año = self.request.query_params.get('año', None)
-        
-        if trimestre:
-            queryset = queryset.filter(trimestre=trimestre)
-        if año:
-            queryset = queryset.filter(año=año)
-            
-        return queryset
+        return filtrar_periodo(queryset, self.request.query_params)
     
     def perform_create(self, serializer):
         """Asigna automáticamente el usuario al crear"""
         serializer.save(usuario=self.request.user)
     
+    def list(self, request, *args, **kwargs):
+        """
+        Listado por la ruta de lectura rápida: valores planos e importes
+        calculados en bloque, con la misma salida que GastoSerializer
+        """
+        queryset = con_miniatura(self.filter_queryset(self.get_queryset()))
+        queryset = queryset.values(*CAMPOS_GASTO, 'miniatura_nombre')
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(leer_gastos(page, request))
+        return Response(leer_gastos(queryset, request))
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Detalle por la ruta de lectura rápida"""
+        queryset = con_miniatura(self.get_queryset()).values(*CAMPOS_GASTO, 'miniatura_nombre')
+        valores = get_object_or_404(queryset, pk=kwargs['pk'])
+        return Response(leer_gastos([valores], request)[0])
+    
     @action(detail=False, methods=['post'])
     def bulk_create(self, request):
         """Crear múltiples gastos de una vez"""
-        serializer = BulkGastoSerializer(data=request.data)
-        if serializer.is_valid():
-            gastos_data = serializer.validated_data['gastos']
-            gastos = []
-            for gasto_data in gastos_data:
-                gasto = Gasto.objects.create(
-                    usuario=request.user,  # Asignar usuario
-                    **gasto_data
-                )
-                gastos.append(gasto)
-            
+        serializer = BulkGastoSerializer(data=request.data, context=self.get_serializer_context())
+        if not serializer.is_valid():
+            # Errores por índice de fila; no se inserta nada si alguna falla
             return Response(
-                GastoSerializer(gastos, many=True).data,
-                status=status.HTTP_201_CREATED
+                errores_por_fila(serializer.errors, 'gastos'),
+                status=status.HTTP_400_BAD_REQUEST
             )
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Inserción en lotes dentro de una transacción
+        gastos = serializer.save(usuario=request.user)['gastos']  # Asignar usuario
+        
+        with cronometro('serializacion'):
+            datos = GastoSerializer(gastos, many=True, context=self.get_serializer_context()).data
+        return Response(datos, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['get'], content_negotiation_class=IgnorarAccept)
+    def factura(self, request, pk=None):
+        """Descarga la factura del gasto (admite Range y If-None-Match)"""
+        facturas = self.get_queryset().exclude(factura='').exclude(factura__isnull=True)
+        nombre = get_object_or_404(facturas.values_list('factura', flat=True), pk=pk)
+        return servir_factura(request, nombre)
+    
+    @action(detail=True, methods=['get'])
+    def analisis(self, request, pk=None):
+        """Texto, miniatura y datos sugeridos de la factura; lo encola si falta"""
+        facturas = self.get_queryset().exclude(factura='').exclude(factura__isnull=True)
+        nombre = get_object_or_404(facturas.values_list('factura', flat=True), pk=pk)
+        return Response(AnalisisFacturaSerializer(
+            encolar(nombre), context=self.get_serializer_context()
+        ).data)
+    
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def importar(self, request):
+        """Importar gastos desde un CSV o XLSX"""
+        return importar_archivo(request, 'gastos')
+    
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """Exportar gastos (respeta los filtros de trimestre y año)"""
+        return exportar_archivo(request, self.get_queryset(), 'gastos')
 
 
-class ResumenTrimestralViewSet(viewsets.ReadOnlyModelViewSet):
-    """ViewSet para ver resúmenes trimestrales - Multi-tenant"""
-    serializer_class = ResumenTrimestralSerializer
+class ClienteViewSet(viewsets.ReadOnlyModelViewSet):
+    """Clientes normalizados del usuario; ?q= autocompleta por prefijo"""
+    serializer_class = ClienteSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        # Los resúmenes se calculan dinámicamente, no se almacenan
-        return []
+        return Cliente.objects.filter(usuario=self.request.user)
     
-    @action(detail=False)
-    def calcular(self, request):
-        """Calcula el resumen de un trimestre para el usuario autenticado"""
-        trimestre = request.query_params.get('trimestre', None)
-        año = request.query_params.get('año', date.today().year)
-        
-        if not trimestre:
+    def list(self, request, *args, **kwargs):
+        prefijo = request.query_params.get('q', None)
+        if prefijo is None:
+            return super().list(request, *args, **kwargs)
+        clientes = autocompletar(Cliente, request.user, prefijo, limite_autocompletar(request))
+        return Response(self.get_serializer(clientes, many=True).data)
+
+
+class ProveedorViewSet(viewsets.ReadOnlyModelViewSet):
+    """Proveedores normalizados del usuario; ?q= autocompleta por prefijo"""
+    serializer_class = ProveedorSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return Proveedor.objects.filter(usuario=self.request.user)
+    
+    def list(self, request, *args, **kwargs):
+        prefijo = request.query_params.get('q', None)
+        if prefijo is None:
+            return super().list(request, *args, **kwargs)
+        proveedores = autocompletar(Proveedor, request.user, prefijo, limite_autocompletar(request))
+        return Response(self.get_serializer(proveedores, many=True).data)
+
+
+class SubidaFacturaViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                           mixins.DestroyModelMixin, mixins.ListModelMixin,
+                           viewsets.GenericViewSet):
+    """
+    Subidas de facturas por trozos, reanudables:
+    POST {nombre, tamaño, sha256?} -> PUT trozo/ con Upload-Offset -> el ID
+    se usa como `subida` al crear el gasto. GET/HEAD dicen por dónde seguir.
+    """
+    serializer_class = SubidaFacturaSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return SubidaFactura.objects.filter(usuario=self.request.user)
+    
+    def perform_create(self, serializer):
+        serializer.save(usuario=self.request.user)
+    
+    def perform_destroy(self, instance):
+        cancelar_subida(instance)
+    
+    def finalize_response(self, request, response, *args, **kwargs):
+        # Cabeceras de tus para reanudar con un HEAD
+        datos = getattr(response, 'data', None)
+        if response.status_code < 400 and isinstance(datos, dict) and 'recibido' in datos:
+            response['Upload-Offset'] = str(datos['recibido'])
+            response['Upload-Length'] = str(datos['tamaño'])
+        return super().finalize_response(request, response, *args, **kwargs)
+    
+    @action(detail=True, methods=['put', 'patch'], parser_classes=[TrozoParser, TrozoTusParser])
+    def trozo(self, request, pk=None):
+        """Bytes desde la cabecera Upload-Offset (o ?offset=) hasta donde llegue el trozo"""
+        offset = request.headers.get('Upload-Offset', request.query_params.get('offset'))
+        try:
+            offset = int(offset)
+        except (TypeError, ValueError):
             return Response(
-                {"error": "Debe especificar el trimestre"},
+                {"error": "Falta la cabecera Upload-Offset"},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
         try:
-            trimestre = int(trimestre)
-            año = int(año)
-        except ValueError:
+            subida = escribir_trozo(self.get_object(), offset, request.data)
+        except OffsetIncorrecto as e:
+            # El cliente sigue desde `recibido` (p. ej. tras reintentar un trozo ya guardado)
             return Response(
-                {"error": "Trimestre y año deben ser números"},
-                status=status.HTTP_400_BAD_REQUEST
+                {"error": str(e), "recibido": e.recibido},
+                status=status.HTTP_409_CONFLICT, headers={'Upload-Offset': str(e.recibido)}
             )
-        
-        # Calcular fechas del trimestre
-        trimestre_meses = {
-            1: (1, 3),
-            2: (4, 6),
-            3: (7, 9),
-            4: (10, 12)
-        }
-        
-        if trimestre not in trimestre_meses:
+        except ErrorSubida as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(subida).data)
+    
+    @action(detail=True, methods=['get'])
+    def analisis(self, request, pk=None):
+        """Análisis de la factura subida, para rellenar el gasto antes de crearlo"""
+        subida = self.get_object()
+        if not subida.completa:
             return Response(
-                {"error": "Trimestre debe ser 1, 2, 3 o 4"},
-                status=status.HTTP_400_BAD_REQUEST
+                {"error": "La subida no está completa"},
+                status=status.HTTP_409_CONFLICT
             )
+        return Response(AnalisisFacturaSerializer(
+            encolar(subida.archivo.archivo.name), context=self.get_serializer_context()
+        ).data)
+
+
+def limite_autocompletar(request):
+    """Número de sugerencias (?limite=, entre 1 y 50; 10 por defecto)"""
+    try:
+        return max(1, min(int(request.query_params.get('limite', 10)), 50))
+    except ValueError:
+        return 10
+
+
+# Máximo de años que se pueden pedir en /api/resumen/rango/
+MAX_AÑOS_RANGO = 20
+
+
+def parametros_calcular(params):
+    """(trimestre, año, mensaje de error o None) de ?trimestre=&año="""
+    trimestre = params.get('trimestre', None)
+    año = params.get('año', date.today().year)
+    
+    if not trimestre:
+        return None, None, "Debe especificar el trimestre"
+    
+    try:
+        trimestre = int(trimestre)
+        año = int(año)
+    except ValueError:
+        return None, None, "Trimestre y año deben ser números"
+    
+    if trimestre not in TRIMESTRE_MESES:
+        return None, None, "Trimestre debe ser 1, 2, 3 o 4"
+    return trimestre, año, None
+
+
+def quiere_detalle(params):
+    """?detalle=false|0|no omite el listado de ingresos y gastos"""
+    return params.get('detalle', 'true').lower() not in ('false', '0', 'no')
+
+
+def parametros_modelos(params):
+    """(año, mensaje de error o None) de ?año="""
+    try:
+        return int(params.get('año', date.today().year)), None
+    except ValueError:
+        return None, "El año debe ser un número"
+
+
+def parametros_rango(params):
+    """(desde, hasta, mensaje de error o None) de ?desde=&hasta="""
+    año_actual = date.today().year
+    
+    try:
+        desde = int(params.get('desde', año_actual))
+        hasta = int(params.get('hasta', desde))
+    except ValueError:
+        return None, None, "Desde y hasta deben ser años"
+    
+    if desde > hasta:
+        return None, None, "Desde no puede ser posterior a hasta"
+    
+    if hasta - desde >= MAX_AÑOS_RANGO:
+        return None, None, f"El rango no puede superar {MAX_AÑOS_RANGO} años"
+    return desde, hasta, None
+
+
+class ResumenTrimestralViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet para ver resúmenes trimestrales - Multi-tenant"""
+    serializer_class = ResumenTrimestralSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        """Resúmenes materializados solo del usuario autenticado"""
+        queryset = ResumenTrimestral.objects.filter(usuario=self.request.user)
         
-        mes_inicio, mes_fin = trimestre_meses[trimestre]
-        fecha_inicio = date(año, mes_inicio, 1)
-        
-        if mes_fin == 12:
-            fecha_fin = date(año, 12, 31)
-        else:
-            fecha_fin = date(año, mes_fin + 1, 1) - timedelta(days=1)
-        
-        # IMPORTANTE: Filtrar por usuario
-        ingresos = Ingreso.objects.filter(
-            usuario=request.user,  # Solo SUS ingresos
-            trimestre=trimestre,
-            año=año
-        )
-        
-        # Calcular totales
-        ingresos_data = ingresos.aggregate(
-            total=Sum('importe') or Decimal('0'),
-        )
-        
-        iva_repercutido = Decimal('0')
-        irpf_retenido = Decimal('0')
-        
-        for ingreso in ingresos:
-            iva_repercutido += ingreso.iva_importe
-            irpf_retenido += ingreso.irpf_importe
-        
-        # IMPORTANTE: Filtrar por usuario
-        gastos = Gasto.objects.filter(
-            usuario=request.user,  # Solo SUS gastos
-            trimestre=trimestre,
-            año=año
-        )
+        return filtrar_periodo(queryset, self.request.query_params)
+    
+    @action(detail=False)
+    def calcular(self, request):
+        """Calcula el resumen de un trimestre para el usuario autenticado"""
+        trimestre, año, error = parametros_calcular(request.query_params)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
         
-        gastos_data = gastos.aggregate(
-            total=Sum('importe') or Decimal('0'),
-        )
+        fecha_inicio, fecha_fin = fechas_trimestre(trimestre, año)
         
-        iva_soportado = Decimal('0')
-        for gasto in gastos:
-            iva_soportado += gasto.iva_importe
+        # En el simplificado no hay 130: irpf_a_ingresar queda a None
+        regimen_iva = regimen_iva_usuario(request.user)
         
-        # Cálculos finales
-        ingresos_totales = ingresos_data['total'] or Decimal('0')
-        gastos_totales = gastos_data['total'] or Decimal('0')
-        beneficio_neto = ingresos_totales - gastos_totales
-        iva_a_pagar = iva_repercutido - iva_soportado
-        irpf_a_ingresar = beneficio_neto * Decimal('0.20')
+        # Con detalle=false no se cargan las filas, solo los totales
+        if not quiere_detalle(request.query_params):
+            # Totales desde el resumen materializado: una sola lectura
+            # IMPORTANTE: leer_resumen filtra por usuario
+            data = leer_resumen(request.user, trimestre, año, regimen_iva)
+        else:
+            ingresos = list(Ingreso.objects.filter(
+                usuario=request.user,  # Solo SUS ingresos
+                trimestre=trimestre,
+                año=año
+            ))
+            gastos = list(Gasto.objects.filter(
+                usuario=request.user,  # Solo SUS gastos
+                trimestre=trimestre,
+                año=año
+            ))
+            # Las filas ya están cargadas: los totales salen de ellas sin otra
+            # query; el pago del 130 necesita además los trimestres anteriores
+            anteriores = []
+            if aplica_130(regimen_iva):
+                anteriores = leer_anteriores(request.user, trimestre, año)
+            data = con_pago_130(resumen_de_filas(ingresos, gastos), anteriores, regimen_iva)
+            data['ingresos_detalle'] = ingresos
+            data['gastos_detalle'] = gastos
         
-        data = {
+        data.update({
             'trimestre': trimestre,
             'año': año,
             'fecha_inicio': fecha_inicio,
             'fecha_fin': fecha_fin,
-            'ingresos_totales': ingresos_totales,
-            'iva_repercutido': iva_repercutido,
-            'irpf_retenido': irpf_retenido,
-            'gastos_totales': gastos_totales,
-            'iva_soportado': iva_soportado,
-            'beneficio_neto': beneficio_neto,
-            'iva_a_pagar': iva_a_pagar,
-            'irpf_a_ingresar': irpf_a_ingresar,
-            'ingresos_detalle': ingresos,
-            'gastos_detalle': gastos
-        }
+        })
         
         serializer = ResumenCalculadoSerializer(data)
         return Response(serializer.data)
     
+    @action(detail=False)
+    def rango(self, request):
+        """Resúmenes de todos los trimestres entre dos años (desde/hasta)"""
+        desde, hasta, error = parametros_rango(request.query_params)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # IMPORTANTE: calcular_rango filtra por usuario
+        resumenes = calcular_rango(request.user, desde, hasta)
+        
+        return Response({
+            'desde': desde,
+            'hasta': hasta,
+            'trimestres': ResumenCalculadoSerializer(resumenes, many=True).data,
+        })
+    
+    @action(detail=False)
+    def modelos(self, request):
+        """Casillas de los modelos 130 y 303 de los cuatro trimestres de un año"""
+        año, error = parametros_modelos(request.query_params)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # IMPORTANTE: modelos_año filtra por usuario
+        return Response(ModelosAñoSerializer(modelos_año(request.user, año)).data)
+    
     @action(detail=False, methods=['get'])
     def dashboard_stats(self, request):
         """Estadísticas generales del usuario para el dashboard"""
         año_actual = date.today().year
         
-        # Total ingresos del año
-        ingresos_año = Ingreso.objects.filter(
-            usuario=request.user,
-            año=año_actual
-        ).aggregate(total=Sum('importe'))['total'] or Decimal('0')
-        
-        # Total gastos del año
-        gastos_año = Gasto.objects.filter(
-            usuario=request.user,
-            año=año_actual
-        ).aggregate(total=Sum('importe'))['total'] or Decimal('0')
-        
-        # Número de clientes únicos
-        clientes_unicos = Ingreso.objects.filter(
-            usuario=request.user
-        ).values('cliente').distinct().count()
-        
-        return Response({
-            'ingresos_año': ingresos_año,
-            'gastos_año': gastos_año,
-            'beneficio_año': ingresos_año - gastos_año,
-            'clientes_unicos': clientes_unicos,
-        })
\ No newline at end of file
+        # Servidas desde la caché; se invalidan al modificar ingresos o gastos
+        stats = obtener_dashboard_stats(
+            request.user.pk, año_actual,
+            lambda: estadisticas_dashboard(request.user, año_actual)
+        )
+        return Response(stats)
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        """Aciertos y fallos de la caché de estadísticas (solo staff)"""
+        return Response(estadisticas_cache())
+
+
+@require_safe
+def factura_firmada(request, firma):
+    """
+    Descarga de una factura con una URL firmada de los listados: la firma es
+    la credencial (sirve en <a href> o <img>) y caduca sola.
+    """
+    nombre, caduca = leer_firma(firma)
+    return servir_factura(request, nombre, max_age=max(int(caduca - time.time()), 0))
+
+
+def metricas(request):
+    """
+    Métricas en formato de texto de Prometheus. Si METRICAS_TOKEN está
+    configurado hay que enviarlo como `Authorization: Bearer <token>`.
+    """
+    token = getattr(settings, 'METRICAS_TOKEN', None)
+    if token:
+        cabecera = request.headers.get('Authorization', '')
+        if not constant_time_compare(cabecera, f'Bearer {token}'):
+            return HttpResponse(status=401)
+    return HttpResponse(
+        registro.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -0,0 +1,189 @@
+# backend/accounts/vistas_async.py
+
+from datetime import date
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .cache import aobtener_dashboard_stats
+from .lectura import CAMPOS_INGRESO, CAMPOS_GASTO, con_miniatura, leer_ingresos, leer_gastos
+from .modelos_fiscales import aplica_130
+from .models import Ingreso, Gasto, ResumenTrimestral
+from .pagination import IngresoGastoPagination, PaginacionNumerada
+from .renderers import JSONRapidoRenderer
+from .resumen import (
+    fechas_trimestre, aleer_resumen, aleer_anteriores, resumen_de_filas, con_pago_130,
+    acalcular_rango, aestadisticas_dashboard, amodelos_año, aregimen_iva_usuario
+)
+from .serializers import (
+    ModelosAñoSerializer, ResumenCalculadoSerializer, ResumenTrimestralSerializer
+)
+from .views import (
+    filtrar_periodo, parametros_calcular, parametros_modelos, parametros_rango, quiere_detalle
+)
+
+
+# Versiones asíncronas (ASGI) de los listados y de las acciones de
+# ResumenTrimestralViewSet, con la misma salida que las de DRF. DRF no tiene
+# vistas asíncronas: son vistas de Django que reutilizan su autenticación,
+# paginación y serializers. El ORM asíncrono de Django pasa cada query por
+# sync_to_async(thread_sensitive=True): las de una petición van una tras otra
+# por el mismo hilo y conexión, así que una petición no es más rápida que en
+# WSGI. Lo que cambia es que el worker tiene otras peticiones en curso
+# mientras tanto.
+
+
+def respuesta(data, status=status.HTTP_200_OK):
+    return HttpResponse(
+        JSONRapidoRenderer().render(data), status=status, content_type='application/json'
+    )
+
+
+async def autenticar(request):
+    """(usuario, autenticador) con las clases de autenticación de DRF"""
+    autenticadores = [clase() for clase in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    for autenticador in autenticadores:
+        resultado = await sync_to_async(autenticador.authenticate)(request)
+        if resultado is not None:
+            return resultado[0], autenticador
+    return None, autenticadores[0] if autenticadores else None
+
+
+def vista_async(vista):
+    """
+    Vista GET asíncrona autenticada: recibe la Request de DRF (query_params,
+    build_absolute_uri) con request.user y las APIException se devuelven
+    como JSON igual que en DRF.
+    """
+    @wraps(vista)
+    async def envoltura(http_request, *args, **kwargs):
+        request = Request(http_request)
+        autenticador = None
+        try:
+            usuario, autenticador = await autenticar(request)
+            if usuario is None:
+                raise NotAuthenticated()
+            request.user = usuario
+            return await vista(request, *args, **kwargs)
+        except APIException as exc:
+            detalle = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            error = respuesta(detalle, status=exc.status_code)
+            if isinstance(exc, (NotAuthenticated, AuthenticationFailed)) and autenticador:
+                error['WWW-Authenticate'] = autenticador.authenticate_header(request)
+            return error
+
+    return require_GET(envoltura)
+
+
+async def _lista(queryset):
+    return [fila async for fila in queryset]
+
+
+async def _listado(request, queryset, campos, leer):
+    queryset = filtrar_periodo(
+        queryset.filter(usuario=request.user), request.query_params
+    ).values(*campos)
+    paginador = IngresoGastoPagination()
+    filas = await paginador.apaginate_queryset(queryset, request)
+    return respuesta(paginador.get_paginated_response(leer(filas)).data)
+
+
+@vista_async
+async def ingresos(request):
+    """GET /api/async/ingresos/ - como /api/ingresos/"""
+    return await _listado(request, Ingreso.objects.all(), CAMPOS_INGRESO, leer_ingresos)
+
+
+@vista_async
+async def gastos(request):
+    """GET /api/async/gastos/ - como /api/gastos/"""
+    return await _listado(
+        request, con_miniatura(Gasto.objects.all()), CAMPOS_GASTO + ['miniatura_nombre'],
+        lambda filas: leer_gastos(filas, request)
+    )
+
+
+@vista_async
+async def resumenes(request):
+    """GET /api/async/resumen/ - resúmenes materializados del usuario"""
+    queryset = filtrar_periodo(
+        ResumenTrimestral.objects.filter(usuario=request.user), request.query_params
+    )
+    paginador = PaginacionNumerada()
+    filas = await paginador.apaginate_queryset(queryset, request)
+    datos = ResumenTrimestralSerializer(filas, many=True).data
+    return respuesta(paginador.get_paginated_response(datos).data)
+
+
+@vista_async
+async def calcular(request):
+    """GET /api/async/resumen/calcular/ - como ResumenTrimestralViewSet.calcular"""
+    trimestre, año, error = parametros_calcular(request.query_params)
+    if error:
+        return respuesta({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+    fecha_inicio, fecha_fin = fechas_trimestre(trimestre, año)
+
+    regimen_iva = await aregimen_iva_usuario(request.user)
+    if not quiere_detalle(request.query_params):
+        data = await aleer_resumen(request.user, trimestre, año, regimen_iva)
+    else:
+        filtro = {'usuario': request.user, 'trimestre': trimestre, 'año': año}
+        ingresos = await _lista(Ingreso.objects.filter(**filtro))
+        gastos = await _lista(Gasto.objects.filter(**filtro))
+        anteriores = []
+        if aplica_130(regimen_iva):
+            anteriores = await aleer_anteriores(request.user, trimestre, año)
+        data = con_pago_130(resumen_de_filas(ingresos, gastos), anteriores, regimen_iva)
+        data['ingresos_detalle'] = ingresos
+        data['gastos_detalle'] = gastos
+
+    data.update({
+        'trimestre': trimestre,
+        'año': año,
+        'fecha_inicio': fecha_inicio,
+        'fecha_fin': fecha_fin,
+    })
+    return respuesta(ResumenCalculadoSerializer(data).data)
+
+
+@vista_async
+async def rango(request):
+    """GET /api/async/resumen/rango/ - como ResumenTrimestralViewSet.rango"""
+    desde, hasta, error = parametros_rango(request.query_params)
+    if error:
+        return respuesta({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+    resumenes = await acalcular_rango(request.user, desde, hasta)
+    return respuesta({
+        'desde': desde,
+        'hasta': hasta,
+        'trimestres': ResumenCalculadoSerializer(resumenes, many=True).data,
+    })
+
+
+@vista_async
+async def modelos(request):
+    """GET /api/async/resumen/modelos/ - como ResumenTrimestralViewSet.modelos"""
+    año, error = parametros_modelos(request.query_params)
+    if error:
+        return respuesta({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+    return respuesta(ModelosAñoSerializer(await amodelos_año(request.user, año)).data)
+
+
+@vista_async
+async def dashboard_stats(request):
+    """GET /api/async/resumen/dashboard_stats/ - misma caché que la vista síncrona"""
+    año_actual = date.today().year
+    stats = await aobtener_dashboard_stats(
+        request.user.pk, año_actual,
+        lambda: aestadisticas_dashboard(request.user, año_actual)
+    )
+    return respuesta(stats)
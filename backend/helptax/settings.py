@@ -42,6 +42,8 @@ INSTALLED_APPS = [
 SITE_ID = 1
 
 MIDDLEWARE = [
+    'accounts.middleware.MetricasMiddleware',  # Primero: mide la petición completa
+    'accounts.middleware.LecturaMiddleware',  # GET/HEAD leen por el alias 'lectura'
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # Debe ir antes de CommonMiddleware
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -74,13 +76,110 @@ TEMPLATES = [
 WSGI_APPLICATION = 'helptax.wsgi.application'
 
 # Database
+# SQLite para producción: WAL (las lecturas no esperan a las escrituras),
+# espera de hasta SQLITE_BUSY_TIMEOUT ms en vez de "database is locked" y
+# caché/mmap más grandes. Con IMMEDIATE las transacciones cogen el cerrojo
+# de escritura al empezar y no fallan al pasar de leer a escribir.
+SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))
+SQLITE_PRAGMAS = [
+    'PRAGMA journal_mode = WAL',
+    f'PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT}',
+    'PRAGMA synchronous = NORMAL',  # Seguro con WAL: solo se sincroniza en los checkpoints
+    'PRAGMA cache_size = -20000',  # 20 MB por conexión
+    'PRAGMA mmap_size = 134217728',  # 128 MB
+    'PRAGMA temp_store = MEMORY',
+]
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': '; '.join(SQLITE_PRAGMAS),
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+    # La misma base de datos para las peticiones de solo lectura
+    # (accounts/conexiones.py); query_only impide escribir por error
+    'lectura': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': '; '.join(SQLITE_PRAGMAS + ['PRAGMA query_only = ON']),
+        },
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+# PostgreSQL (opcional, necesita psycopg): con POSTGRES_DB se usa en lugar de
+# SQLite, también para los tests (base de datos test_<POSTGRES_DB>)
+if os.environ.get('POSTGRES_DB'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ['POSTGRES_DB'],
+            'USER': os.environ.get('POSTGRES_USER', ''),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', ''),
+            'PORT': os.environ.get('POSTGRES_PORT', ''),
+            'CONN_MAX_AGE': 60,
+        },
+    }
+DATABASE_ROUTERS = ['accounts.conexiones.LecturaRouter']
+
+# Ingreso y Gasto particionados por año en PostgreSQL (accounts/particiones.py);
+# se aplica al migrar. En SQLite no tiene efecto.
+PARTICIONAR_POR_AÑO = os.environ.get('POSTGRES_PARTICIONES', '1') != '0'
+
+# Cache: por defecto en la memoria de cada proceso, así que lo que invalida un
+# worker o un comando de gestión no llega a los demás. Con varios procesos,
+# CACHE_REDIS_URL comparte la caché entre todos (necesita el paquete redis).
+if os.environ.get('CACHE_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['CACHE_REDIS_URL'],
+        }
     }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'helptax',
+            'OPTIONS': {
+                'MAX_ENTRIES': 10000,
+            },
+        }
+    }
+
+# Segundos que se guardan las estadísticas del dashboard. Se invalidan al
+# escribir, pero con LocMemCache solo en el mismo proceso: es lo más que
+# puede durar un dato viejo en los demás
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', 60))
+
+# Login por email o usuario con una consulta y un hash (accounts/autenticacion.py).
+# Es el único backend: otro más repetiría el hash en cada login fallido
+AUTHENTICATION_BACKENDS = ['accounts.autenticacion.EmailBackend']
+
+# Logs de 'accounts' en JSON, escritos desde un hilo aparte (accounts/logs.py)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'accounts.logs.FormatoJSON'},
+    },
+    'handlers': {
+        'cola': {'()': 'accounts.logs.ColaHandler', 'formatter': 'json'},
+    },
+    'loggers': {
+        'accounts': {'handlers': ['cola'], 'level': 'INFO', 'propagate': False},
+    },
 }
 
+# Filtro de Bloom de NIF registrados delante de la BD (accounts/nif.py)
+NIF_FILTRO_ERROR = 0.01  # Falsos positivos (acaban en una query)
+NIF_FILTRO_TTL = 10 * 60  # Segundos hasta rehacerlo (los NIF nuevos llegan por la caché)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -123,26 +222,91 @@ CORS_ALLOWED_ORIGINS = [
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Sin query por petición: usa los claims del token (accounts/autenticacion.py)
+        'accounts.autenticacion.JWTClaimsAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 1000,
+    # JSON con orjson si está instalado; la API navegable de DRF solo en desarrollo
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'accounts.renderers.JSONRapidoRenderer',
+        *(['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),
     ],
 }
 
+# Inserción masiva (bulk_create de ingresos y gastos)
+BULK_CREATE_BATCH_SIZE = 1000  # Filas por INSERT
+BULK_CREATE_MAX_FILAS = 50000  # Máximo de filas por petición
+DATA_UPLOAD_MAX_MEMORY_SIZE = 50 * 1024 * 1024  # Peticiones JSON grandes
+
+# Subida de facturas por trozos (accounts/subidas.py)
+SUBIDAS_DIR = os.path.join(BASE_DIR, 'subidas')  # Subidas a medias; no se sirven
+FACTURA_MAX_BYTES = 25 * 1024 * 1024
+SUBIDA_TROZO_MAX_BYTES = 5 * 1024 * 1024
+FACTURA_EXTENSIONES = ['pdf', 'jpg', 'jpeg', 'png', 'heic', 'webp']
+
+# Descarga de facturas (accounts/descargas.py): URLs firmadas en vez de media pública
+FACTURAS_URL_CADUCIDAD = 15 * 60  # Las URLs valen entre 15 y 30 minutos
+# Quién envía el archivo: None (Django), 'x-accel-redirect' (nginx) o 'x-sendfile' (Apache)
+FACTURAS_ENVIO = os.environ.get('FACTURAS_ENVIO') or None
+# location `internal` de nginx que apunta a MEDIA_ROOT
+FACTURAS_ACCEL_PREFIJO = os.environ.get('FACTURAS_ACCEL_PREFIJO', '/media-protegida/')
+
+# Análisis de facturas (accounts/procesado.py): texto, miniatura y datos sugeridos
+# Procesos del pool local; 0 -> solo con `manage.py procesar_facturas`
+FACTURAS_PROCESOS = int(os.environ.get('FACTURAS_PROCESOS', 2))
+
+# Métricas por vista (accounts/middleware.py) expuestas en /metrics
+METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN')  # Si se define, /metrics lo exige
+
+# Máximo de queries por vista (nombre de la URL) en peticiones GET. El usuario
+# autenticado sale del token y no cuenta. Si se supera -> aviso en el log y en /metrics; con
+# PRESUPUESTO_QUERIES_ESTRICTO -> excepción (PRESUPUESTO_QUERIES_ESTRICTO=1 en CI; los
+# tests de accounts/tests/test_presupuestos.py lo activan siempre)
+PRESUPUESTO_QUERIES = {
+    'ingreso-list': 2,
+    'ingreso-detail': 1,
+    'gasto-list': 2,
+    'gasto-detail': 1,
+    'resumen-calcular': 4,
+    'resumen-rango': 3,
+    'resumen-modelos': 3,
+    'resumen-dashboard-stats': 2,
+    'cliente-list': 2,
+    'proveedor-list': 2,
+    'gasto-factura': 1,
+    'factura-firmada': 0,
+    'check-auth': 0,
+    'current-user': 1,
+    'perfil-autonomo': 1,
+    'async-ingreso-list': 2,
+    'async-gasto-list': 2,
+    'async-resumen-calcular': 4,
+    'async-resumen-rango': 3,
+    'async-resumen-modelos': 3,
+    'async-resumen-dashboard-stats': 2,
+}
+PRESUPUESTO_QUERIES_ESTRICTO = os.environ.get('PRESUPUESTO_QUERIES_ESTRICTO', '0') == '1'
+
 # JWT Settings
 from datetime import timedelta
 
+# Usuarios de tokens sin claims (JWTClaimsAuthentication): caché LRU por proceso
+JWT_USUARIOS_CACHE_MAX = 10000
+JWT_USUARIOS_CACHE_TTL = 5 * 60  # Segundos
+# Cada cuánto (segundos) un proceso purga los refresh tokens revocados ya caducados
+JWT_PURGA_INTERVALO = 60 * 60
+
 SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
+    # Sin caché compartida, lo que tarda otro proceso en dejar de aceptar el
+    # token de un usuario desactivado o borrado (accounts/autenticacion.py)
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
-    'BLACKLIST_AFTER_ROTATION': True,
+    'BLACKLIST_AFTER_ROTATION': True,  # Lista negra propia: accounts.models.TokenRevocado
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
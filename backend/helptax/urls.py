@@ -5,15 +5,18 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from dj_rest_auth.views import LogoutView
-from accounts.auth_views_custom import custom_register, custom_login
+from accounts.auth_views_custom import custom_register, custom_login, token_refresh
+from accounts.views import metricas
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('accounts.urls')),
     # Auth endpoints
     path('api/auth/login/', custom_login, name='rest_login'),
+    path('api/auth/token/refresh/', token_refresh, name='token_refresh'),
     path('api/auth/logout/', LogoutView.as_view(), name='rest_logout'),
     path('api/auth/registration/', custom_register, name='rest_register'),
+    path('metrics', metricas, name='metricas'),
 ]
 
 # Servir archivos media en desarrollo
@@ -27,6 +27,28 @@ api.interceptors.request.use(
   }
 );
 
+// Refresco en curso: las peticiones que reciben 401 a la vez esperan al mismo.
+// El backend rota el refresh token y el anterior ya no vale.
+let refrescoEnCurso: Promise<string> | null = null;
+
+const refrescarToken = (refreshToken: string): Promise<string> => {
+  if (!refrescoEnCurso) {
+    refrescoEnCurso = axios
+      .post(`${API_BASE_URL}/auth/token/refresh/`, { refresh: refreshToken })
+      .then((response) => {
+        localStorage.setItem('access_token', response.data.access);
+        if (response.data.refresh) {
+          localStorage.setItem('refresh_token', response.data.refresh);
+        }
+        return response.data.access as string;
+      })
+      .finally(() => {
+        refrescoEnCurso = null;
+      });
+  }
+  return refrescoEnCurso;
+};
+
 // Interceptor para manejar errores de autenticación
 api.interceptors.response.use(
   (response) => response,
@@ -39,12 +61,7 @@ api.interceptors.response.use(
       try {
         const refreshToken = localStorage.getItem('refresh_token');
         if (refreshToken) {
-          const response = await axios.post(`${API_BASE_URL}/auth/token/refresh/`, {
-            refresh: refreshToken
-          });
-          
-          const newAccessToken = response.data.access;
-          localStorage.setItem('access_token', newAccessToken);
+          const newAccessToken = await refrescarToken(refreshToken);
           
           // Actualizar el header para la petición original
           originalRequest.headers.Authorization = `Bearer ${newAccessToken}`;
@@ -152,6 +169,14 @@ export const resumenService = {
     return response.data;
   },
 
+  // Resúmenes de todos los trimestres entre dos años en una sola petición
+  rango: async (desde: number, hasta: number) => {
+    const response = await api.get<{ desde: number; hasta: number; trimestres: ResumenTrimestral[] }>(
+      `/resumen/rango/?desde=${desde}&hasta=${hasta}`
+    );
+    return response.data.trimestres;
+  },
+
   // Obtener todos los resúmenes guardados
   getAll: async (año?: number) => {
     const params = año ? `?año=${año}` : '';
@@ -159,17 +159,21 @@ class AuthService {
   }
 
   async refreshAccessToken(): Promise<string | null> {
-    if (!this.refreshToken) return null;
+    // El interceptor de api.ts puede haberlo rotado ya
+    const refreshToken = localStorage.getItem('refresh_token') || this.refreshToken;
+    if (!refreshToken) return null;
 
     try {
       const response = await axios.post(`${API_BASE_URL}/auth/token/refresh/`, {
-        refresh: this.refreshToken
+        refresh: refreshToken
       });
       
       const newAccessToken = response.data.access;
-      this.accessToken = newAccessToken;
-      localStorage.setItem('access_token', newAccessToken);
-      this.setAuthHeader(newAccessToken);
+      // Con rotación llega también un refresh nuevo y el anterior deja de valer
+      this.saveTokens({
+        access: newAccessToken,
+        refresh: response.data.refresh || refreshToken
+      });
       
       return newAccessToken;
     } catch (error) {